@@ -0,0 +1,238 @@
+"""
+Async counterparts of the read helpers in ``app.database``.
+
+On Postgres (when asyncpg is installed) queries run natively on an asyncpg
+pool.  Otherwise the sync helper runs on a dedicated thread pool, so
+endpoints awaiting the database don't compete with sync endpoints for the
+event loop's default threadpool.  Function names, arguments and return
+values match ``app.database``.
+"""
+import asyncio
+import functools
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Dict, List, Optional
+
+import app.database as db
+from app.engine import (
+    DB_POOL_SIZE, DB_REPLICA_POOL_SIZE, database_url, mark_replica_down, replica_available, replica_url
+)
+from app.query_profiler import profiler
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+logger = logging.getLogger(__name__)
+
+DB_EXECUTOR_WORKERS = int(os.environ.get("DB_EXECUTOR_WORKERS", "32"))
+_executor = None
+_executor_lock = Lock()
+# Keyed by replica flag.
+_pg_pools: Dict[bool, object] = {}
+_pg_pool_lock = None
+
+
+def uses_asyncpg() -> bool:
+    return db.IS_POSTGRES and asyncpg is not None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+    return _executor
+
+
+async def run_sync(func, *args, **kwargs):
+    """Run a blocking call on the database executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def _get_pg_pool(replica: bool = False):
+    global _pg_pool_lock
+    if replica not in _pg_pools:
+        if _pg_pool_lock is None:
+            _pg_pool_lock = asyncio.Lock()
+        async with _pg_pool_lock:
+            if replica not in _pg_pools:
+                _pg_pools[replica] = await asyncpg.create_pool(
+                    replica_url() if replica else database_url(),
+                    min_size=1,
+                    max_size=DB_REPLICA_POOL_SIZE if replica else DB_POOL_SIZE
+                )
+    return _pg_pools[replica]
+
+
+async def close() -> None:
+    global _pg_pool_lock, _executor
+    for pool in list(_pg_pools.values()):
+        await pool.close()
+    _pg_pools.clear()
+    _pg_pool_lock = None
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def _numbered(query: str) -> str:
+    """``?`` placeholders to asyncpg's ``$1, $2, ...``."""
+    counter = iter(range(1, query.count("?") + 1))
+    return re.sub(r"\?", lambda _: f"${next(counter)}", query)
+
+
+async def _fetch(pool, query: str, params: tuple) -> List[Dict]:
+    async with pool.acquire() as conn:
+        start = time.perf_counter()
+        rows = await conn.fetch(query, *params)
+        profiler.record(query, time.perf_counter() - start)
+    return [dict(row) for row in rows]
+
+
+async def fetch_all(query: str, params: tuple = (), read_only: bool = False) -> List[Dict]:
+    """Rows of an asyncpg query written with ``?`` placeholders.
+
+    ``read_only`` queries use the replica pool when a replica is configured
+    and reachable, like ``app.database.get_db_connection``.
+    """
+    query = _numbered(query)
+    if read_only and replica_available():
+        try:
+            return await _fetch(await _get_pg_pool(replica=True), query, params)
+        except (OSError, asyncpg.PostgresConnectionError, asyncpg.InterfaceError) as e:
+            logger.warning(f"Read replica unavailable, using primary: {e}")
+            mark_replica_down()
+    return await _fetch(await _get_pg_pool(), query, params)
+
+
+async def fetch_one(query: str, params: tuple = (), read_only: bool = False) -> Optional[Dict]:
+    rows = await fetch_all(query, params, read_only)
+    return rows[0] if rows else None
+
+
+async def get_recent_alerts(limit: int = 50) -> List[Dict]:
+    if not uses_asyncpg():
+        return await run_sync(db.get_recent_alerts, limit)
+    try:
+        return await fetch_all('SELECT * FROM alerts ORDER BY timestamp DESC LIMIT ?', (limit,), read_only=True)
+    except Exception as e:
+        logger.error(f"Failed to get alerts: {e}")
+        return []
+
+
+async def get_leaderboard_stats(limit: int = 10) -> List[Dict]:
+    if not uses_asyncpg():
+        return await run_sync(db.get_leaderboard_stats, limit)
+    try:
+        return await fetch_all('''
+            SELECT maker_address, total_volume, trade_count, max_trade_value, buy_volume, sell_volume
+            FROM whale_leaderboard
+            ORDER BY total_volume DESC, maker_address DESC
+            LIMIT ?
+        ''', (limit,), read_only=True)
+    except Exception as e:
+        logger.error(f"Failed to get leaderboard stats: {e}")
+        return []
+
+
+async def get_user_by_email(email: str) -> Optional[Dict]:
+    if not uses_asyncpg():
+        return await run_sync(db.get_user_by_email, email)
+    try:
+        return await fetch_one('SELECT * FROM users WHERE email = ?', (email,))
+    except Exception as e:
+        logger.error(f"Failed to get user by email: {e}")
+        return None
+
+
+async def get_latest_user_entitlement(user_id: int) -> Optional[Dict]:
+    if not uses_asyncpg():
+        return await run_sync(db.get_latest_user_entitlement, user_id)
+    return await fetch_one(
+        '''
+        SELECT * FROM user_entitlements
+        WHERE user_id = ?
+        ORDER BY created_at DESC
+        LIMIT 1
+        ''',
+        (user_id,)
+    )
+
+
+async def get_signals(limit: int = 50, offset: int = 0, before: Optional[tuple] = None) -> List[Dict]:
+    if not uses_asyncpg():
+        return await run_sync(db.get_signals, limit, offset, before)
+    if before is not None:
+        return await fetch_all(
+            '''
+            SELECT id, title, content, tier_required, evidence_json, created_at
+            FROM signals
+            WHERE (created_at, id) < (?, ?)
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+            ''',
+            (before[0], before[1], limit),
+            read_only=True
+        )
+    return await fetch_all(
+        '''
+        SELECT id, title, content, tier_required, evidence_json, created_at
+        FROM signals
+        ORDER BY created_at DESC, id DESC
+        LIMIT ? OFFSET ?
+        ''',
+        (limit, offset),
+        read_only=True
+    )
+
+
+async def get_signal_by_id(signal_id: int) -> Optional[Dict]:
+    if not uses_asyncpg():
+        return await run_sync(db.get_signal_by_id, signal_id)
+    return await fetch_one(
+        '''
+        SELECT id, title, content, tier_required, evidence_json, created_at
+        FROM signals
+        WHERE id = ?
+        ''',
+        (signal_id,)
+    )
+
+
+async def get_daily_pulse(limit: int = 20, offset: int = 0) -> List[Dict]:
+    if not uses_asyncpg():
+        return await run_sync(db.get_daily_pulse, limit, offset)
+    return await fetch_all(
+        '''
+        SELECT id, title, summary, content, created_at
+        FROM daily_pulse
+        ORDER BY created_at DESC
+        LIMIT ? OFFSET ?
+        ''',
+        (limit, offset),
+        read_only=True
+    )
+
+
+async def get_feature_flags(tier: str) -> List[Dict]:
+    if not uses_asyncpg():
+        return await run_sync(db.get_feature_flags, tier)
+    return await fetch_all(
+        '''
+        SELECT feature_key, enabled
+        FROM feature_flags
+        WHERE tier = ?
+        ORDER BY feature_key
+        ''',
+        (tier,),
+        read_only=True
+    )
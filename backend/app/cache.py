@@ -1,40 +1,270 @@
+"""
+Response cache: an in-process LRU in front of Redis.
+
+``RedisCache`` is the shared tier.  ``LocalCache`` is a per-worker LRU with
+per-entry expiry, bounded by entry count (``LOCAL_CACHE_MAX_ENTRIES``) and
+by the serialized size of its values (``LOCAL_CACHE_MAX_BYTES``).
+``TieredCache`` puts the two together for keys under
+``LOCAL_CACHE_PREFIXES`` (API responses by default): reads try local
+memory, then Redis, and fill local memory from whatever Redis had, for
+no longer than the Redis entry has left.  Other keys (counters and lists
+updated read-modify-write) go to Redis only, as before.
+
+Response entries (``get_entry`` / ``set_entry``) are envelopes holding the
+value, when it stops being fresh and how long it took to build; Redis keeps
+them ``CACHE_STALE_SECONDS`` longer so a stale copy can be served while it
+is rebuilt (see ``app.response_cache``).  A stale local copy is only
+served when there is no Redis that might hold a newer one.
+
+``delete`` and ``clear_pattern`` also publish the key or pattern on
+``CACHE_INVALIDATION_CHANNEL``; every worker listens and drops matching
+local entries.  Data versions (see ``app.cache_warmer``) are counters in
+Redis, mirrored in each worker and kept current over
+``DATA_VERSION_CHANNEL``.  Values served from local memory are shared between
+requests and must not be mutated.
+
+Values go to Redis through a ``Serializer``: a codec (``CACHE_CODEC``:
+json, orjson or msgpack) and, for payloads of ``CACHE_COMPRESS_MIN_BYTES``
+or more, a compressor (``CACHE_COMPRESSION``: zlib, zstd or lz4).  Every
+payload starts with a format byte naming both, so workers read entries
+written with any installed codec and a new one can be rolled out without
+a flush.  Entries written before the format byte existed are plain JSON
+text, which never starts with a byte >= 0x80, and still decode.  orjson,
+msgpack, zstandard and lz4 are optional; unregistered ones are skipped.
+"""
 import redis
 import json
+import math
 import os
-from typing import Optional, Any
+import random
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Optional, Any, Callable, Dict, NamedTuple, Tuple
 import logging
 
+from prometheus_client import Counter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
 logger = logging.getLogger(__name__)
 
+LOCAL_CACHE_ENABLE = os.environ.get("LOCAL_CACHE_ENABLE", "1") == "1"
+LOCAL_CACHE_MAX_ENTRIES = int(os.environ.get("LOCAL_CACHE_MAX_ENTRIES", "1024"))
+LOCAL_CACHE_MAX_BYTES = int(os.environ.get("LOCAL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+LOCAL_CACHE_PREFIXES = tuple(
+    prefix.strip() for prefix in os.environ.get("LOCAL_CACHE_PREFIXES", "api_cache:").split(",") if prefix.strip()
+)
+CACHE_INVALIDATION_CHANNEL = os.environ.get("CACHE_INVALIDATION_CHANNEL", "polypulse:cache:invalidate")
+DATA_VERSION_CHANNEL = os.environ.get("DATA_VERSION_CHANNEL", "polypulse:data:version")
+CACHE_STALE_SECONDS = int(os.environ.get("CACHE_STALE_SECONDS", "60"))
+# XFetch early-refresh factor; 0 refreshes only once an entry is stale.
+CACHE_EARLY_BETA = float(os.environ.get("CACHE_EARLY_BETA", "0"))
+CACHE_LOCK_SECONDS = float(os.environ.get("CACHE_LOCK_SECONDS", "30"))
+
+# Delete the lock only if we still hold it.
+_RELEASE_LOCK = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+# Raise the key to ARGV[1], never lower it; returns the resulting value.
+_SET_MAX = (
+    "local current = tonumber(redis.call('get', KEYS[1]) or '0') "
+    "if tonumber(ARGV[1]) > current then redis.call('set', KEYS[1], ARGV[1]) return tonumber(ARGV[1]) end "
+    "return current"
+)
+
+# Format byte: 1 bit set, 4 bits compressor id, 3 bits codec id (_format_byte).
+class Codec(NamedTuple):
+    id: int
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+
+
+class Compressor(NamedTuple):
+    id: int
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+CODECS: Dict[str, Codec] = {
+    "json": Codec(1, lambda value: json.dumps(value, separators=(",", ":")).encode(), json.loads),
+}
+if orjson is not None:
+    CODECS["orjson"] = Codec(2, lambda value: orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS), orjson.loads)
+if msgpack is not None:
+    CODECS["msgpack"] = Codec(
+        3,
+        lambda value: msgpack.packb(value, use_bin_type=True),
+        lambda raw: msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    )
+
+COMPRESSORS: Dict[str, Compressor] = {
+    "none": Compressor(0, bytes, bytes),
+    "zlib": Compressor(1, lambda raw: zlib.compress(raw, 1), zlib.decompress),
+}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = Compressor(
+        2,
+        lambda raw: zstandard.ZstdCompressor(level=3).compress(raw),
+        lambda raw: zstandard.ZstdDecompressor().decompress(raw)
+    )
+if lz4 is not None:
+    COMPRESSORS["lz4"] = Compressor(3, lz4.frame.compress, lz4.frame.decompress)
+
+CACHE_CODEC = os.environ.get("CACHE_CODEC") or ("orjson" if "orjson" in CODECS else "json")
+CACHE_COMPRESSION = os.environ.get("CACHE_COMPRESSION") or next(
+    name for name in ("zstd", "lz4", "none") if name in COMPRESSORS
+)
+CACHE_COMPRESS_MIN_BYTES = int(os.environ.get("CACHE_COMPRESS_MIN_BYTES", "8192"))
+
+
+def _format_byte(codec: Codec, compressor: Compressor) -> int:
+    # High bit set: legacy JSON text starts with an ASCII byte.
+    return 0x80 | compressor.id << 3 | codec.id
+
+
+class Serializer:
+    """Encodes cache values with one codec and decodes any registered one."""
+
+    def __init__(self, codec: str = CACHE_CODEC, compression: str = CACHE_COMPRESSION,
+                 compress_min_bytes: int = CACHE_COMPRESS_MIN_BYTES):
+        if codec not in CODECS:
+            logger.warning(f"Cache codec {codec} not available, using json")
+            codec = "json"
+        if compression not in COMPRESSORS:
+            logger.warning(f"Cache compression {compression} not available, storing uncompressed")
+            compression = "none"
+        self.codec = CODECS[codec]
+        self.compressor = COMPRESSORS[compression]
+        self.compress_min_bytes = compress_min_bytes
+        self._codecs = {codec.id: codec for codec in CODECS.values()}
+        self._compressors = {compressor.id: compressor for compressor in COMPRESSORS.values()}
+
+    def dumps(self, value: Any) -> bytes:
+        payload = self.codec.dumps(value)
+        compressor = COMPRESSORS["none"]
+        if self.compressor.id and len(payload) >= self.compress_min_bytes:
+            compressor = self.compressor
+            payload = compressor.compress(payload)
+        return bytes((_format_byte(self.codec, compressor),)) + payload
+
+    def loads(self, raw: bytes) -> Any:
+        """Raises ``ValueError`` for a format this worker can't read."""
+        header = raw[0]
+        if header < 0x80:
+            return json.loads(raw)
+        codec = self._codecs.get(header & 0x07)
+        compressor = self._compressors.get(header >> 3 & 0x0F)
+        if codec is None or compressor is None:
+            raise ValueError(f"unknown cache format byte {header:#x}")
+        return codec.loads(compressor.decompress(raw[1:]))
+
+
+CACHE_HITS = Counter('cache_hits_total', 'Cache hits', ['prefix', 'tier'])
+CACHE_MISSES = Counter('cache_misses_total', 'Lookups that missed every cache tier', ['prefix'])
+CACHE_EVICTIONS = Counter('cache_evictions_total', 'Entries dropped from the local cache', ['prefix', 'reason'])
+
+
+def key_prefix(key: str) -> str:
+    """The first two ``:`` segments of ``key``: ``api_cache:signals``."""
+    return ":".join(key.split(":", 2)[:2])
+
+
+def needs_refresh(entry: dict, now: Optional[float] = None, beta: float = CACHE_EARLY_BETA) -> bool:
+    """The entry is stale, or was picked for early refresh.
+
+    With ``beta`` > 0 an entry is refreshed ahead of expiry with a
+    probability that rises as expiry nears and with its build time
+    (Vattani et al., "Optimal Probabilistic Cache Stampede Prevention").
+    """
+    now = time.time() if now is None else now
+    if beta > 0:
+        now -= entry.get("build_seconds", 0) * beta * math.log(random.random() or 1e-12)
+    return now >= entry["fresh_until"]
+
+
 class RedisCache:
-    def __init__(self, host='localhost', port=6379, db=0, password=None):
+    def __init__(self, host='localhost', port=6379, db=0, password=None, serializer: Optional[Serializer] = None):
+        self.serializer = serializer or Serializer()
         try:
             self.redis_client = redis.Redis(
                 host=host, port=port, db=db, password=password,
                 decode_responses=True, socket_timeout=5, socket_connect_timeout=5
             )
             self.redis_client.ping()
+            # Cached values are binary; keys, locks and counters stay on
+            # the decoding client.
+            self.raw_client = redis.Redis(
+                host=host, port=port, db=db, password=password,
+                socket_timeout=5, socket_connect_timeout=5
+            )
             logger.info("Redis cache connected successfully")
         except Exception as e:
             logger.warning(f"Redis cache not available: {e}")
             self.redis_client = None
+            self.raw_client = None
 
     def get(self, key: str) -> Optional[Any]:
         if not self.redis_client:
             return None
         try:
-            cached = self.redis_client.get(key)
-            return json.loads(cached) if cached else None
+            cached = self.raw_client.get(key)
+            return self.serializer.loads(cached) if cached else None
         except Exception as e:
             logger.error(f"Cache get error for key {key}: {e}")
             return None
 
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], float, int]:
+        """``(value, seconds to live, serialized size)``, in one round trip."""
+        if not self.redis_client:
+            return None, 0.0, 0
+        try:
+            pipe = self.raw_client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            cached, pttl = pipe.execute()
+            if not cached:
+                return None, 0.0, 0
+            return self.serializer.loads(cached), max(pttl or 0, 0) / 1000, len(cached)
+        except Exception as e:
+            logger.error(f"Cache get error for key {key}: {e}")
+            return None, 0.0, 0
+
     def set(self, key: str, value: Any, ttl_seconds: int = 300) -> bool:
         if not self.redis_client:
             return False
         try:
-            serialized = json.dumps(value)
-            self.redis_client.setex(key, ttl_seconds, serialized)
+            serialized = self.serializer.dumps(value)
+        except Exception as e:
+            logger.error(f"Cache set error for key {key}: {e}")
+            return False
+        return self.set_serialized(key, serialized, ttl_seconds)
+
+    def set_serialized(self, key: str, serialized: bytes, ttl_seconds: int = 300) -> bool:
+        """Store a ``Serializer.dumps`` payload."""
+        if not self.redis_client:
+            return False
+        try:
+            self.raw_client.setex(key, ttl_seconds, serialized)
             return True
         except Exception as e:
             logger.error(f"Cache set error for key {key}: {e}")
@@ -62,10 +292,336 @@ class RedisCache:
             logger.error(f"Cache clear error for pattern {pattern}: {e}")
             return 0
 
+    def acquire_lock(self, name: str, ttl_seconds: float = CACHE_LOCK_SECONDS) -> Optional[str]:
+        """A token if the cluster-wide lock ``name`` was free, else None.
+
+        Without Redis there is no cluster to coordinate, so it always succeeds.
+        """
+        token = uuid.uuid4().hex
+        if not self.redis_client:
+            return token
+        try:
+            if self.redis_client.set(f"lock:{name}", token, nx=True, px=int(ttl_seconds * 1000)):
+                return token
+            return None
+        except Exception as e:
+            logger.error(f"Cache lock error for {name}: {e}")
+            return token
+
+    def release_lock(self, name: str, token: str) -> None:
+        if not self.redis_client:
+            return
+        try:
+            self.redis_client.eval(_RELEASE_LOCK, 1, f"lock:{name}", token)
+        except Exception as e:
+            logger.error(f"Cache unlock error for {name}: {e}")
+
+    def get_int(self, key: str) -> Optional[int]:
+        """The integer under ``key`` (0 if unset), or None without Redis."""
+        if not self.redis_client:
+            return None
+        try:
+            return int(self.redis_client.get(key) or 0)
+        except Exception as e:
+            logger.error(f"Cache get error for key {key}: {e}")
+            return None
+
+    def incr(self, key: str) -> Optional[int]:
+        if not self.redis_client:
+            return None
+        try:
+            return int(self.redis_client.incr(key))
+        except Exception as e:
+            logger.error(f"Cache incr error for key {key}: {e}")
+            return None
+
+    def set_max(self, key: str, value: int) -> Optional[int]:
+        """Raise ``key`` to ``value`` unless it is already higher; the result."""
+        if not self.redis_client:
+            return None
+        try:
+            return int(self.redis_client.eval(_SET_MAX, 1, key, value))
+        except Exception as e:
+            logger.error(f"Cache set error for key {key}: {e}")
+            return None
+
+    def publish(self, channel: str, message: str) -> None:
+        if not self.redis_client:
+            return
+        try:
+            self.redis_client.publish(channel, message)
+        except Exception as e:
+            logger.error(f"Cache publish error on {channel}: {e}")
+
+
+class LocalCache:
+    """Thread-safe LRU with per-entry expiry, bounded by entries and bytes."""
+
+    def __init__(self, max_entries: int = LOCAL_CACHE_MAX_ENTRIES, max_bytes: int = LOCAL_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        # key -> (value, expires_at on the monotonic clock, size)
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._drop(key, "expired")
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: Any, ttl_seconds: float, size: int) -> bool:
+        """Keep ``value`` for ``ttl_seconds``; ``size`` is its serialized length."""
+        if ttl_seconds <= 0 or size > self.max_bytes:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._drop(key, None)
+            self._entries[key] = (value, time.monotonic() + ttl_seconds, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)), "size")
+        return True
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._drop(key, "invalidated")
+            return True
+
+    def clear_pattern(self, pattern: str) -> int:
+        """Drop keys matching the Redis-style glob ``pattern``."""
+        with self._lock:
+            matched = [key for key in self._entries if fnmatchcase(key, pattern)]
+            for key in matched:
+                self._drop(key, "invalidated")
+        return len(matched)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _drop(self, key: str, reason: Optional[str]) -> None:
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+        if reason:
+            CACHE_EVICTIONS.labels(key_prefix(key), reason).inc()
+
+
+class TieredCache:
+    """``LocalCache`` in front of ``RedisCache`` for ``local_prefixes`` keys."""
+
+    def __init__(self, remote: RedisCache, local: Optional[LocalCache] = None,
+                 local_prefixes: Tuple[str, ...] = LOCAL_CACHE_PREFIXES,
+                 channel: str = CACHE_INVALIDATION_CHANNEL, version_channel: str = DATA_VERSION_CHANNEL):
+        self.remote = remote
+        self.local = local
+        self.local_prefixes = local_prefixes
+        self.channel = channel
+        self.version_channel = version_channel
+        self._versions: Dict[str, int] = {}
+        # Without Redis, the last version handed out per dataset.
+        self._reserved: Dict[str, int] = {}
+        self._version_lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self._listener_lock = threading.Lock()
+
+    @property
+    def redis_client(self):
+        return self.remote.redis_client
+
+    def _is_local(self, key: str) -> bool:
+        return self.local is not None and key.startswith(self.local_prefixes)
+
+    def get_local(self, key: str) -> Optional[Any]:
+        """The local tier only; never a network round trip."""
+        if not self._is_local(key):
+            return None
+        value = self.local.get(key)
+        if value is not None:
+            CACHE_HITS.labels(key_prefix(key), "local").inc()
+        return value
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self._is_local(key):
+            return self.remote.get(key)
+        value = self.get_local(key)
+        if value is not None:
+            return value
+        prefix = key_prefix(key)
+        value, ttl, size = self.remote.get_with_ttl(key)
+        if value is None:
+            CACHE_MISSES.labels(prefix).inc()
+            return None
+        CACHE_HITS.labels(prefix, "redis").inc()
+        self._start_listener()
+        self.local.set(key, value, ttl, size)
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: int = 300) -> bool:
+        return self._store(key, value, ttl_seconds)
+
+    def _store(self, key: str, value: Any, ttl_seconds: int) -> bool:
+        try:
+            serialized = self.remote.serializer.dumps(value)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Cache set error for key {key}: {e}")
+            return False
+        stored = self.remote.set_serialized(key, serialized, ttl_seconds)
+        if self._is_local(key):
+            self._start_listener()
+            stored = self.local.set(key, value, ttl_seconds, len(serialized)) or stored
+        return stored
+
+    def get_local_entry(self, key: str) -> Optional[dict]:
+        """The local envelope, unless it is stale and Redis may have a newer one."""
+        if not self._is_local(key):
+            return None
+        entry = self.local.get(key)
+        if entry is None:
+            return None
+        if self.remote.redis_client is not None and time.time() >= entry["fresh_until"]:
+            return None
+        CACHE_HITS.labels(key_prefix(key), "local").inc()
+        return entry
+
+    def get_entry(self, key: str) -> Optional[dict]:
+        """The response envelope under ``key``, fresh or stale."""
+        if not self._is_local(key):
+            return self.remote.get(key)
+        entry = self.get_local_entry(key)
+        if entry is not None:
+            return entry
+        prefix = key_prefix(key)
+        entry, ttl, size = self.remote.get_with_ttl(key)
+        if not isinstance(entry, dict) or "fresh_until" not in entry:
+            CACHE_MISSES.labels(prefix).inc()
+            return None
+        CACHE_HITS.labels(prefix, "redis").inc()
+        self._start_listener()
+        self.local.set(key, entry, ttl, size)
+        return entry
+
+    def set_entry(self, key: str, value: Any, ttl_seconds: int, build_seconds: float = 0.0,
+                  stale_seconds: int = CACHE_STALE_SECONDS) -> dict:
+        """Store ``value`` fresh for ``ttl_seconds``, then stale for ``stale_seconds``."""
+        entry = {"value": value, "fresh_until": time.time() + ttl_seconds, "build_seconds": build_seconds}
+        self._store(key, entry, ttl_seconds + stale_seconds)
+        return entry
+
+    def acquire_lock(self, key: str) -> Optional[str]:
+        return self.remote.acquire_lock(key)
+
+    def release_lock(self, key: str, token: str) -> None:
+        self.remote.release_lock(key, token)
+
+    def delete(self, key: str) -> bool:
+        deleted = self.remote.delete(key)
+        if self.local is not None:
+            self.local.delete(key)
+            self.remote.publish(self.channel, key)
+        return deleted
+
+    def clear_pattern(self, pattern: str) -> int:
+        cleared = self.remote.clear_pattern(pattern)
+        if self.local is not None:
+            cleared = max(cleared, self.local.clear_pattern(pattern))
+            self.remote.publish(self.channel, pattern)
+        return cleared
+
+    def handle_invalidation(self, message: str) -> None:
+        """Drop local entries for a key or pattern published by any worker."""
+        if self.local is not None:
+            self.local.clear_pattern(message)
+
+    def data_version(self, dataset: str) -> int:
+        """The current version of ``dataset``, without a round trip once known."""
+        version = self._versions.get(dataset)
+        if version is None:
+            self._start_listener()
+            version = self.remote.get_int(f"data_version:{dataset}") or 0
+            self._set_version(dataset, version)
+            version = self._versions[dataset]
+        return version
+
+    def reserve_data_version(self, dataset: str) -> int:
+        """A version of ``dataset`` no other caller has been or will be given."""
+        version = self.remote.incr(f"data_version_seq:{dataset}")
+        if version is None:
+            with self._version_lock:
+                version = max(self._reserved.get(dataset, 0), self._versions.get(dataset, 0)) + 1
+                self._reserved[dataset] = version
+        return version
+
+    def publish_data_version(self, dataset: str, version: int) -> int:
+        """Make ``version`` current, unless a later one already is."""
+        current = self.remote.set_max(f"data_version:{dataset}", version)
+        self._set_version(dataset, current if current is not None else version)
+        self.remote.publish(self.version_channel, f"{dataset}:{version}")
+        return self._versions[dataset]
+
+    def handle_version(self, message: str) -> None:
+        dataset, _, version = message.rpartition(":")
+        if dataset and version.isdigit():
+            self._set_version(dataset, int(version))
+
+    def _set_version(self, dataset: str, version: int) -> None:
+        with self._version_lock:
+            if version > self._versions.get(dataset, -1):
+                self._versions[dataset] = version
+
+    def _start_listener(self) -> None:
+        if self._listener is not None or self.remote.redis_client is None:
+            return
+        with self._listener_lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name="cache-invalidation", daemon=True)
+                self._listener.start()
+
+    def _listen(self) -> None:
+        resubscribing = False
+        while True:
+            try:
+                pubsub = self.remote.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel, self.version_channel)
+                if resubscribing:
+                    # Messages sent while we were not subscribed are lost.
+                    if self.local is not None:
+                        self.local.clear()
+                    with self._version_lock:
+                        self._versions.clear()
+                resubscribing = True
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if not message or message.get("type") != "message":
+                        continue
+                    if message["channel"] == self.version_channel:
+                        self.handle_version(message["data"])
+                    else:
+                        self.handle_invalidation(message["data"])
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener error, resubscribing: {e}")
+                time.sleep(1)
+
+
 # Global cache instance
-cache = RedisCache(
-    host=os.environ.get('REDIS_HOST', 'localhost'),
-    port=int(os.environ.get('REDIS_PORT', 6379)),
-    db=int(os.environ.get('REDIS_DB', 0)),
-    password=os.environ.get('REDIS_PASSWORD')
+cache = TieredCache(
+    RedisCache(
+        host=os.environ.get('REDIS_HOST', 'localhost'),
+        port=int(os.environ.get('REDIS_PORT', 6379)),
+        db=int(os.environ.get('REDIS_DB', 0)),
+        password=os.environ.get('REDIS_PASSWORD')
+    ),
+    LocalCache() if LOCAL_CACHE_ENABLE else None
 )
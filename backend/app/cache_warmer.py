@@ -0,0 +1,74 @@
+"""
+Version-keyed list caches, rebuilt by the ingestion jobs.
+
+Lists whose data only changes when an ingestion job commits (whales,
+trades, smart wallets) key their cache entries by the dataset's data
+version: ``api_cache:whales:v42:...``.  After a commit that changed rows,
+the job calls ``data_changed``.  For each dataset the warmer reserves the
+next version, rebuilds the registered first pages under it, then makes it
+current on every worker (``TieredCache.publish_data_version``).  Requests
+move to pages that are already built, and because an entry cannot go out
+of date within its version it is kept for ``VERSIONED_CACHE_TTL_SECONDS``
+instead of a short TTL.  Superseded versions simply expire.
+"""
+import asyncio
+import logging
+import os
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.async_database import run_sync
+from app.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Bounds staleness if a writer ever skips data_changed.
+VERSIONED_CACHE_TTL_SECONDS = int(os.environ.get("VERSIONED_CACHE_TTL_SECONDS", "600"))
+CACHE_WARM_PAGES = int(os.environ.get("CACHE_WARM_PAGES", "3"))
+
+# Versions being warmed in the current context, not yet current.
+_pending: ContextVar[Optional[Dict[str, int]]] = ContextVar("pending_data_versions", default=None)
+_warmers: Dict[str, List[Callable[[], Awaitable[None]]]] = {}
+
+
+def data_version(dataset: str) -> int:
+    """The version cache keys for ``dataset`` are built with right now."""
+    pending = _pending.get()
+    if pending and dataset in pending:
+        return pending[dataset]
+    return cache.data_version(dataset)
+
+
+def register(dataset: str, warm: Callable[[], Awaitable[None]]) -> None:
+    """Run ``warm`` (which requests the pages to prebuild) on every change to ``dataset``."""
+    _warmers.setdefault(dataset, []).append(warm)
+
+
+async def warm(dataset: str) -> int:
+    """Build ``dataset``'s registered pages under a new version, then publish it."""
+    version = await run_sync(cache.reserve_data_version, dataset)
+    token = _pending.set({**(_pending.get() or {}), dataset: version})
+    try:
+        for warmer in _warmers.get(dataset, []):
+            try:
+                await warmer()
+            except Exception as e:
+                logger.error(f"Cache warmer for {dataset} failed: {e}")
+    finally:
+        _pending.reset(token)
+    return await run_sync(cache.publish_data_version, dataset, version)
+
+
+def data_changed(*datasets: str) -> Dict[str, int]:
+    """Warm and publish new versions of ``datasets``; call after the commit.
+
+    Blocks the calling (scheduler) thread until the pages are built.
+    """
+    async def run():
+        return {dataset: await warm(dataset) for dataset in datasets}
+
+    try:
+        return asyncio.run(run())
+    except Exception as e:
+        logger.error(f"Cache warming failed for {', '.join(datasets)}: {e}")
+        return {}
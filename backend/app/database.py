@@ -1,424 +1,150 @@
-import sqlite3
 import logging
-from typing import List, Dict, Optional, Any
+from functools import lru_cache
+from typing import List, Dict, NamedTuple, Optional, Any
 import os
 import json
 import time
 import math
 from datetime import datetime, timedelta, timezone
-from queue import Queue, Empty
-from threading import Lock
+
+from app.timestamps import TimestampParser
 
 try:
     import psycopg2
+    import psycopg2.errors
     import psycopg2.extras
-    import psycopg2.pool
 except ImportError:
     psycopg2 = None
 
-logger = logging.getLogger(__name__)
+from app.engine import get_engine, get_replica_engine, is_postgres, mark_replica_down
+from app.query_profiler import profiler
 
-DB_PATH = os.environ.get("DB_PATH") or "polypulse.db"
-DATABASE_URL = os.environ.get("DATABASE_URL")
-if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+logger = logging.getLogger(__name__)
 
-IS_POSTGRES = bool(DATABASE_URL) and (psycopg2 is not None)
-DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "5"))
-_pg_pool = None
-_sqlite_pool = None
-_pool_lock = Lock()
+IS_POSTGRES = is_postgres()
+# Rows written by this module share one datetime layout.
+_db_timestamps = TimestampParser()
 
 class PooledConnection:
-    def __init__(self, conn, releaser):
+    """A DB-API connection checked out of the shared engine pool.
+
+    Cursors return rows addressable by column name; ``close`` hands the
+    connection back to the pool.
+    """
+    def __init__(self, conn):
         self._conn = conn
-        self._releaser = releaser
 
     def __getattr__(self, name):
         return getattr(self._conn, name)
 
-    def close(self):
-        self._releaser(self._conn)
-
-def _get_pg_pool():
-    global _pg_pool
-    if _pg_pool is None:
-        with _pool_lock:
-            if _pg_pool is None:
-                _pg_pool = psycopg2.pool.ThreadedConnectionPool(
-                    1,
-                    DB_POOL_MAX,
-                    DATABASE_URL,
-                    cursor_factory=psycopg2.extras.RealDictCursor
-                )
-    return _pg_pool
-
-def _get_sqlite_pool():
-    global _sqlite_pool
-    if _sqlite_pool is None:
-        with _pool_lock:
-            if _sqlite_pool is None:
-                _sqlite_pool = Queue(maxsize=DB_POOL_MAX)
-    return _sqlite_pool
-
-def _create_sqlite_connection():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-def _release_sqlite_connection(conn):
-    pool = _get_sqlite_pool()
-    if pool.full():
-        conn.close()
-    else:
-        pool.put(conn)
+    def cursor(self, *args, **kwargs):
+        if IS_POSTGRES and not args:
+            kwargs.setdefault("cursor_factory", psycopg2.extras.RealDictCursor)
+        return self._conn.cursor(*args, **kwargs)
 
-def get_db_connection():
-    if IS_POSTGRES:
-        pool = _get_pg_pool()
-        conn = pool.getconn()
-        return PooledConnection(conn, lambda c: pool.putconn(c))
-    pool = _get_sqlite_pool()
-    try:
-        conn = pool.get_nowait()
-    except Empty:
-        conn = _create_sqlite_connection()
-    return PooledConnection(conn, _release_sqlite_connection)
-
-def execute_sql(cursor, query: str, params: tuple = ()) -> None:
-    start = time.time()
-    qnorm = (query or "").strip().lower()
-    if IS_POSTGRES:
-        query = query.replace("?", "%s")
+    def close(self):
+        self._conn.close()
+
+def get_db_connection(read_only: bool = False):
+    """A pooled connection; ``read_only`` ones come from the replica when
+    one is configured and reachable, otherwise from the primary."""
+    if read_only:
+        replica = get_replica_engine()
+        if replica is not None:
+            try:
+                return PooledConnection(replica.raw_connection())
+            except Exception as e:
+                logger.warning(f"Read replica unavailable, using primary: {e}")
+                mark_replica_down()
+    return PooledConnection(get_engine().raw_connection())
+
+# Statement registry.  Hot queries are declared once at import with their
+# Postgres text (and PREPARE / EXECUTE forms) worked out up front; ad-hoc
+# query strings get the same rewrite memoised per distinct text.
+DB_PREPARED_STATEMENTS = os.environ.get("DB_PREPARED_STATEMENTS", "1") == "1"
+
+class Statement(NamedTuple):
+    name: str
+    sqlite: str
+    postgres: str
+    prepare: str
+    execute: str
+
+STATEMENTS: Dict[str, Statement] = {}
+
+def statement(name: str, sql: str) -> Statement:
+    sql = " ".join(sql.split())
+    count = sql.count("?")
+    numbered = iter(range(1, count + 1))
+    stmt = Statement(
+        name=name,
+        sqlite=sql,
+        postgres=sql.replace("?", "%s"),
+        prepare=f"PREPARE {name} AS " + "".join(
+            f"${next(numbered)}" if char == "?" else char for char in sql
+        ),
+        execute=f"EXECUTE {name}" + (f" ({', '.join(['%s'] * count)})" if count else "")
+    )
+    STATEMENTS[name] = stmt
+    return stmt
+
+@lru_cache(maxsize=1024)
+def _postgres_text(query: str) -> str:
+    return query.replace("?", "%s")
+
+def _query_text(query) -> str:
+    if isinstance(query, Statement):
+        return query.postgres if IS_POSTGRES else query.sqlite
+    return _postgres_text(query) if IS_POSTGRES else query
+
+def execute_sql(cursor, query, params: tuple = ()) -> None:
+    """Run ``query`` (a SQL string with ``?`` placeholders or a ``Statement``)."""
+    start = time.perf_counter()
+    query = _query_text(query)
     cursor.execute(query, params)
+    profiler.record(query, time.perf_counter() - start)
+
+def execute_many_sql(cursor, query, rows: List[tuple]) -> None:
+    start = time.perf_counter()
+    query = _query_text(query)
+    cursor.executemany(query, rows)
+    profiler.record(query, time.perf_counter() - start)
+
+def execute_prepared(conn, cursor, stmt: Statement, params: tuple = ()) -> None:
+    """``execute_sql`` through a server-side prepared statement on Postgres.
+
+    Each pooled connection prepares ``stmt`` on first use and remembers it in
+    the pool's per-connection ``info``; later calls only send EXECUTE.
+    """
+    if not (IS_POSTGRES and DB_PREPARED_STATEMENTS):
+        execute_sql(cursor, stmt, params)
+        return
+    prepared = conn.info.setdefault("prepared_statements", set())
+    start = time.perf_counter()
     try:
-        enable = os.environ.get("QUERY_METRICS_ENABLE", "1") == "1"
-        if not enable:
-            return
-        # Skip meta operations
-        if ("query_metrics" in qnorm) or qnorm.startswith(("create", "pragma")):
-            return
-        duration = time.time() - start
-        threshold_ms = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", "50"))
-        if duration * 1000 >= threshold_ms:
-            if IS_POSTGRES:
-                cursor.execute("INSERT INTO query_metrics (query, duration) VALUES (%s, %s)", (query, duration))
-            else:
-                cursor.execute("INSERT INTO query_metrics (query, duration) VALUES (?, ?)", (query, duration))
-    except Exception:
-        # Never break normal execution due to metrics logging
-        pass
+        if stmt.name not in prepared:
+            cursor.execute(stmt.prepare)
+            prepared.add(stmt.name)
+        cursor.execute(stmt.execute, params)
+    except (psycopg2.errors.InvalidSqlStatementName, psycopg2.errors.DuplicatePreparedStatement):
+        # The session lost (or already had) its statements, e.g. after a
+        # DISCARD ALL by a proxy; start over on this connection.
+        conn.rollback()
+        prepared.clear()
+        cursor.execute("DEALLOCATE ALL")
+        cursor.execute(stmt.prepare)
+        prepared.add(stmt.name)
+        cursor.execute(stmt.execute, params)
+    profiler.record(stmt.postgres, time.perf_counter() - start)
 
 def init_db():
     try:
         conn = get_db_connection()
+        # Tables, indexes and default rows are owned by versioned migrations;
+        # imported here because app.migrations builds on this module.
+        from app.migrations import run_migrations
+        run_migrations(conn)
         cursor = conn.cursor()
-        
-        pk_type = "SERIAL PRIMARY KEY" if IS_POSTGRES else "INTEGER PRIMARY KEY AUTOINCREMENT"
-        
-        # Alerts
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS alerts (
-                id {pk_type},
-                timestamp TEXT NOT NULL,
-                market_question TEXT NOT NULL,
-                outcome TEXT NOT NULL,
-                old_price REAL NOT NULL,
-                new_price REAL NOT NULL,
-                change REAL NOT NULL,
-                message TEXT NOT NULL
-            )
-        ''')
-
-        # Users
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS users (
-                id {pk_type},
-                email TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # Watchlists
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS watchlists (
-                id {pk_type},
-                user_id INTEGER NOT NULL,
-                market_id TEXT NOT NULL,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(user_id, market_id),
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-        ''')
-
-        # FCM Tokens
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS fcm_tokens (
-                id {pk_type},
-                user_id INTEGER,
-                token TEXT UNIQUE NOT NULL,
-                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-        ''')
-
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS notification_settings (
-                id {pk_type},
-                user_id INTEGER NOT NULL UNIQUE,
-                push_enabled INTEGER NOT NULL DEFAULT 1,
-                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-        ''')
-
-        # Whale Trades
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS whale_trades (
-                id {pk_type},
-                timestamp INTEGER NOT NULL,
-                maker_address TEXT NOT NULL,
-                market_question TEXT NOT NULL,
-                outcome TEXT NOT NULL,
-                side TEXT NOT NULL,
-                size REAL NOT NULL,
-                price REAL NOT NULL,
-                value_usd REAL NOT NULL,
-                market_slug TEXT,
-                UNIQUE(maker_address, timestamp, market_slug, value_usd)
-            )
-        ''')
-
-        # Subscriptions
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS subscriptions (
-                id {pk_type},
-                user_id INTEGER NOT NULL,
-                platform TEXT NOT NULL,
-                plan_id TEXT NOT NULL,
-                status TEXT NOT NULL,
-                start_at TEXT NOT NULL,
-                end_at TEXT NOT NULL,
-                auto_renew INTEGER NOT NULL DEFAULT 1,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(user_id, platform, plan_id)
-            )
-        ''')
-
-        # Entitlements
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS entitlements (
-                id {pk_type},
-                tier TEXT NOT NULL,
-                feature_key TEXT NOT NULL,
-                is_enabled INTEGER NOT NULL DEFAULT 1,
-                quota INTEGER,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(tier, feature_key)
-            )
-        ''')
-
-        # Feature Flags
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS feature_flags (
-                id {pk_type},
-                feature_key TEXT NOT NULL,
-                enabled INTEGER NOT NULL DEFAULT 0,
-                tier TEXT NOT NULL,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(feature_key, tier)
-            )
-        ''')
-
-        # Query Metrics
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS query_metrics (
-                id {pk_type},
-                query TEXT NOT NULL,
-                duration REAL NOT NULL,
-                timestamp TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # User Entitlements
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS user_entitlements (
-                id {pk_type},
-                user_id INTEGER NOT NULL,
-                tier TEXT NOT NULL,
-                effective_at TEXT NOT NULL,
-                expires_at TEXT NOT NULL,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # Transactions
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS transactions (
-                id {pk_type},
-                user_id INTEGER NOT NULL,
-                platform TEXT NOT NULL,
-                order_id TEXT NOT NULL,
-                product_id TEXT NOT NULL,
-                purchase_token TEXT NOT NULL,
-                purchase_state TEXT NOT NULL,
-                amount INTEGER NOT NULL,
-                currency TEXT NOT NULL,
-                purchased_at TEXT NOT NULL,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(platform, order_id)
-            )
-        ''')
-
-        # Signals
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS signals (
-                id {pk_type},
-                title TEXT NOT NULL,
-                content TEXT NOT NULL,
-                tier_required TEXT NOT NULL DEFAULT 'free',
-                evidence_json TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS signal_evaluations (
-                id {pk_type},
-                signal_id INTEGER NOT NULL,
-                is_hit INTEGER NOT NULL,
-                lead_seconds INTEGER,
-                evaluated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(signal_id),
-                FOREIGN KEY(signal_id) REFERENCES signals(id)
-            )
-        ''')
-
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS notification_attempts (
-                id {pk_type},
-                user_id INTEGER NOT NULL,
-                signal_id INTEGER NOT NULL,
-                mode TEXT NOT NULL,
-                delay_seconds INTEGER NOT NULL DEFAULT 0,
-                retry_count INTEGER NOT NULL DEFAULT 0,
-                queued_at TEXT,
-                deliver_at TEXT,
-                sent_at TEXT,
-                token_count INTEGER NOT NULL DEFAULT 0,
-                success_count INTEGER NOT NULL DEFAULT 0,
-                failure_count INTEGER NOT NULL DEFAULT 0,
-                status TEXT NOT NULL,
-                error TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id),
-                FOREIGN KEY(signal_id) REFERENCES signals(id)
-            )
-        ''')
-
-        # Daily Pulse
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS daily_pulse (
-                id {pk_type},
-                title TEXT NOT NULL,
-                summary TEXT NOT NULL,
-                content TEXT NOT NULL,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # Analytics Events
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS analytics_events (
-                id {pk_type},
-                user_id INTEGER,
-                event_name TEXT NOT NULL,
-                properties TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # Referral Codes
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS referral_codes (
-                id {pk_type},
-                user_id INTEGER NOT NULL,
-                code TEXT NOT NULL UNIQUE,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(id)
-            )
-        ''')
-
-        # Referral Redemptions
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS referral_redemptions (
-                id {pk_type},
-                code TEXT NOT NULL,
-                referrer_user_id INTEGER NOT NULL,
-                referee_user_id INTEGER NOT NULL UNIQUE,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(referrer_user_id) REFERENCES users(id),
-                FOREIGN KEY(referee_user_id) REFERENCES users(id)
-            )
-        ''')
-
-        # Initial Data
-        if IS_POSTGRES:
-            insert_ignore_entitlements = '''
-            INSERT INTO entitlements (tier, feature_key, is_enabled, quota)
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT (tier, feature_key) DO NOTHING
-            '''
-            cursor.executemany(insert_ignore_entitlements, [
-                ("free", "alerts_basic", 1, 2),
-                ("free", "alerts_pro", 0, None),
-                ("free", "history_performance", 0, None),
-                ("free", "low_latency", 0, None),
-                ("pro", "alerts_basic", 1, 999),
-                ("pro", "alerts_pro", 1, 999),
-                ("pro", "history_performance", 1, None),
-                ("pro", "low_latency", 1, None)
-            ])
-            
-            insert_ignore_flags = '''
-            INSERT INTO feature_flags (feature_key, enabled, tier)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (feature_key, tier) DO NOTHING
-            '''
-            cursor.executemany(insert_ignore_flags, [
-                ("high_value_signal", 0, "free"),
-                ("high_value_signal", 1, "pro")
-            ])
-        else:
-            cursor.executemany(
-                '''
-                INSERT OR IGNORE INTO entitlements (tier, feature_key, is_enabled, quota)
-                VALUES (?, ?, ?, ?)
-                ''',
-                [
-                    ("free", "alerts_basic", 1, 2),
-                    ("free", "alerts_pro", 0, None),
-                    ("free", "history_performance", 0, None),
-                    ("free", "low_latency", 0, None),
-                    ("pro", "alerts_basic", 1, 999),
-                    ("pro", "alerts_pro", 1, 999),
-                    ("pro", "history_performance", 1, None),
-                    ("pro", "low_latency", 1, None)
-                ]
-            )
-    
-            cursor.executemany(
-                '''
-                INSERT OR IGNORE INTO feature_flags (feature_key, enabled, tier)
-                VALUES (?, ?, ?)
-                ''',
-                [
-                    ("high_value_signal", 0, "free"),
-                    ("high_value_signal", 1, "pro")
-                ]
-            )
 
         if os.environ.get("SEED_DEMO_DATA", "0") == "1":
             execute_sql(cursor, 'SELECT COUNT(*) as count FROM signals')
@@ -511,7 +237,7 @@ def save_alert(alert: Dict):
 
 def get_recent_alerts(limit: int = 50) -> List[Dict]:
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(read_only=True)
         cursor = conn.cursor()
         execute_sql(cursor, 'SELECT * FROM alerts ORDER BY timestamp DESC LIMIT ?', (limit,))
         rows = cursor.fetchall()
@@ -521,64 +247,117 @@ def get_recent_alerts(limit: int = 50) -> List[Dict]:
         logger.error(f"Failed to get alerts: {e}")
         return []
 
+WHALE_TRADE_CHUNK_SIZE = int(os.environ.get("WHALE_TRADE_CHUNK_SIZE", "1000"))
+_WHALE_TRADE_COLUMNS = (
+    "timestamp", "maker_address", "market_question", "outcome", "side", "size", "price", "value_usd", "market_slug"
+)
+
 def save_whale_trade(trade: Dict):
+    save_whale_trades([trade])
+
+def save_whale_trades(trades: List[Dict], chunk_size: Optional[int] = None) -> int:
+    """
+    Insert whale trades in a single transaction, ``chunk_size`` rows per
+    statement.  Duplicates are skipped.  Returns the number of rows inserted.
+    """
+    rows = []
+    for trade in trades:
+        try:
+            rows.append(tuple(trade[column] for column in _WHALE_TRADE_COLUMNS))
+        except KeyError as e:
+            logger.warning(f"Skipping whale trade without {e}")
+    if not rows:
+        return 0
+    chunk_size = max(int(chunk_size or WHALE_TRADE_CHUNK_SIZE), 1)
+    columns = ", ".join(_WHALE_TRADE_COLUMNS)
+    inserted = 0
+    conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        if IS_POSTGRES:
-            execute_sql(cursor, '''
-                INSERT INTO whale_trades (
-                    timestamp, maker_address, market_question, outcome, side, size, price, value_usd, market_slug
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT (maker_address, timestamp, market_slug, value_usd) DO NOTHING
-            ''', (
-                trade['timestamp'],
-                trade['maker_address'],
-                trade['market_question'],
-                trade['outcome'],
-                trade['side'],
-                trade['size'],
-                trade['price'],
-                trade['value_usd'],
-                trade['market_slug']
-            ))
-        else:
-            execute_sql(cursor, '''
-                INSERT OR IGNORE INTO whale_trades (
-                    timestamp, maker_address, market_question, outcome, side, size, price, value_usd, market_slug
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                trade['timestamp'],
-                trade['maker_address'],
-                trade['market_question'],
-                trade['outcome'],
-                trade['side'],
-                trade['size'],
-                trade['price'],
-                trade['value_usd'],
-                trade['market_slug']
-            ))
+        for offset in range(0, len(rows), chunk_size):
+            chunk = rows[offset:offset + chunk_size]
+            if IS_POSTGRES:
+                start = time.perf_counter()
+                query = f'''
+                    INSERT INTO whale_trades ({columns}) VALUES %s
+                    ON CONFLICT (maker_address, timestamp, market_slug, value_usd) DO NOTHING
+                '''
+                psycopg2.extras.execute_values(cursor, query, chunk, page_size=len(chunk))
+                profiler.record(query, time.perf_counter() - start)
+            else:
+                execute_many_sql(
+                    cursor,
+                    f"INSERT OR IGNORE INTO whale_trades ({columns}) VALUES ({', '.join('?' * len(_WHALE_TRADE_COLUMNS))})",
+                    chunk
+                )
+            inserted += max(cursor.rowcount or 0, 0)
         conn.commit()
-        conn.close()
+        return inserted
     except Exception as e:
-        logger.error(f"Failed to save whale trade to DB: {e}")
+        if conn is not None:
+            conn.rollback()
+        logger.error(f"Failed to save whale trades to DB: {e}")
+        return 0
+    finally:
+        if conn is not None:
+            conn.close()
+
+# Per-maker totals over whale_trades.  Triggers created by migration 4 keep
+# whale_leaderboard current as trades are inserted or deleted.
+_WHALE_LEADERBOARD_FILL = '''
+    INSERT INTO whale_leaderboard (
+        maker_address, total_volume, trade_count, max_trade_value, buy_volume, sell_volume
+    )
+    SELECT
+        maker_address,
+        SUM(value_usd),
+        COUNT(*),
+        MAX(value_usd),
+        SUM(CASE WHEN side = 'BUY' THEN value_usd ELSE 0 END),
+        SUM(CASE WHEN side = 'SELL' THEN value_usd ELSE 0 END)
+    FROM whale_trades
+    GROUP BY maker_address
+'''
+
+def fill_whale_leaderboard(cursor) -> None:
+    """Replace ``whale_leaderboard`` with a full aggregate of ``whale_trades``,
+    inside the caller's transaction."""
+    if IS_POSTGRES:
+        # Keep inserts (and their triggers) out until the aggregate is in.
+        cursor.execute("LOCK TABLE whale_trades IN SHARE MODE")
+    cursor.execute("DELETE FROM whale_leaderboard")
+    cursor.execute(_WHALE_LEADERBOARD_FILL)
+
+def rebuild_whale_leaderboard() -> int:
+    """Recompute the leaderboard from ``whale_trades`` (backfills, bulk
+    deletes, float drift); returns the number of makers."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        if not IS_POSTGRES:
+            conn.commit()
+            cursor.execute("BEGIN IMMEDIATE")
+        fill_whale_leaderboard(cursor)
+        cursor.execute("SELECT COUNT(*) AS count FROM whale_leaderboard")
+        count = int(cursor.fetchone()["count"])
+        conn.commit()
+        return count
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
 
 def get_leaderboard_stats(limit: int = 10) -> List[Dict]:
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(read_only=True)
         cursor = conn.cursor()
         
         execute_sql(cursor, '''
-            SELECT 
-                maker_address,
-                SUM(value_usd) as total_volume,
-                COUNT(*) as trade_count,
-                MAX(value_usd) as max_trade_value,
-                SUM(CASE WHEN side = 'BUY' THEN value_usd ELSE 0 END) as buy_volume,
-                SUM(CASE WHEN side = 'SELL' THEN value_usd ELSE 0 END) as sell_volume
-            FROM whale_trades
-            GROUP BY maker_address
-            ORDER BY total_volume DESC
+            SELECT maker_address, total_volume, trade_count, max_trade_value, buy_volume, sell_volume
+            FROM whale_leaderboard
+            ORDER BY total_volume DESC, maker_address DESC
             LIMIT ?
         ''', (limit,))
         
@@ -610,11 +389,13 @@ def create_user(email: str, password_hash: str) -> Optional[int]:
         logger.error(f"Failed to create user: {e}")
         return None
 
+_USER_BY_EMAIL = statement("user_by_email", 'SELECT * FROM users WHERE email = ?')
+
 def get_user_by_email(email: str) -> Optional[Dict]:
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        execute_sql(cursor, 'SELECT * FROM users WHERE email = ?', (email,))
+        execute_prepared(conn, cursor, _USER_BY_EMAIL, (email,))
         row = cursor.fetchone()
         conn.close()
         if row:
@@ -740,18 +521,17 @@ def set_user_entitlements(user_id: int, tier: str, effective_at: str, expires_at
     conn.commit()
     conn.close()
 
+_LATEST_USER_ENTITLEMENT = statement("latest_user_entitlement", '''
+    SELECT * FROM user_entitlements
+    WHERE user_id = ?
+    ORDER BY created_at DESC
+    LIMIT 1
+''')
+
 def get_latest_user_entitlement(user_id: int) -> Optional[Dict]:
     conn = get_db_connection()
     cursor = conn.cursor()
-    execute_sql(cursor,
-        '''
-        SELECT * FROM user_entitlements
-        WHERE user_id = ?
-        ORDER BY created_at DESC
-        LIMIT 1
-        ''',
-        (user_id,)
-    )
+    execute_prepared(conn, cursor, _LATEST_USER_ENTITLEMENT, (user_id,))
     row = cursor.fetchone()
     conn.close()
     return dict(row) if row else None
@@ -772,18 +552,32 @@ def get_entitlements_for_tier(tier: str) -> List[Dict]:
     conn.close()
     return [dict(row) for row in rows]
 
-def get_signals(limit: int = 50, offset: int = 0) -> List[Dict]:
-    conn = get_db_connection()
+def get_signals(limit: int = 50, offset: int = 0, before: Optional[tuple] = None) -> List[Dict]:
+    """Newest first.  ``before`` is a ``(created_at, id)`` keyset cursor;
+    when given, ``offset`` is ignored and the page starts after that row."""
+    conn = get_db_connection(read_only=True)
     cursor = conn.cursor()
-    execute_sql(cursor,
-        '''
-        SELECT id, title, content, tier_required, evidence_json, created_at
-        FROM signals
-        ORDER BY created_at DESC
-        LIMIT ? OFFSET ?
-        ''',
-        (limit, offset)
-    )
+    if before is not None:
+        execute_sql(cursor,
+            '''
+            SELECT id, title, content, tier_required, evidence_json, created_at
+            FROM signals
+            WHERE (created_at, id) < (?, ?)
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+            ''',
+            (before[0], before[1], limit)
+        )
+    else:
+        execute_sql(cursor,
+            '''
+            SELECT id, title, content, tier_required, evidence_json, created_at
+            FROM signals
+            ORDER BY created_at DESC, id DESC
+            LIMIT ? OFFSET ?
+            ''',
+            (limit, offset)
+        )
     rows = cursor.fetchall()
     conn.close()
     return [dict(row) for row in rows]
@@ -812,17 +606,16 @@ def create_signal(title: str, content: str, tier_required: str = "free", evidenc
     conn.close()
     return int(signal_id or 0)
 
+_SIGNAL_BY_ID = statement("signal_by_id", '''
+    SELECT id, title, content, tier_required, evidence_json, created_at
+    FROM signals
+    WHERE id = ?
+''')
+
 def get_signal_by_id(signal_id: int) -> Optional[Dict]:
     conn = get_db_connection()
     cursor = conn.cursor()
-    execute_sql(cursor,
-        '''
-        SELECT id, title, content, tier_required, evidence_json, created_at
-        FROM signals
-        WHERE id = ?
-        ''',
-        (signal_id,)
-    )
+    execute_prepared(conn, cursor, _SIGNAL_BY_ID, (signal_id,))
     row = cursor.fetchone()
     conn.close()
     return dict(row) if row else None
@@ -851,17 +644,7 @@ def upsert_signal_evaluation(
     conn.close()
 
 def _parse_db_datetime(value: Optional[str]) -> Optional[datetime]:
-    if not value:
-        return None
-    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f"):
-        try:
-            return datetime.strptime(value, fmt)
-        except Exception:
-            continue
-    try:
-        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
-    except Exception:
-        return None
+    return _db_timestamps.parse(value)
 
 def _wilson_ci(k: int, n: int, z: float = 1.96) -> Dict[str, float]:
     if n <= 0:
@@ -893,7 +676,7 @@ def _percentile(values: List[int], p: float) -> Optional[int]:
 
 def get_signal_credibility(days: int) -> Dict[str, Any]:
     since_ts = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     cursor = conn.cursor()
     execute_sql(
         cursor,
@@ -1123,7 +906,7 @@ def update_notification_attempt(
 
 def get_delivery_observability(days: int) -> Dict[str, Any]:
     since_ts = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     cursor = conn.cursor()
     execute_sql(
         cursor,
@@ -1243,18 +1026,16 @@ def upsert_fcm_token(user_id: int, token: str) -> None:
     conn.commit()
     conn.close()
 
+_NOTIFICATION_SETTINGS = statement("notification_settings", '''
+    SELECT push_enabled
+    FROM notification_settings
+    WHERE user_id = ?
+''')
+
 def get_notification_settings(user_id: int) -> Dict[str, Any]:
     conn = get_db_connection()
     cursor = conn.cursor()
-    execute_sql(
-        cursor,
-        '''
-        SELECT push_enabled
-        FROM notification_settings
-        WHERE user_id = ?
-        ''',
-        (user_id,)
-    )
+    execute_prepared(conn, cursor, _NOTIFICATION_SETTINGS, (user_id,))
     row = cursor.fetchone()
     conn.close()
     if not row:
@@ -1279,16 +1060,15 @@ def set_notification_settings(user_id: int, push_enabled: bool) -> None:
     conn.commit()
     conn.close()
 
+_FCM_TOKENS_FOR_USER = statement("fcm_tokens_for_user", '''
+    SELECT token FROM fcm_tokens
+    WHERE user_id = ?
+''')
+
 def get_fcm_tokens_for_user(user_id: int) -> List[str]:
     conn = get_db_connection()
     cursor = conn.cursor()
-    execute_sql(cursor,
-        '''
-        SELECT token FROM fcm_tokens
-        WHERE user_id = ?
-        ''',
-        (user_id,)
-    )
+    execute_prepared(conn, cursor, _FCM_TOKENS_FOR_USER, (user_id,))
     rows = cursor.fetchall()
     conn.close()
     return [row["token"] for row in rows]
@@ -1340,7 +1120,7 @@ def has_recent_analytics_event(user_id: int, event_name: str, since_hours: int)
     return (row["count"] if row else 0) > 0
 
 def get_signal_stats(days: int = 7) -> Dict[str, int]:
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     cursor = conn.cursor()
     since_ts = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
     execute_sql(
@@ -1420,7 +1200,7 @@ def remove_from_watchlist(user_id: int, market_id: str) -> None:
     conn.close()
 
 def get_daily_pulse(limit: int = 20, offset: int = 0) -> List[Dict]:
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     cursor = conn.cursor()
     execute_sql(cursor,
         '''
@@ -1498,7 +1278,7 @@ def redeem_referral_code(code: str, referee_user_id: int) -> bool:
         return False
 
 def get_feature_flags(tier: str) -> List[Dict]:
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     cursor = conn.cursor()
     execute_sql(cursor,
         '''
@@ -1514,7 +1294,7 @@ def get_feature_flags(tier: str) -> List[Dict]:
     return [dict(row) for row in rows]
 
 def get_metrics_counts() -> Dict:
-    conn = get_db_connection()
+    conn = get_db_connection(read_only=True)
     cursor = conn.cursor()
     execute_sql(cursor, "SELECT COUNT(*) as count FROM users")
     users_count = cursor.fetchone()["count"]
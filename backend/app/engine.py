@@ -0,0 +1,260 @@
+"""
+The one SQLAlchemy engine behind every database access path.
+
+ORM sessions (``database.get_session``) and the DB-API connections handed
+out by ``app.database.get_db_connection`` are checked out of the same
+pool, against the same store: Postgres when ``DATABASE_URL`` is set,
+otherwise the SQLite file at ``DB_PATH``.  Pool size, overflow, checkout
+timeout and recycle age come from the environment.
+
+``DATABASE_REPLICA_URL`` adds a second engine with its own pool
+(``DB_REPLICA_POOL_SIZE``) for read-only work.  Replica connections are
+pinged on checkout; when one can't be opened the replica is skipped for
+``DB_REPLICA_RETRY_SECONDS`` and reads go to the primary.
+
+Both pools are capped at size + overflow connections.  A checkout beyond
+that waits up to ``DB_POOL_TIMEOUT`` seconds, then raises.  Connections
+older than ``DB_POOL_RECYCLE`` seconds are replaced at checkout.  Primary
+checkouts aren't pinged unless ``DB_POOL_PRE_PING`` is set; a connection
+that died while idle fails its statement and is invalidated then.
+Checkout wait, timeouts, connections in use and open, and connections
+created and closed are exported to Prometheus per pool.
+
+Every new SQLite connection gets the ``SQLITE_PRAGMAS`` profile: WAL so
+API readers don't block on the scheduler's writes, ``synchronous=NORMAL``
+(durable at checkpoints, safe under WAL), a memory map, a larger page
+cache, in-memory temp tables and a busy timeout instead of immediate
+``database is locked`` errors.  Each pragma is overridable through its
+``SQLITE_*`` variable; an empty value leaves SQLite's default.
+"""
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import Dict, Optional, Set
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, StaticPool
+
+DB_PATH = os.environ.get("DB_PATH") or "polypulse.db"
+
+
+def _normalize_url(url: Optional[str]) -> Optional[str]:
+    if url and url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+DATABASE_URL = _normalize_url(os.environ.get("DATABASE_URL"))
+DATABASE_REPLICA_URL = _normalize_url(os.environ.get("DATABASE_REPLICA_URL"))
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE") or os.environ.get("DB_POOL_MAX") or "5")
+DB_POOL_OVERFLOW = int(os.environ.get("DB_POOL_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "0") == "1"
+DB_REPLICA_POOL_SIZE = int(os.environ.get("DB_REPLICA_POOL_SIZE") or DB_POOL_SIZE)
+DB_REPLICA_RETRY_SECONDS = float(os.environ.get("DB_REPLICA_RETRY_SECONDS", "30"))
+
+SQLITE_PRAGMAS: Dict[str, str] = {
+    pragma: value
+    for pragma, value in (
+        # First, so switching to WAL waits out a concurrent writer.
+        ("busy_timeout", os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        ("journal_mode", os.environ.get("SQLITE_JOURNAL_MODE", "WAL")),
+        ("synchronous", os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")),
+        ("mmap_size", os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        # Negative: KiB rather than pages.
+        ("cache_size", os.environ.get("SQLITE_CACHE_SIZE", "-65536")),
+        ("temp_store", os.environ.get("SQLITE_TEMP_STORE", "MEMORY")),
+    )
+    if value
+}
+
+POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection', ['pool'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+POOL_CHECKOUT_TIMEOUTS = Counter('db_pool_checkout_timeouts_total', 'Checkouts that gave up waiting', ['pool'])
+POOL_IN_USE = Gauge('db_pool_connections_in_use', 'Connections checked out of the pool', ['pool'])
+POOL_OPEN = Gauge('db_pool_connections_open', 'Connections held by the pool, idle or in use', ['pool'])
+POOL_CONNECTIONS_CREATED = Counter('db_pool_connections_created_total', 'Connections opened by the pool', ['pool'])
+POOL_CONNECTIONS_CLOSED = Counter('db_pool_connections_closed_total', 'Connections closed by the pool', ['pool'])
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout under ``pool_name``."""
+    pool_name = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.labels(self.pool_name).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self.pool_name).observe(time.perf_counter() - start)
+
+
+# A subclass per pool name, so the name survives ``Pool.recreate()``.
+_POOL_CLASSES = {
+    name: type(f"{name.title()}QueuePool", (InstrumentedQueuePool,), {"pool_name": name})
+    for name in ("primary", "replica")
+}
+
+_engine: Optional[Engine] = None
+_url: Optional[str] = None
+_replica_engine: Optional[Engine] = None
+_replica_url: Optional[str] = None
+_replica_down_until = 0.0
+# ids of live DB-API connections opened by the replica engine.
+_replica_connections: Set[int] = set()
+_engine_lock = Lock()
+
+
+def database_url() -> str:
+    if _url is not None:
+        return _url
+    return DATABASE_URL or f"sqlite:///{DB_PATH}"
+
+
+def replica_url() -> Optional[str]:
+    return _replica_url if _replica_url is not None else DATABASE_REPLICA_URL
+
+
+def is_postgres(url: Optional[str] = None) -> bool:
+    return (url or database_url()).startswith("postgresql")
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: Optional[Dict[str, str]] = None) -> None:
+    """Run the tuning profile (``SQLITE_PRAGMAS`` by default) on a sqlite3 connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma, value in (SQLITE_PRAGMAS if pragmas is None else pragmas).items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+    finally:
+        cursor.close()
+
+
+def _create_engine(url: str, name: str = "primary", pool_size: Optional[int] = None, pre_ping: bool = False) -> Engine:
+    is_sqlite = url.startswith("sqlite")
+    if is_sqlite and url in ("sqlite://", "sqlite:///:memory:"):
+        # One shared connection, or every checkout would see an empty database.
+        engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False} if is_sqlite else {},
+            poolclass=_POOL_CLASSES[name],
+            pool_size=pool_size or DB_POOL_SIZE,
+            max_overflow=DB_POOL_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=pre_ping or DB_POOL_PRE_PING
+        )
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        POOL_CONNECTIONS_CREATED.labels(name).inc()
+        if is_sqlite:
+            # Raw queries read columns by name; the ORM only indexes rows.
+            dbapi_connection.row_factory = sqlite3.Row
+            apply_sqlite_pragmas(dbapi_connection)
+
+    @event.listens_for(engine, "close")
+    def _on_close(dbapi_connection, connection_record):
+        POOL_CONNECTIONS_CLOSED.labels(name).inc()
+
+    return engine
+
+
+def _pool_stat(name: str, stat: str) -> float:
+    engine = _engine if name == "primary" else _replica_engine
+    pool = engine.pool if engine is not None else None
+    if not isinstance(pool, QueuePool):
+        return 0
+    if stat == "in_use":
+        return pool.checkedout()
+    return pool.checkedout() + pool.checkedin()
+
+
+for _name in _POOL_CLASSES:
+    POOL_IN_USE.labels(_name).set_function(lambda name=_name: _pool_stat(name, "in_use"))
+    POOL_OPEN.labels(_name).set_function(lambda name=_name: _pool_stat(name, "open"))
+
+
+def pool_status() -> Dict[str, Dict[str, float]]:
+    """In-use and open connection counts per configured pool."""
+    names = ["primary"] + (["replica"] if _replica_engine is not None else [])
+    return {name: {"in_use": _pool_stat(name, "in_use"), "open": _pool_stat(name, "open")} for name in names}
+
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine(database_url())
+    return _engine
+
+
+def _create_replica_engine(url: str) -> Engine:
+    engine = _create_engine(url, name="replica", pool_size=DB_REPLICA_POOL_SIZE, pre_ping=True)
+
+    @event.listens_for(engine, "connect")
+    def _track(dbapi_connection, connection_record):
+        _replica_connections.add(id(dbapi_connection))
+
+    @event.listens_for(engine, "close")
+    def _untrack(dbapi_connection, connection_record):
+        _replica_connections.discard(id(dbapi_connection))
+
+    return engine
+
+
+def replica_available() -> bool:
+    """A replica is configured and not marked down."""
+    return bool(replica_url()) and time.monotonic() >= _replica_down_until
+
+
+def get_replica_engine() -> Optional[Engine]:
+    """The replica engine, or None when ``replica_available()`` is false."""
+    global _replica_engine
+    if not replica_available():
+        return None
+    if _replica_engine is None:
+        with _engine_lock:
+            if _replica_engine is None:
+                _replica_engine = _create_replica_engine(replica_url())
+    return _replica_engine
+
+
+def mark_replica_down() -> None:
+    """Skip the replica for ``DB_REPLICA_RETRY_SECONDS``."""
+    global _replica_down_until
+    _replica_down_until = time.monotonic() + DB_REPLICA_RETRY_SECONDS
+
+
+def is_replica_connection(dbapi_connection) -> bool:
+    return id(dbapi_connection) in _replica_connections
+
+
+def configure(url: Optional[str] = None, replica: Optional[str] = None) -> None:
+    """Point the engines at ``url`` and ``replica`` (None: the environment's).
+
+    Current pools are disposed; the next checkout opens the new stores.
+    """
+    global _engine, _url, _replica_engine, _replica_url, _replica_down_until
+    with _engine_lock:
+        for engine in (_engine, _replica_engine):
+            if engine is not None:
+                engine.dispose()
+        _engine = None
+        _replica_engine = None
+        _url = url
+        _replica_url = replica
+        _replica_down_until = 0.0
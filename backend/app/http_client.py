@@ -0,0 +1,203 @@
+"""
+Shared pooled HTTP client for the Polymarket fetchers.
+
+One keep-alive ``requests.Session`` is kept per (host, route), where route is
+either the environment proxy or a direct connection.  In ``auto`` proxy mode
+the route that last worked for a host is remembered, and a route that failed
+at the transport level is not retried until its cooldown expires.
+"""
+import os
+import time
+import logging
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+POOL_MAXSIZE = int(os.environ.get("POLYMARKET_POOL_MAXSIZE", "8"))
+POOL_BLOCK_TIMEOUT = float(os.environ.get("POLYMARKET_POOL_TIMEOUT", "10"))
+ROUTE_RETRY_SECONDS = float(os.environ.get("POLYMARKET_ROUTE_RETRY_SECONDS", "300"))
+USER_AGENT = "Mozilla/5.0"
+
+HTTP_POOL_CHECKOUTS = Counter(
+    'polymarket_http_pool_checkouts_total',
+    'Upstream HTTP connection checkouts',
+    ['host', 'result']
+)
+HTTP_HANDSHAKES = Counter(
+    'polymarket_http_handshakes_total',
+    'Upstream TCP/TLS connection handshakes',
+    ['host']
+)
+
+_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = Lock()
+
+
+def _record(host: str, field: str) -> None:
+    with _stats_lock:
+        entry = _stats.setdefault(host, {"hits": 0, "misses": 0, "handshakes": 0})
+        entry[field] += 1
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        _record(self.host, "handshakes")
+        HTTP_HANDSHAKES.labels(host=self.host).inc()
+        super().connect()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        _record(self.host, "handshakes")
+        HTTP_HANDSHAKES.labels(host=self.host).inc()
+        super().connect()
+
+
+def _track_checkout(host: str, conn):
+    # A pooled connection that is still open keeps its socket; a fresh or
+    # dropped one has no socket and will handshake on first use.
+    result = "hit" if getattr(conn, "sock", None) is not None else "miss"
+    _record(host, "hits" if result == "hit" else "misses")
+    HTTP_POOL_CHECKOUTS.labels(host=host, result=result).inc()
+    return conn
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+    def _get_conn(self, timeout=None):
+        return _track_checkout(self.host, super()._get_conn(timeout))
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+    def _get_conn(self, timeout=None):
+        return _track_checkout(self.host, super()._get_conn(timeout))
+
+
+_POOL_CLASSES = {"http": _CountingHTTPConnectionPool, "https": _CountingHTTPSConnectionPool}
+
+
+class _PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _POOL_CLASSES
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        if not proxy.lower().startswith("socks"):
+            manager.pool_classes_by_scheme = _POOL_CLASSES
+        return manager
+
+
+_sessions: Dict[Tuple[str, bool], requests.Session] = {}
+_sessions_lock = Lock()
+_preferred_route: Dict[str, bool] = {}
+_route_failed_until: Dict[Tuple[str, bool], float] = {}
+_route_lock = Lock()
+
+
+def _get_session(host: str, use_proxy: bool) -> requests.Session:
+    key = (host, use_proxy)
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.trust_env = use_proxy
+                session.headers["User-Agent"] = USER_AGENT
+                adapter = _PooledAdapter(pool_connections=2, pool_maxsize=POOL_MAXSIZE, pool_block=True)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _sessions[key] = session
+    return session
+
+
+def _route_order(host: str) -> List[bool]:
+    mode = os.getenv("POLYMARKET_PROXY_MODE", "auto").lower()
+    if mode == "proxy":
+        return [True]
+    if mode == "direct":
+        return [False]
+    with _route_lock:
+        preferred = _preferred_route.get(host, True)
+        order = [preferred, not preferred]
+        now = time.monotonic()
+        available = [r for r in order if _route_failed_until.get((host, r), 0.0) <= now]
+    return available or order
+
+
+def _mark_route(host: str, use_proxy: bool, ok: bool) -> None:
+    with _route_lock:
+        if ok:
+            _preferred_route[host] = use_proxy
+            _route_failed_until.pop((host, use_proxy), None)
+        else:
+            _route_failed_until[(host, use_proxy)] = time.monotonic() + ROUTE_RETRY_SECONDS
+
+
+def http_get(
+    url: str,
+    params: Optional[Dict] = None,
+    timeout: float = 10,
+    headers: Optional[Dict] = None,
+    stream: bool = False
+) -> requests.Response:
+    """
+    GET ``url`` through the pooled session for its host.  With ``stream``
+    the body is left unread; close the response to release the connection.
+
+    Transport failures (connect errors, timeouts, proxy errors) fall over to
+    the other route; HTTP error statuses are raised as-is since the upstream
+    was reached.
+    """
+    host = urlparse(url).netloc
+    last_exc: Optional[Exception] = None
+    for use_proxy in _route_order(host):
+        session = _get_session(host, use_proxy)
+        try:
+            response = session.get(url, params=params or {}, timeout=timeout, headers=headers, stream=stream)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _mark_route(host, use_proxy, ok=False)
+            logger.debug(f"Route {'proxy' if use_proxy else 'direct'} failed for {host}: {e}")
+            last_exc = e
+            continue
+        _mark_route(host, use_proxy, ok=True)
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        return response
+    if last_exc:
+        raise last_exc
+    raise RuntimeError("Request failed")
+
+
+def get_pool_stats() -> Dict[str, Dict[str, int]]:
+    """Per-host pool hit/miss and handshake counters."""
+    with _stats_lock:
+        return {host: dict(entry) for host, entry in _stats.items()}
+
+
+def reset_http_client() -> None:
+    """Close pooled sessions and forget remembered routes and counters."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+    with _route_lock:
+        _preferred_route.clear()
+        _route_failed_until.clear()
+    with _stats_lock:
+        _stats.clear()
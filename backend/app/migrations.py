@@ -0,0 +1,668 @@
+"""
+Versioned schema migrations for the tables in ``app/database.py``.
+
+Each migration runs once, in its own transaction, and is recorded in
+``schema_migrations``; ``init_db`` calls ``run_migrations`` at startup, so a
+restart only pays for the versions it hasn't seen.  Concurrent starters are
+serialised with ``BEGIN IMMEDIATE`` on SQLite and an advisory lock on
+Postgres, and re-check the recorded versions once they hold the lock.
+
+New schema changes go in a new function appended to ``MIGRATIONS``; never
+edit one that has shipped.  ``explain_hot_queries`` runs ``EXPLAIN`` over
+the hot-path queries and reports which indexes they use.
+"""
+import logging
+import re
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+
+from app.database import IS_POSTGRES, fill_whale_leaderboard, get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Key for pg_advisory_xact_lock, shared by every process running migrations.
+_PG_LOCK_KEY = 7238141
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable
+
+
+def _baseline(cursor) -> None:
+    # The tables and default rows init_db used to create on every start.
+    # IF NOT EXISTS / ON CONFLICT keep it safe on databases that predate
+    # schema_migrations.
+    pk_type = "SERIAL PRIMARY KEY" if IS_POSTGRES else "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    # Alerts
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS alerts (
+            id {pk_type},
+            timestamp TEXT NOT NULL,
+            market_question TEXT NOT NULL,
+            outcome TEXT NOT NULL,
+            old_price REAL NOT NULL,
+            new_price REAL NOT NULL,
+            change REAL NOT NULL,
+            message TEXT NOT NULL
+        )
+    ''')
+
+    # Users
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS users (
+            id {pk_type},
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Watchlists
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS watchlists (
+            id {pk_type},
+            user_id INTEGER NOT NULL,
+            market_id TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(user_id, market_id),
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    ''')
+
+    # FCM Tokens
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS fcm_tokens (
+            id {pk_type},
+            user_id INTEGER,
+            token TEXT UNIQUE NOT NULL,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    ''')
+
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS notification_settings (
+            id {pk_type},
+            user_id INTEGER NOT NULL UNIQUE,
+            push_enabled INTEGER NOT NULL DEFAULT 1,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    ''')
+
+    # Whale Trades
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS whale_trades (
+            id {pk_type},
+            timestamp INTEGER NOT NULL,
+            maker_address TEXT NOT NULL,
+            market_question TEXT NOT NULL,
+            outcome TEXT NOT NULL,
+            side TEXT NOT NULL,
+            size REAL NOT NULL,
+            price REAL NOT NULL,
+            value_usd REAL NOT NULL,
+            market_slug TEXT,
+            UNIQUE(maker_address, timestamp, market_slug, value_usd)
+        )
+    ''')
+
+    # Subscriptions
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS subscriptions (
+            id {pk_type},
+            user_id INTEGER NOT NULL,
+            platform TEXT NOT NULL,
+            plan_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            start_at TEXT NOT NULL,
+            end_at TEXT NOT NULL,
+            auto_renew INTEGER NOT NULL DEFAULT 1,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(user_id, platform, plan_id)
+        )
+    ''')
+
+    # Entitlements
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS entitlements (
+            id {pk_type},
+            tier TEXT NOT NULL,
+            feature_key TEXT NOT NULL,
+            is_enabled INTEGER NOT NULL DEFAULT 1,
+            quota INTEGER,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(tier, feature_key)
+        )
+    ''')
+
+    # Feature Flags
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS feature_flags (
+            id {pk_type},
+            feature_key TEXT NOT NULL,
+            enabled INTEGER NOT NULL DEFAULT 0,
+            tier TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(feature_key, tier)
+        )
+    ''')
+
+    # Query Metrics
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS query_metrics (
+            id {pk_type},
+            query TEXT NOT NULL,
+            duration REAL NOT NULL,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # User Entitlements
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS user_entitlements (
+            id {pk_type},
+            user_id INTEGER NOT NULL,
+            tier TEXT NOT NULL,
+            effective_at TEXT NOT NULL,
+            expires_at TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Transactions
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id {pk_type},
+            user_id INTEGER NOT NULL,
+            platform TEXT NOT NULL,
+            order_id TEXT NOT NULL,
+            product_id TEXT NOT NULL,
+            purchase_token TEXT NOT NULL,
+            purchase_state TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            currency TEXT NOT NULL,
+            purchased_at TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(platform, order_id)
+        )
+    ''')
+
+    # Signals
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS signals (
+            id {pk_type},
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            tier_required TEXT NOT NULL DEFAULT 'free',
+            evidence_json TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS signal_evaluations (
+            id {pk_type},
+            signal_id INTEGER NOT NULL,
+            is_hit INTEGER NOT NULL,
+            lead_seconds INTEGER,
+            evaluated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(signal_id),
+            FOREIGN KEY(signal_id) REFERENCES signals(id)
+        )
+    ''')
+
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS notification_attempts (
+            id {pk_type},
+            user_id INTEGER NOT NULL,
+            signal_id INTEGER NOT NULL,
+            mode TEXT NOT NULL,
+            delay_seconds INTEGER NOT NULL DEFAULT 0,
+            retry_count INTEGER NOT NULL DEFAULT 0,
+            queued_at TEXT,
+            deliver_at TEXT,
+            sent_at TEXT,
+            token_count INTEGER NOT NULL DEFAULT 0,
+            success_count INTEGER NOT NULL DEFAULT 0,
+            failure_count INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL,
+            error TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id),
+            FOREIGN KEY(signal_id) REFERENCES signals(id)
+        )
+    ''')
+
+    # Daily Pulse
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS daily_pulse (
+            id {pk_type},
+            title TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Analytics Events
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS analytics_events (
+            id {pk_type},
+            user_id INTEGER,
+            event_name TEXT NOT NULL,
+            properties TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Referral Codes
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS referral_codes (
+            id {pk_type},
+            user_id INTEGER NOT NULL,
+            code TEXT NOT NULL UNIQUE,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    ''')
+
+    # Referral Redemptions
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS referral_redemptions (
+            id {pk_type},
+            code TEXT NOT NULL,
+            referrer_user_id INTEGER NOT NULL,
+            referee_user_id INTEGER NOT NULL UNIQUE,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(referrer_user_id) REFERENCES users(id),
+            FOREIGN KEY(referee_user_id) REFERENCES users(id)
+        )
+    ''')
+
+    # Initial Data
+    if IS_POSTGRES:
+        insert_ignore_entitlements = '''
+        INSERT INTO entitlements (tier, feature_key, is_enabled, quota)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (tier, feature_key) DO NOTHING
+        '''
+        cursor.executemany(insert_ignore_entitlements, [
+            ("free", "alerts_basic", 1, 2),
+            ("free", "alerts_pro", 0, None),
+            ("free", "history_performance", 0, None),
+            ("free", "low_latency", 0, None),
+            ("pro", "alerts_basic", 1, 999),
+            ("pro", "alerts_pro", 1, 999),
+            ("pro", "history_performance", 1, None),
+            ("pro", "low_latency", 1, None)
+        ])
+
+        insert_ignore_flags = '''
+        INSERT INTO feature_flags (feature_key, enabled, tier)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (feature_key, tier) DO NOTHING
+        '''
+        cursor.executemany(insert_ignore_flags, [
+            ("high_value_signal", 0, "free"),
+            ("high_value_signal", 1, "pro")
+        ])
+    else:
+        cursor.executemany(
+            '''
+            INSERT OR IGNORE INTO entitlements (tier, feature_key, is_enabled, quota)
+            VALUES (?, ?, ?, ?)
+            ''',
+            [
+                ("free", "alerts_basic", 1, 2),
+                ("free", "alerts_pro", 0, None),
+                ("free", "history_performance", 0, None),
+                ("free", "low_latency", 0, None),
+                ("pro", "alerts_basic", 1, 999),
+                ("pro", "alerts_pro", 1, 999),
+                ("pro", "history_performance", 1, None),
+                ("pro", "low_latency", 1, None)
+            ]
+        )
+
+        cursor.executemany(
+            '''
+            INSERT OR IGNORE INTO feature_flags (feature_key, enabled, tier)
+            VALUES (?, ?, ?)
+            ''',
+            [
+                ("high_value_signal", 0, "free"),
+                ("high_value_signal", 1, "pro")
+            ]
+        )
+
+
+def _hot_path_indexes(cursor) -> None:
+    statements = [
+        # /api/whales: latest and largest trades.
+        "CREATE INDEX IF NOT EXISTS idx_whale_trades_timestamp ON whale_trades (timestamp DESC, id)",
+        "CREATE INDEX IF NOT EXISTS idx_whale_trades_value ON whale_trades (value_usd DESC, id)",
+        # Leaderboards group by maker and sum value by side: covering.
+        "CREATE INDEX IF NOT EXISTS idx_whale_trades_maker ON whale_trades (maker_address, side, value_usd)",
+        # has_recent_analytics_event / push-open stats.
+        "CREATE INDEX IF NOT EXISTS idx_analytics_events_user_event ON analytics_events (user_id, event_name, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_analytics_events_event_created ON analytics_events (event_name, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_notification_attempts_created ON notification_attempts (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_signals_created ON signals (created_at)",
+        # Latest entitlement per user (get_latest_user_entitlement, expire_trials).
+        "CREATE INDEX IF NOT EXISTS idx_user_entitlements_user_created ON user_entitlements (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_fcm_tokens_user ON fcm_tokens (user_id)",
+    ]
+    for statement in statements:
+        cursor.execute(statement)
+
+
+def _keyset_indexes(cursor) -> None:
+    # Keyset pages order by (key DESC, id DESC); the id tiebreak has to be in
+    # the index, in the same direction, for the seek to use it.
+    statements = [
+        "DROP INDEX IF EXISTS idx_whale_trades_timestamp",
+        "DROP INDEX IF EXISTS idx_whale_trades_value",
+        "CREATE INDEX IF NOT EXISTS idx_whale_trades_timestamp_id ON whale_trades (timestamp DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_whale_trades_value_id ON whale_trades (value_usd DESC, id DESC)",
+    ]
+    for statement in statements:
+        cursor.execute(statement)
+
+
+_LEADERBOARD_UPSERT = '''
+    INSERT INTO whale_leaderboard (
+        maker_address, total_volume, trade_count, max_trade_value, buy_volume, sell_volume
+    )
+    VALUES (
+        NEW.maker_address, NEW.value_usd, 1, NEW.value_usd,
+        CASE WHEN NEW.side = 'BUY' THEN NEW.value_usd ELSE 0 END,
+        CASE WHEN NEW.side = 'SELL' THEN NEW.value_usd ELSE 0 END
+    )
+    ON CONFLICT (maker_address) DO UPDATE SET
+        total_volume = whale_leaderboard.total_volume + excluded.total_volume,
+        trade_count = whale_leaderboard.trade_count + 1,
+        max_trade_value = {greatest}(whale_leaderboard.max_trade_value, excluded.max_trade_value),
+        buy_volume = whale_leaderboard.buy_volume + excluded.buy_volume,
+        sell_volume = whale_leaderboard.sell_volume + excluded.sell_volume;
+'''
+
+# A delete can lower MAX(), so the maker's row is recomputed from its trades
+# (a seek on idx_whale_trades_maker).
+_LEADERBOARD_RECOMPUTE = '''
+    DELETE FROM whale_leaderboard WHERE maker_address = OLD.maker_address;
+    INSERT INTO whale_leaderboard (
+        maker_address, total_volume, trade_count, max_trade_value, buy_volume, sell_volume
+    )
+    SELECT
+        maker_address, SUM(value_usd), COUNT(*), MAX(value_usd),
+        SUM(CASE WHEN side = 'BUY' THEN value_usd ELSE 0 END),
+        SUM(CASE WHEN side = 'SELL' THEN value_usd ELSE 0 END)
+    FROM whale_trades
+    WHERE maker_address = OLD.maker_address
+    GROUP BY maker_address;
+'''
+
+
+def _whale_leaderboard(cursor) -> None:
+    # Per-maker totals maintained on write, so leaderboards are an index
+    # read instead of a GROUP BY over every whale trade.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS whale_leaderboard (
+            maker_address TEXT PRIMARY KEY,
+            total_volume REAL NOT NULL,
+            trade_count INTEGER NOT NULL,
+            max_trade_value REAL NOT NULL,
+            buy_volume REAL NOT NULL,
+            sell_volume REAL NOT NULL
+        )
+    ''')
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_whale_leaderboard_volume "
+        "ON whale_leaderboard (total_volume DESC, maker_address DESC)"
+    )
+    if IS_POSTGRES:
+        cursor.execute(f'''
+            CREATE OR REPLACE FUNCTION whale_leaderboard_on_insert() RETURNS trigger AS $$
+            BEGIN
+                {_LEADERBOARD_UPSERT.format(greatest="GREATEST")}
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+        cursor.execute(f'''
+            CREATE OR REPLACE FUNCTION whale_leaderboard_on_delete() RETURNS trigger AS $$
+            BEGIN
+                {_LEADERBOARD_RECOMPUTE}
+                RETURN OLD;
+            END;
+            $$ LANGUAGE plpgsql
+        ''')
+        cursor.execute("DROP TRIGGER IF EXISTS whale_trades_leaderboard_insert ON whale_trades")
+        cursor.execute("DROP TRIGGER IF EXISTS whale_trades_leaderboard_delete ON whale_trades")
+        cursor.execute(
+            "CREATE TRIGGER whale_trades_leaderboard_insert AFTER INSERT ON whale_trades "
+            "FOR EACH ROW EXECUTE FUNCTION whale_leaderboard_on_insert()"
+        )
+        cursor.execute(
+            "CREATE TRIGGER whale_trades_leaderboard_delete AFTER DELETE ON whale_trades "
+            "FOR EACH ROW EXECUTE FUNCTION whale_leaderboard_on_delete()"
+        )
+    else:
+        # INSERT OR IGNORE doesn't fire the trigger for skipped duplicates.
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS whale_trades_leaderboard_insert
+            AFTER INSERT ON whale_trades
+            BEGIN
+                {_LEADERBOARD_UPSERT.format(greatest="MAX")}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS whale_trades_leaderboard_delete
+            AFTER DELETE ON whale_trades
+            BEGIN
+                {_LEADERBOARD_RECOMPUTE}
+            END
+        ''')
+    fill_whale_leaderboard(cursor)
+
+
+def _query_stats(cursor) -> None:
+    # Aggregated flushes of app.query_profiler, one row per fingerprint per
+    # flush; replaces the per-statement query_metrics rows.
+    pk_type = "SERIAL PRIMARY KEY" if IS_POSTGRES else "INTEGER PRIMARY KEY AUTOINCREMENT"
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS query_stats (
+            id {pk_type},
+            fingerprint TEXT NOT NULL,
+            sample_query TEXT NOT NULL,
+            calls INTEGER NOT NULL,
+            total_ms REAL NOT NULL,
+            max_ms REAL NOT NULL,
+            histogram TEXT NOT NULL,
+            flushed_at TEXT NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_query_stats_flushed ON query_stats (flushed_at, fingerprint)")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline tables", _baseline),
+    Migration(2, "hot path indexes", _hot_path_indexes),
+    Migration(3, "keyset pagination indexes", _keyset_indexes),
+    Migration(4, "whale leaderboard", _whale_leaderboard),
+    Migration(5, "query profiler stats", _query_stats),
+]
+
+
+def _create_migrations_table(cursor) -> None:
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def applied_versions(cursor) -> Set[int]:
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {int(row["version"]) for row in cursor.fetchall()}
+
+
+def _begin(conn, cursor) -> None:
+    if IS_POSTGRES:
+        # psycopg2 opens the transaction implicitly; DDL is transactional.
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (_PG_LOCK_KEY,))
+    else:
+        # Python's sqlite3 doesn't wrap DDL in a transaction on its own.
+        conn.commit()
+        cursor.execute("BEGIN IMMEDIATE")
+
+
+def run_migrations(conn, migrations: Optional[List[Migration]] = None) -> List[int]:
+    """Apply pending migrations in version order; returns the versions applied."""
+    migrations = sorted(MIGRATIONS if migrations is None else migrations, key=lambda m: m.version)
+    cursor = conn.cursor()
+    _create_migrations_table(cursor)
+    conn.commit()
+
+    done = applied_versions(cursor)
+    applied = []
+    for migration in migrations:
+        if migration.version in done:
+            continue
+        try:
+            _begin(conn, cursor)
+            # Another process may have applied it while we waited for the lock.
+            done = applied_versions(cursor)
+            if migration.version in done:
+                conn.rollback()
+                continue
+            migration.apply(cursor)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)" if IS_POSTGRES
+                else "INSERT INTO schema_migrations (version, name) VALUES (?, ?)",
+                (migration.version, migration.name)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"Migration {migration.version} ({migration.name}) failed")
+            raise
+        logger.info(f"Applied migration {migration.version}: {migration.name}")
+        applied.append(migration.version)
+    return applied
+
+
+# Hot-path queries as the application issues them, with sample parameters.
+HOT_QUERIES: Dict[str, tuple] = {
+    "whales_latest": (
+        "SELECT id, timestamp, maker_address, value_usd FROM whale_trades "
+        "WHERE (timestamp, id) < (?, ?) ORDER BY timestamp DESC, id DESC LIMIT ?",
+        (1700000000, 1000, 50)
+    ),
+    "whales_by_value": (
+        "SELECT id, timestamp, maker_address, value_usd FROM whale_trades "
+        "WHERE (value_usd, id) < (?, ?) ORDER BY value_usd DESC, id DESC LIMIT ?",
+        (5000.0, 1000, 50)
+    ),
+    "signals_page": (
+        "SELECT id, created_at FROM signals WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?",
+        ("2024-01-01 00:00:00", 1000, 50)
+    ),
+    "whale_leaderboard": (
+        "SELECT maker_address, total_volume, trade_count FROM whale_leaderboard "
+        "ORDER BY total_volume DESC, maker_address DESC LIMIT ?",
+        (10,)
+    ),
+    "whale_leaderboard_page": (
+        "SELECT maker_address, total_volume FROM whale_leaderboard "
+        "WHERE (total_volume, maker_address) < (?, ?) ORDER BY total_volume DESC, maker_address DESC LIMIT ?",
+        (50000.0, "0x", 50)
+    ),
+    "recent_analytics_event": (
+        "SELECT COUNT(*) AS count FROM analytics_events WHERE user_id = ? AND event_name = ? AND created_at >= ?",
+        (1, "push_open", "2024-01-01 00:00:00")
+    ),
+    "push_open_events": (
+        "SELECT properties FROM analytics_events WHERE event_name = ? AND created_at >= ?",
+        ("push_open", "2024-01-01 00:00:00")
+    ),
+    "notification_attempts_since": (
+        "SELECT id, status FROM notification_attempts WHERE created_at >= ? ORDER BY created_at DESC",
+        ("2024-01-01 00:00:00",)
+    ),
+    "signals_since": (
+        "SELECT id FROM signals WHERE created_at >= ? ORDER BY created_at DESC",
+        ("2024-01-01 00:00:00",)
+    ),
+    "latest_user_entitlement": (
+        "SELECT * FROM user_entitlements WHERE user_id = ? ORDER BY created_at DESC LIMIT 1",
+        (1,)
+    ),
+    "latest_entitlement_per_user": (
+        """
+        SELECT ue.user_id, ue.expires_at
+        FROM user_entitlements ue
+        INNER JOIN (
+            SELECT user_id, MAX(created_at) AS latest_created
+            FROM user_entitlements
+            GROUP BY user_id
+        ) latest ON ue.user_id = latest.user_id AND ue.created_at = latest.latest_created
+        WHERE ue.tier != 'free'
+        """,
+        ()
+    ),
+    "fcm_tokens_for_user": (
+        "SELECT token FROM fcm_tokens WHERE user_id = ?",
+        (1,)
+    ),
+}
+
+_SQLITE_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+_PG_INDEX = re.compile(r"Index (?:Only )?Scan(?: Backward)? using (\w+)|Bitmap Index Scan on (\w+)")
+
+
+def _plan_lines(cursor, sql: str, params: tuple) -> List[str]:
+    if IS_POSTGRES:
+        cursor.execute("EXPLAIN " + sql.replace("?", "%s"), params)
+        return [row["QUERY PLAN"] for row in cursor.fetchall()]
+    cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+    return [row["detail"] for row in cursor.fetchall()]
+
+
+def explain_hot_queries(conn=None, queries: Optional[Dict[str, tuple]] = None) -> List[Dict]:
+    """EXPLAIN each hot query: its plan, the indexes it uses, and whether it
+    scans a table without one."""
+    own = conn is None
+    conn = conn or get_db_connection()
+    try:
+        cursor = conn.cursor()
+        report = []
+        for name, (sql, params) in (queries or HOT_QUERIES).items():
+            plan = _plan_lines(cursor, sql, params)
+            if IS_POSTGRES:
+                indexes = [next(g for g in m.groups() if g) for line in plan for m in _PG_INDEX.finditer(line)]
+                full_scan = any("Seq Scan" in line for line in plan)
+            else:
+                indexes = [m.group(1) for line in plan for m in _SQLITE_INDEX.finditer(line)]
+                # Scanning a materialised subquery isn't a table scan.
+                derived = {line.split()[1] for line in plan if line.startswith(("MATERIALIZE ", "CO-ROUTINE "))}
+                full_scan = any(
+                    line.startswith("SCAN ") and "INDEX" not in line and line.split()[1] not in derived
+                    for line in plan
+                )
+            report.append({
+                "name": name,
+                "indexes": sorted(set(indexes)),
+                "full_scan": full_scan,
+                "plan": plan
+            })
+        return report
+    finally:
+        if own:
+            conn.close()
@@ -0,0 +1,217 @@
+"""
+In-process query profiler.
+
+``execute_sql`` reports every statement's duration here instead of writing
+slow ones to ``query_metrics`` inline.  Statements are grouped by
+fingerprint (literals replaced by ``?``, ``IN`` lists collapsed, whitespace
+and case normalised); each fingerprint keeps a call count, total and max
+time and a latency histogram.  ``flush`` writes what accumulated since the
+last flush to ``query_stats`` in one batch, from the scheduler, so a slow
+request never pays for its own logging.
+"""
+import json
+import logging
+import os
+import re
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUERY_METRICS_ENABLE = os.environ.get("QUERY_METRICS_ENABLE", "1") == "1"
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get("SLOW_QUERY_THRESHOLD_MS", "50"))
+QUERY_PROFILE_FLUSH_SECONDS = int(os.environ.get("QUERY_PROFILE_FLUSH_SECONDS", "60"))
+
+# Upper bounds in milliseconds; the last bucket is everything slower.
+BUCKETS_MS: Tuple[float, ...] = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\$\d+|:\w+")
+_IN_LIST = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """``query`` with literals and placeholders as ``?`` and whitespace collapsed."""
+    normalized = _STRING.sub("?", query)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _SPACE.sub(" ", normalized).strip().lower()
+    return _IN_LIST.sub("in (?...)", normalized)
+
+
+def _skipped(query: str) -> bool:
+    head = query.lstrip()[:6].lower()
+    return head in ("create", "pragma") or "query_stats" in query or "query_metrics" in query
+
+
+class _Stats:
+    __slots__ = ("sample", "calls", "total_ms", "max_ms", "buckets")
+
+    def __init__(self, sample: str):
+        self.sample = sample
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, duration_ms: float) -> None:
+        self.calls += 1
+        self.total_ms += duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+        self.buckets[bisect_left(BUCKETS_MS, duration_ms)] += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Upper bound of the bucket holding the ``p`` quantile."""
+        if not self.calls:
+            return None
+        rank = p * self.calls
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+
+class QueryProfiler:
+    def __init__(self, enabled: bool = QUERY_METRICS_ENABLE):
+        self.enabled = enabled
+        self._lock = Lock()
+        # Since process start, for /debug/queries.
+        self._totals: Dict[str, _Stats] = {}
+        # Since the last flush.
+        self._pending: Dict[str, _Stats] = {}
+        self.started_at = time.time()
+
+    def record(self, query: str, duration: float) -> None:
+        """Account ``duration`` seconds to ``query``'s fingerprint."""
+        if not self.enabled or _skipped(query):
+            return
+        key = fingerprint(query)
+        duration_ms = duration * 1000
+        with self._lock:
+            for stats in (self._totals, self._pending):
+                entry = stats.get(key)
+                if entry is None:
+                    entry = stats[key] = _Stats(query)
+                entry.add(duration_ms)
+
+    def snapshot(self, limit: Optional[int] = None, min_avg_ms: float = 0.0) -> List[Dict]:
+        """Fingerprints by total time, slowest first."""
+        with self._lock:
+            rows = [
+                {
+                    "fingerprint": key,
+                    "query": entry.sample,
+                    "calls": entry.calls,
+                    "total_ms": round(entry.total_ms, 3),
+                    "avg_ms": round(entry.total_ms / entry.calls, 3),
+                    "max_ms": round(entry.max_ms, 3),
+                    "p50_ms": entry.percentile(0.5),
+                    "p95_ms": entry.percentile(0.95),
+                    "slow_calls": sum(
+                        count for bound, count in zip(BUCKETS_MS + (float("inf"),), entry.buckets)
+                        if bound > SLOW_QUERY_THRESHOLD_MS
+                    ),
+                    "histogram": dict(zip([str(b) for b in BUCKETS_MS] + ["inf"], entry.buckets))
+                }
+                for key, entry in self._totals.items()
+                if entry.total_ms / entry.calls >= min_avg_ms
+            ]
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows[:limit] if limit is not None else rows
+
+    def _drain(self) -> Dict[str, _Stats]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def flush(self, conn=None) -> int:
+        """Write the stats gathered since the last flush to ``query_stats``.
+
+        Returns the number of fingerprints written.  On failure they are
+        merged back, to go out with the next flush.
+        """
+        pending = self._drain()
+        if not pending:
+            return 0
+        from app.database import execute_many_sql, get_db_connection
+
+        flushed_at = datetime.now(timezone.utc).replace(tzinfo=None).isoformat(sep=" ", timespec="seconds")
+        rows = [
+            (key, entry.sample, entry.calls, entry.total_ms, entry.max_ms, json.dumps(entry.buckets), flushed_at)
+            for key, entry in pending.items()
+        ]
+        own = conn is None
+        conn = conn or get_db_connection()
+        try:
+            execute_many_sql(
+                conn.cursor(),
+                '''
+                INSERT INTO query_stats (fingerprint, sample_query, calls, total_ms, max_ms, histogram, flushed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''',
+                rows
+            )
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to flush query profile: {e}")
+            self._merge(pending)
+            return 0
+        finally:
+            if own:
+                conn.close()
+        return len(rows)
+
+    def _merge(self, pending: Dict[str, _Stats]) -> None:
+        with self._lock:
+            for key, entry in pending.items():
+                current = self._pending.get(key)
+                if current is None:
+                    self._pending[key] = entry
+                    continue
+                current.calls += entry.calls
+                current.total_ms += entry.total_ms
+                current.max_ms = max(current.max_ms, entry.max_ms)
+                current.buckets = [a + b for a, b in zip(current.buckets, entry.buckets)]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
+            self._pending.clear()
+            self.started_at = time.time()
+
+
+def recent_query_stats(conn, hours: float = 1.0, limit: int = 10) -> List[Dict]:
+    """Flushed stats of the last ``hours``, per fingerprint, by total time."""
+    from app.database import execute_sql
+
+    since = (datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=hours)).isoformat(
+        sep=" ", timespec="seconds"
+    )
+    cursor = conn.cursor()
+    execute_sql(
+        cursor,
+        '''
+        SELECT fingerprint, MIN(sample_query) AS query, SUM(calls) AS calls,
+               SUM(total_ms) AS total_ms, MAX(max_ms) AS max_ms
+        FROM query_stats
+        WHERE flushed_at >= ?
+        GROUP BY fingerprint
+        ORDER BY SUM(total_ms) DESC
+        LIMIT ?
+        ''',
+        (since, limit)
+    )
+    return [dict(row) for row in cursor.fetchall()]
+
+
+profiler = QueryProfiler()
@@ -0,0 +1,303 @@
+"""
+Stampede-safe response caching behind ``main._cached_response``.
+
+Entries are ``TieredCache`` envelopes, so a lookup finds one of three states:
+
+* fresh: served as is.
+* stale, or picked for early refresh (``CACHE_EARLY_BETA``): still served
+  as is, while one background rebuild per key runs.  It is started at most
+  once per process and takes the key's Redis lock, so at most one worker
+  rebuilds a key at a time.
+* missing: the first request for the key in this process builds it and the
+  rest wait for that result, up to ``CACHE_LOCK_WAIT_SECONDS``.  A worker
+  that can't take the Redis lock polls the cache for the other worker's
+  result for as long, then builds the value itself.
+
+So once a key has been built, requests at a TTL boundary never wait on a
+rebuild.
+
+``render_body`` turns a response into what is worth caching for HTTP: the
+exact JSON body FastAPI would send (validated against the response model
+once, at build time), a strong ETag and any extra headers.
+``body_response`` sends a cached rendering as is, answers a matching
+``If-None-Match`` with 304, and serves clients accepting gzip a variant
+compressed once per process.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from fastapi import Request, Response
+from prometheus_client import Counter
+from pydantic import TypeAdapter
+
+from app.async_database import run_sync
+from app.cache import LocalCache, cache, key_prefix, needs_refresh
+
+logger = logging.getLogger(__name__)
+
+CACHE_LOCK_WAIT_SECONDS = float(os.environ.get("CACHE_LOCK_WAIT_SECONDS", "5"))
+CACHE_LOCK_POLL_SECONDS = float(os.environ.get("CACHE_LOCK_POLL_SECONDS", "0.05"))
+CACHE_REFRESH_WORKERS = int(os.environ.get("CACHE_REFRESH_WORKERS", "4"))
+# Same threshold as the app's GZipMiddleware.
+RESPONSE_GZIP_MIN_BYTES = int(os.environ.get("RESPONSE_GZIP_MIN_BYTES", "1000"))
+RESPONSE_GZIP_TTL_SECONDS = int(os.environ.get("RESPONSE_GZIP_TTL_SECONDS", "600"))
+
+CACHE_REFRESHES = Counter('cache_background_refreshes_total', 'Stale entries rebuilt in the background',
+                          ['prefix', 'result'])
+CACHE_COALESCED = Counter('cache_coalesced_requests_total', 'Misses that waited for another build', ['prefix'])
+NOT_MODIFIED = Counter('http_not_modified_total', 'Cached responses answered with 304')
+
+# A unique result for "the leader's build failed".
+_FAILED = object()
+
+
+class _Flight:
+    __slots__ = ("done", "value")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = _FAILED
+
+
+_lock = threading.Lock()
+_flights: Dict[str, _Flight] = {}
+# Per event loop, since a future can only be awaited on its own loop: the
+# app's and every asyncio.run in the scheduler's cache warmers.
+_async_flights: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = (
+    weakref.WeakKeyDictionary()
+)
+_refreshing: Set[str] = set()
+_refresh_tasks: Set["asyncio.Task"] = set()
+_refresh_executor = ThreadPoolExecutor(max_workers=CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+# Gzipped bodies by ETag, under one metrics prefix.
+_gzipped = LocalCache(max_entries=512, max_bytes=32 * 1024 * 1024)
+
+
+def _claim_refresh(key: str) -> bool:
+    with _lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+        return True
+
+
+def _release_refresh(key: str) -> None:
+    with _lock:
+        _refreshing.discard(key)
+
+
+def _build(key: str, ttl_seconds: int, builder: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    value = builder()
+    cache.set_entry(key, value, ttl_seconds, time.perf_counter() - start)
+    return value
+
+
+def _refresh(key: str, ttl_seconds: int, builder: Callable[[], Any]) -> None:
+    token = None
+    try:
+        token = cache.acquire_lock(key)
+        if token is not None:
+            _build(key, ttl_seconds, builder)
+            CACHE_REFRESHES.labels(key_prefix(key), "ok").inc()
+    except Exception as e:
+        CACHE_REFRESHES.labels(key_prefix(key), "error").inc()
+        logger.error(f"Background refresh of {key} failed: {e}")
+    finally:
+        if token is not None:
+            cache.release_lock(key, token)
+        _release_refresh(key)
+
+
+def _fill(key: str, ttl_seconds: int, builder: Callable[[], Any]) -> Any:
+    token = cache.acquire_lock(key)
+    if token is None:
+        deadline = time.monotonic() + CACHE_LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(CACHE_LOCK_POLL_SECONDS)
+            entry = cache.get_entry(key)
+            if entry is not None:
+                return entry["value"]
+    try:
+        return _build(key, ttl_seconds, builder)
+    finally:
+        if token is not None:
+            cache.release_lock(key, token)
+
+
+def cached_call(key: str, ttl_seconds: int, builder: Callable[[], Any]) -> Any:
+    """``builder()``'s result, cached under ``key`` for ``ttl_seconds``."""
+    entry = cache.get_entry(key)
+    if entry is not None:
+        if needs_refresh(entry) and _claim_refresh(key):
+            _refresh_executor.submit(_refresh, key, ttl_seconds, builder)
+        return entry["value"]
+
+    with _lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        CACHE_COALESCED.labels(key_prefix(key)).inc()
+        if flight.done.wait(CACHE_LOCK_WAIT_SECONDS) and flight.value is not _FAILED:
+            return flight.value
+        return builder()
+    try:
+        flight.value = _fill(key, ttl_seconds, builder)
+        return flight.value
+    finally:
+        flight.done.set()
+        with _lock:
+            _flights.pop(key, None)
+
+
+def _loop_flights() -> Dict[str, "asyncio.Future"]:
+    loop = asyncio.get_running_loop()
+    with _lock:
+        flights = _async_flights.get(loop)
+        if flights is None:
+            flights = _async_flights[loop] = {}
+        return flights
+
+
+async def _build_async(key: str, ttl_seconds: int, builder: Callable[[], Awaitable[Any]]) -> Any:
+    start = time.perf_counter()
+    value = await builder()
+    await run_sync(cache.set_entry, key, value, ttl_seconds, time.perf_counter() - start)
+    return value
+
+
+async def _refresh_async(key: str, ttl_seconds: int, builder: Callable[[], Awaitable[Any]]) -> None:
+    token = None
+    try:
+        token = await run_sync(cache.acquire_lock, key)
+        if token is not None:
+            await _build_async(key, ttl_seconds, builder)
+            CACHE_REFRESHES.labels(key_prefix(key), "ok").inc()
+    except Exception as e:
+        CACHE_REFRESHES.labels(key_prefix(key), "error").inc()
+        logger.error(f"Background refresh of {key} failed: {e}")
+    finally:
+        if token is not None:
+            await run_sync(cache.release_lock, key, token)
+        _release_refresh(key)
+
+
+async def _fill_async(key: str, ttl_seconds: int, builder: Callable[[], Awaitable[Any]]) -> Any:
+    token = await run_sync(cache.acquire_lock, key)
+    if token is None:
+        deadline = time.monotonic() + CACHE_LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(CACHE_LOCK_POLL_SECONDS)
+            entry = await run_sync(cache.get_entry, key)
+            if entry is not None:
+                return entry["value"]
+    try:
+        return await _build_async(key, ttl_seconds, builder)
+    finally:
+        if token is not None:
+            await run_sync(cache.release_lock, key, token)
+
+
+async def cached_call_async(key: str, ttl_seconds: int, builder: Callable[[], Awaitable[Any]]) -> Any:
+    """``cached_call`` for async endpoints; ``builder`` is awaited."""
+    # Local hits skip the executor hop.
+    entry: Optional[dict] = cache.get_local_entry(key)
+    if entry is None:
+        entry = await run_sync(cache.get_entry, key)
+    if entry is not None:
+        if needs_refresh(entry) and _claim_refresh(key):
+            task = asyncio.create_task(_refresh_async(key, ttl_seconds, builder))
+            _refresh_tasks.add(task)
+            task.add_done_callback(_refresh_tasks.discard)
+        return entry["value"]
+
+    flights = _loop_flights()
+    flight = flights.get(key)
+    if flight is not None:
+        CACHE_COALESCED.labels(key_prefix(key)).inc()
+        try:
+            value = await asyncio.wait_for(asyncio.shield(flight), CACHE_LOCK_WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            value = _FAILED
+        return value if value is not _FAILED else await builder()
+    flight = flights[key] = asyncio.get_running_loop().create_future()
+    value = _FAILED
+    try:
+        value = await _fill_async(key, ttl_seconds, builder)
+        return value
+    finally:
+        flight.set_result(value)
+        flights.pop(key, None)
+
+
+@lru_cache(maxsize=64)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def render_body(value: Any, model=None, headers: Optional[Dict[str, str]] = None) -> dict:
+    """``value`` as the JSON body FastAPI would send, with its ETag.
+
+    With ``model`` (the endpoint's response model) the value is validated
+    and dumped by alias, like FastAPI does for every response; without it
+    it is dumped as FastAPI's JSONResponse would.
+    """
+    if model is not None:
+        adapter = _adapter(model)
+        body = adapter.dump_json(adapter.validate_python(value), by_alias=True).decode()
+    else:
+        body = json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+    digest = hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
+    return {"body": body, "etag": f'"{digest}"', "headers": headers or {}}
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tag = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # If-None-Match compares weakly.
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') in (tag, f"{tag}-gzip"):
+            return True
+    return False
+
+
+def body_response(request: Optional[Request], rendered: dict) -> Response:
+    """The cached ``render_body`` result as a response to ``request``."""
+    headers = {"ETag": rendered["etag"], "Vary": "Accept-Encoding", **rendered["headers"]}
+    if request is not None and _etag_matches(request.headers.get("if-none-match"), rendered["etag"]):
+        NOT_MODIFIED.inc()
+        return Response(status_code=304, headers=headers)
+    body = rendered["body"].encode()
+    if (
+        request is not None
+        and len(body) >= RESPONSE_GZIP_MIN_BYTES
+        and "gzip" in request.headers.get("accept-encoding", "")
+    ):
+        gzip_key = f"response:gzip:{rendered['etag']}"
+        compressed = _gzipped.get(gzip_key)
+        if compressed is None:
+            compressed = gzip.compress(body, compresslevel=9)
+            _gzipped.set(gzip_key, compressed, RESPONSE_GZIP_TTL_SECONDS, len(compressed))
+        # A strong ETag names one representation.
+        headers["ETag"] = rendered["etag"][:-1] + '-gzip"'
+        headers["Content-Encoding"] = "gzip"
+        return Response(compressed, media_type="application/json", headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,7 +1,8 @@
 import os
 import requests
-from typing import List, Dict, Optional
+from typing import List, Dict
 from app.models.market import Market, Token
+from app.http_client import http_get
 from database import get_session
 from models import Market as DbMarket
 
@@ -61,31 +62,7 @@ class MarketService:
         return samples[:limit]
 
     def _request_get(self, url: str, params: Dict) -> requests.Response:
-        mode = os.getenv("POLYMARKET_PROXY_MODE", "auto").lower()
-        if mode == "proxy":
-            modes = [True]
-        elif mode == "direct":
-            modes = [False]
-        else:
-            modes = [True, False]
-        last_exc: Optional[Exception] = None
-        for use_proxy in modes:
-            try:
-                session = requests.Session()
-                session.trust_env = use_proxy
-                response = session.get(
-                    url,
-                    params=params,
-                    headers={"User-Agent": "Mozilla/5.0"},
-                    timeout=10
-                )
-                response.raise_for_status()
-                return response
-            except Exception as e:
-                last_exc = e
-        if last_exc:
-            raise last_exc
-        raise RuntimeError("Request failed")
+        return http_get(url, params=params, timeout=10)
 
     def fetch_active_markets(self, limit: int = 50) -> List[Market]:
         mode = os.getenv("POLYMARKET_DATA_MODE", "live").lower()
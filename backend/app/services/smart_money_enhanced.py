@@ -1,181 +1,228 @@
-from collections import defaultdict
-from typing import Dict, List, Tuple
+"""
+Vectorised smart-money scoring.
+
+Trades are turned into columns once per call: an int code per address (in
+first-seen order), value, win flag and timestamp in microseconds.  Every
+per-address aggregate is then a ``np.bincount`` over the codes, and the
+recency windows are resolved in the same pass by bucketing each trade into
+the narrowest window it falls in and cumulating the buckets.
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
 from datetime import datetime, timedelta, timezone
 import logging
+import numpy as np
 from app.cache import cache
+from app.timestamps import TimestampParser
 
 logger = logging.getLogger(__name__)
 
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+# Past datetime.max; larger epoch values fall back to the parser's default.
+_MAX_EPOCH_SECONDS = 253402300800
+
+# Trend windows, narrowest first.
+TREND_PERIODS: Tuple[Tuple[str, timedelta], ...] = (
+    ('24h', timedelta(hours=24)),
+    ('7d', timedelta(days=7)),
+    ('30d', timedelta(days=30)),
+)
+
+
+class TradeColumns(NamedTuple):
+    addresses: List[str]
+    codes: np.ndarray      # int64 index into ``addresses``
+    value: np.ndarray      # float64
+    win: np.ndarray        # bool
+    timestamp: np.ndarray  # int64 microseconds since the epoch, naive UTC
+
+
+def _micros(value: datetime) -> int:
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _timestamp_micros(raw: List, current_time: datetime) -> np.ndarray:
+    default = _micros(current_time)
+    if raw:
+        # Integer epoch seconds (the Data API's layout) convert in one go.
+        numbers = np.array(raw)
+        if numbers.dtype.kind in 'iu' and np.abs(numbers).max() < _MAX_EPOCH_SECONDS:
+            return numbers.astype(np.int64) * 1_000_000
+
+    # Anything else goes through the parser, memoising raw value -> micros
+    # since many trades share a timestamp.
+    parser = TimestampParser()
+    memo: Dict = {}
+
+    def micros(value) -> int:
+        try:
+            cached = memo.get(value)
+        except TypeError:
+            return default
+        if cached is None:
+            parsed = parser.parse(value)
+            cached = memo[value] = default if parsed is None else _micros(parsed)
+        return cached
+
+    return np.fromiter(map(micros, raw), dtype=np.int64, count=len(raw))
+
+
+def trade_columns(trades: Iterable[Dict], current_time: datetime, address: Optional[str] = None) -> TradeColumns:
+    """Columns for trades with an address (or only ``address``'s trades).
+
+    Unparseable timestamps count as ``current_time``.
+    """
+    if address is None:
+        rows = [trade for trade in trades if trade.get('address', '')]
+    else:
+        rows = [trade for trade in trades if trade.get('address') == address]
+
+    addresses = [trade['address'] for trade in rows]
+    index = {name: code for code, name in enumerate(dict.fromkeys(addresses))}
+    codes = np.fromiter(map(index.__getitem__, addresses), dtype=np.int64, count=len(rows))
+    value = np.array([float(trade.get('value', 0)) for trade in rows], dtype=np.float64)
+    win = np.array([bool(trade.get('is_winning', False)) for trade in rows], dtype=np.bool_)
+    timestamp = _timestamp_micros([trade.get('timestamp') for trade in rows], current_time)
+    return TradeColumns(list(index), codes, value, win, timestamp)
+
+
+def window_totals(columns: TradeColumns, cutoffs: Sequence[datetime]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Trades, wins and volume per (address, window) in one pass.
+
+    ``cutoffs`` go from the narrowest window (latest cutoff) to the widest;
+    each result has shape ``(len(addresses), len(cutoffs))``.
+    """
+    groups = len(columns.addresses)
+    windows = len(cutoffs)
+    # Bucket b holds trades inside window b but not window b - 1; the last
+    # bucket is everything older than the widest window.
+    bounds = np.array([_micros(cutoff) for cutoff in reversed(cutoffs)], dtype=np.int64)
+    bucket = windows - np.searchsorted(bounds, columns.timestamp, side='right')
+    cell = columns.codes * (windows + 1) + bucket
+    size = groups * (windows + 1)
+
+    def cumulated(weights=None) -> np.ndarray:
+        sums = np.bincount(cell, weights=weights, minlength=size).reshape(groups, windows + 1)
+        return np.cumsum(sums[:, :windows], axis=1)
+
+    return cumulated(), cumulated(columns.win), cumulated(columns.value)
+
+
 class EnhancedSmartMoneyAnalyzer:
     def __init__(self):
         self.min_trades_threshold = 5
         self.min_volume_threshold = 10000.0
         self.recency_weight = 0.7  # Weight for recent trades
-    
+
     def calculate_enhanced_metrics(self, trades: List[Dict]) -> List[Dict]:
         """Calculate enhanced smart money metrics with recency weighting"""
-        
-        # Group trades by address
-        address_data = defaultdict(lambda: {
-            'trades': [],
-            'total_volume': 0.0,
-            'recent_volume': 0.0,
-            'win_count': 0,
-            'recent_win_count': 0
-        })
-        
         current_time = datetime.now(timezone.utc).replace(tzinfo=None)
-        recent_cutoff = current_time - timedelta(hours=24)
-        
-        for trade in trades:
-            address = trade.get('address', '')
-            if not address:
-                continue
-                
-            trade_time = trade.get('timestamp')
-            if isinstance(trade_time, str):
-                try:
-                    trade_time = datetime.fromisoformat(trade_time.replace('Z', '+00:00'))
-                except (ValueError, AttributeError):
-                    trade_time = current_time
-            if isinstance(trade_time, datetime) and trade_time.tzinfo is not None:
-                trade_time = trade_time.astimezone(timezone.utc).replace(tzinfo=None)
-            
-            value = float(trade.get('value', 0))
-            is_win = trade.get('is_winning', False)
-            
-            address_data[address]['trades'].append(trade)
-            address_data[address]['total_volume'] += value
-            
-            if trade_time >= recent_cutoff:
-                address_data[address]['recent_volume'] += value
-                if is_win:
-                    address_data[address]['recent_win_count'] += 1
-            
-            if is_win:
-                address_data[address]['win_count'] += 1
-        
-        # Calculate enhanced metrics
-        enhanced_results = []
-        
-        for address, data in address_data.items():
-            total_trades = len(data['trades'])
-            if total_trades < self.min_trades_threshold:
-                continue
-                
-            if data['total_volume'] < self.min_volume_threshold:
-                continue
-            
-            total_win_rate = data['win_count'] / total_trades if total_trades > 0 else 0
-            
-            # Calculate recent performance
-            recent_trades = []
-            for t in data['trades']:
-                ts_value = t.get('timestamp', current_time.isoformat())
-                try:
-                    trade_ts = datetime.fromisoformat(ts_value.replace('Z', '+00:00'))
-                except Exception:
-                    trade_ts = current_time
-                if trade_ts.tzinfo is not None:
-                    trade_ts = trade_ts.astimezone(timezone.utc).replace(tzinfo=None)
-                if trade_ts >= recent_cutoff:
-                    recent_trades.append(t)
-            recent_trade_count = len(recent_trades)
-            
-            if recent_trade_count > 0:
-                recent_win_rate = data['recent_win_count'] / recent_trade_count
-            else:
-                recent_win_rate = total_win_rate
-            
-            # Combined score with recency weighting
-            combined_win_rate = (self.recency_weight * recent_win_rate + 
-                              (1 - self.recency_weight) * total_win_rate)
-            
-            # Volume consistency score
-            if data['recent_volume'] > 0 and data['total_volume'] > 0:
-                volume_consistency = min(data['recent_volume'] / data['total_volume'] * 5, 1.0)
-            else:
-                volume_consistency = 0.5
-            
-            # Final confidence score
-            confidence_score = combined_win_rate * volume_consistency
-            
-            enhanced_results.append({
-                'address': address,
-                'total_trades': total_trades,
-                'total_volume': data['total_volume'],
-                'recent_volume': data['recent_volume'],
-                'win_rate': total_win_rate,
-                'recent_win_rate': recent_win_rate,
-                'combined_win_rate': combined_win_rate,
-                'confidence_score': confidence_score,
-                'win_count': data['win_count'],
-                'recent_win_count': data['recent_win_count']
-            })
-        
-        # Sort by confidence score descending
-        enhanced_results.sort(key=lambda x: x['confidence_score'], reverse=True)
-        
-        return enhanced_results
-    
+        return self.metrics_from_columns(trade_columns(trades, current_time), current_time)
+
+    def metrics_from_columns(self, columns: TradeColumns, current_time: datetime) -> List[Dict]:
+        groups = len(columns.addresses)
+        if not groups:
+            return []
+        recent = columns.timestamp >= _micros(current_time - timedelta(hours=24))
+        recent_value = np.where(recent, columns.value, 0.0)
+
+        total_trades = np.bincount(columns.codes, minlength=groups)
+        total_volume = np.bincount(columns.codes, weights=columns.value, minlength=groups)
+        win_count = np.bincount(columns.codes, weights=columns.win, minlength=groups).astype(np.int64)
+        recent_trades = np.bincount(columns.codes, weights=recent, minlength=groups).astype(np.int64)
+        recent_volume = np.bincount(columns.codes, weights=recent_value, minlength=groups)
+        recent_win_count = np.bincount(
+            columns.codes, weights=recent & columns.win, minlength=groups
+        ).astype(np.int64)
+
+        keep = (total_trades >= self.min_trades_threshold) & (total_volume >= self.min_volume_threshold)
+        total_win_rate = win_count / np.maximum(total_trades, 1)
+        recent_win_rate = np.where(
+            recent_trades > 0, recent_win_count / np.maximum(recent_trades, 1), total_win_rate
+        )
+        combined_win_rate = (self.recency_weight * recent_win_rate +
+                             (1 - self.recency_weight) * total_win_rate)
+        has_volume = (recent_volume > 0) & (total_volume > 0)
+        volume_consistency = np.where(
+            has_volume,
+            np.minimum(recent_volume / np.where(has_volume, total_volume, 1.0) * 5, 1.0),
+            0.5
+        )
+        confidence_score = combined_win_rate * volume_consistency
+
+        # Stable, so ties keep first-seen address order.
+        selected = np.flatnonzero(keep)
+        order = selected[np.argsort(-confidence_score[selected], kind='stable')]
+        return [
+            {
+                'address': columns.addresses[code],
+                'total_trades': trades,
+                'total_volume': volume,
+                'recent_volume': recent_vol,
+                'win_rate': win_rate,
+                'recent_win_rate': recent_rate,
+                'combined_win_rate': combined,
+                'confidence_score': confidence,
+                'win_count': wins,
+                'recent_win_count': recent_wins
+            }
+            for code, trades, volume, recent_vol, win_rate, recent_rate, combined, confidence, wins, recent_wins in zip(
+                order.tolist(),
+                total_trades[order].tolist(),
+                total_volume[order].tolist(),
+                recent_volume[order].tolist(),
+                total_win_rate[order].tolist(),
+                recent_win_rate[order].tolist(),
+                combined_win_rate[order].tolist(),
+                confidence_score[order].tolist(),
+                win_count[order].tolist(),
+                recent_win_count[order].tolist()
+            )
+        ]
+
     def analyze_market_specific_performance(self, trades: List[Dict], market_tags: List[str] = None):
         """Analyze performance for specific market types"""
         if not trades:
             return []
-        
+
         # Filter by market tags if provided
         if market_tags:
             filtered_trades = [
-                t for t in trades 
+                t for t in trades
                 if any(tag in t.get('market_tags', []) for tag in market_tags)
             ]
         else:
             filtered_trades = trades
-        
+
         return self.calculate_enhanced_metrics(filtered_trades)
-    
+
     def get_performance_trend(self, address: str, trades: List[Dict]) -> Dict:
         """Get performance trend for a specific address"""
-        address_trades = [t for t in trades if t.get('address') == address]
-        if not address_trades:
-            return {}
-        
-        # Group by time periods
         current_time = datetime.now(timezone.utc).replace(tzinfo=None)
-        time_periods = {
-            '24h': current_time - timedelta(hours=24),
-            '7d': current_time - timedelta(days=7),
-            '30d': current_time - timedelta(days=30)
-        }
-        
-        trend_data = {}
-        
-        for period, cutoff in time_periods.items():
-            period_trades = []
-            for t in address_trades:
-                ts_value = t.get('timestamp', current_time.isoformat())
-                try:
-                    trade_ts = datetime.fromisoformat(ts_value.replace('Z', '+00:00'))
-                except Exception:
-                    trade_ts = current_time
-                if trade_ts.tzinfo is not None:
-                    trade_ts = trade_ts.astimezone(timezone.utc).replace(tzinfo=None)
-                if trade_ts >= cutoff:
-                    period_trades.append(t)
-            
-            if period_trades:
-                win_count = sum(1 for t in period_trades if t.get('is_winning', False))
-                total_volume = sum(float(t.get('value', 0)) for t in period_trades)
-                win_rate = win_count / len(period_trades) if period_trades else 0
-                
-                trend_data[period] = {
-                    'trades': len(period_trades),
-                    'win_rate': win_rate,
-                    'total_volume': total_volume,
-                    'win_count': win_count
-                }
-        
-        return trend_data
+        columns = trade_columns(trades, current_time, address=address)
+        if not columns.addresses:
+            return {}
+        return self.trends_from_columns(columns, current_time)[address]
+
+    def trends_from_columns(self, columns: TradeColumns, current_time: datetime) -> Dict[str, Dict]:
+        """24h / 7d / 30d trend for every address in ``columns``."""
+        cutoffs = [current_time - period for _, period in TREND_PERIODS]
+        counts, wins, volumes = window_totals(columns, cutoffs)
+        trends = {}
+        for address, trade_row, win_row, volume_row in zip(
+            columns.addresses, counts.tolist(), wins.tolist(), volumes.tolist()
+        ):
+            trend_data = {}
+            for (period, _), trades, win_count, total_volume in zip(TREND_PERIODS, trade_row, win_row, volume_row):
+                if trades:
+                    trend_data[period] = {
+                        'trades': trades,
+                        'win_rate': win_count / trades,
+                        'total_volume': total_volume,
+                        'win_count': int(win_count)
+                    }
+            trends[address] = trend_data
+        return trends
 
 # Global analyzer instance
 smart_money_analyzer = EnhancedSmartMoneyAnalyzer()
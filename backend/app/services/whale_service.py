@@ -1,11 +1,12 @@
 import os
 import requests
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from app.services.market_service import MarketService
+from app.http_client import http_get
 from datetime import datetime
-from app.database import save_whale_trade, get_leaderboard_stats
+from app.database import save_whale_trades, get_leaderboard_stats, WHALE_TRADE_CHUNK_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -64,6 +65,7 @@ class WhaleService:
         """
         Analyzes closed markets to identify winners and fetch their trades.
         """
+        whale_trades = []
         try:
             markets = self.market_service.fetch_closed_markets(limit=10)
             
@@ -90,11 +92,17 @@ class WhaleService:
                                         "maker_address": trade.get('proxyWallet') or trade.get('maker_address', ''),
                                         "market_slug": m.market_slug
                                     }
-                                    save_whale_trade(whale_trade)
+                                    whale_trades.append(whale_trade)
                             except Exception:
                                 continue
+                        # Buffered and flushed in bulk: one transaction per chunk, not per trade.
+                        if len(whale_trades) >= WHALE_TRADE_CHUNK_SIZE:
+                            save_whale_trades(whale_trades)
+                            whale_trades = []
         except Exception as e:
             logger.error(f"Error analyzing smart money: {e}")
+        finally:
+            save_whale_trades(whale_trades)
 
     def _fetch_trades_for_token(self, token_id: str, use_asset_param: bool = False) -> List[Dict]:
         try:
@@ -107,31 +115,7 @@ class WhaleService:
         return []
 
     def _request_get(self, url: str, params: Dict) -> requests.Response:
-        mode = os.getenv("POLYMARKET_PROXY_MODE", "auto").lower()
-        if mode == "proxy":
-            modes = [True]
-        elif mode == "direct":
-            modes = [False]
-        else:
-            modes = [True, False]
-        last_exc: Optional[Exception] = None
-        for use_proxy in modes:
-            try:
-                session = requests.Session()
-                session.trust_env = use_proxy
-                response = session.get(
-                    url,
-                    params=params,
-                    timeout=5,
-                    headers={"User-Agent": "Mozilla/5.0"}
-                )
-                response.raise_for_status()
-                return response
-            except Exception as e:
-                last_exc = e
-        if last_exc:
-            raise last_exc
-        raise RuntimeError("Request failed")
+        return http_get(url, params=params, timeout=5)
 
     def get_leaderboard(self, limit: int = 10) -> List[Dict]:
         """
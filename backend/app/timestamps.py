@@ -0,0 +1,128 @@
+"""
+Shared timestamp parsing for upstream trades and stored rows.
+
+Every value is normalised to a naive UTC ``datetime``.  A ``TimestampParser``
+sniffs the layout of the first value it sees (epoch number, epoch digit
+string, ISO with ``Z``, ISO with ``+00:00``, other ISO) and keeps using that
+layout's fast path until a value no longer fits, at which point it sniffs
+again.  Parsed values are memoised, so the many trades that share a second
+or a stored string are only parsed once per batch.
+"""
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+
+_EPOCH = datetime(1970, 1, 1)
+
+# A layout returns None when ``value`` isn't in its format; raising is
+# reserved for values that look right but are malformed.
+Layout = Callable[[Any], Optional[datetime]]
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _epoch_number(value) -> Optional[datetime]:
+    if value.__class__ is not int and value.__class__ is not float:
+        return None
+    return _EPOCH + timedelta(0, value)
+
+
+def _epoch_string(value) -> Optional[datetime]:
+    if value.__class__ is not str or not value.isdigit():
+        return None
+    return _EPOCH + timedelta(0, int(value))
+
+
+# Parsing a UTC suffix with fromisoformat builds an aware datetime that then
+# has to be converted; slicing it off and parsing naive is ~5x cheaper.
+def _iso_z(value) -> Optional[datetime]:
+    if value.__class__ is not str or not value.endswith("Z"):
+        return None
+    return datetime.fromisoformat(value[:-1])
+
+
+def _iso_utc(value) -> Optional[datetime]:
+    if value.__class__ is not str or not value.endswith("+00:00"):
+        return None
+    return datetime.fromisoformat(value[:-6])
+
+
+def _iso(value) -> Optional[datetime]:
+    # Leave values that have a faster layout to be re-sniffed.
+    if value.__class__ is not str or value.endswith(("Z", "+00:00")) or value.isdigit():
+        return None
+    return _naive_utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
+
+
+def sniff_layout(value) -> Optional[Layout]:
+    """The fast-path parser for ``value``'s layout, or None if unknown."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return _epoch_number
+    if not isinstance(value, str) or not value:
+        return None
+    if value.isdigit():
+        return _epoch_string
+    if value[-1] == "Z":
+        return _iso_z
+    if value.endswith("+00:00"):
+        return _iso_utc
+    return _iso
+
+
+class TimestampParser:
+    def __init__(self, memo_size: int = 8192):
+        self.memo_size = memo_size
+        self._layout: Optional[Layout] = None
+        self._memo: Dict[Any, datetime] = {}
+        self._lock = Lock()
+
+    def parse(self, value, default: Optional[datetime] = None) -> Optional[datetime]:
+        try:
+            parsed = self._memo.get(value)
+        except TypeError:
+            return default
+        if parsed is not None:
+            return parsed
+        if value is None or value == "":
+            return default
+        if isinstance(value, datetime):
+            return _naive_utc(value)
+        layout = self._layout
+        if layout is not None:
+            try:
+                parsed = layout(value)
+            except (ValueError, TypeError, OverflowError):
+                parsed = None
+        if parsed is None:
+            layout = sniff_layout(value)
+            if layout is None:
+                return default
+            try:
+                parsed = layout(value)
+            except (ValueError, TypeError, OverflowError):
+                return default
+            self._layout = layout
+        if len(self._memo) >= self.memo_size:
+            with self._lock:
+                self._memo.clear()
+        self._memo[value] = parsed
+        return parsed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memo.clear()
+            self._layout = None
+
+
+_default_parser = TimestampParser()
+
+
+def parse_timestamp(value, default: Optional[datetime] = None) -> Optional[datetime]:
+    """Parse with the process-wide parser; ``default`` when unparseable."""
+    return _default_parser.parse(value, default)
@@ -1,31 +1,85 @@
+import logging
 import os
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from app.engine import get_engine
 
-DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./polymarket.db")
-# Fix for Railway Postgres URL (postgres:// -> postgresql://)
-if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+logger = logging.getLogger(__name__)
+
+# Where these tables lived on SQLite before they moved into the shared
+# engine's store (DB_PATH).
+LEGACY_SQLITE_PATH = os.environ.get("LEGACY_SQLITE_PATH", "polymarket.db")
 
 
 class Base(DeclarativeBase):
     pass
 
 
-connect_args = {"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=connect_args
-)
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Bound per session, so sessions follow app.engine.configure().
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 
 def init_db():
-    from models import Market, Trade, Whale, SmartWallet
+    from models import Market, Trade, Whale, SmartWallet, TradeCursor, WalletStats
+    engine = get_engine()
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, indexes included.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    migrate_legacy_sqlite()
+
+
+def migrate_legacy_sqlite(path: str = None) -> int:
+    """
+    Copy the ORM tables out of the old separate SQLite file, once.
+
+    Runs only while none of these tables holds a row in the current store,
+    i.e. on the first start after the move; a legacy file found after that is
+    reported and left alone.  Returns the number of rows copied.
+    """
+    path = path or LEGACY_SQLITE_PATH
+    engine = get_engine()
+    if engine.dialect.name != "sqlite" or not os.path.exists(path):
+        return 0
+    target = engine.url.database
+    if target and os.path.abspath(target) == os.path.abspath(path):
+        return 0
+    tables = Base.metadata.sorted_tables
+    copied = 0
+    with engine.connect() as conn:
+        if any(conn.exec_driver_sql(f"SELECT 1 FROM {table.name} LIMIT 1").first() for table in tables):
+            logger.warning(
+                f"Legacy database {path} still exists but {target} already has market data; "
+                f"it was not migrated. Remove it once nothing in it is needed."
+            )
+            return 0
+        # ATTACH can't run inside a transaction.
+        conn.rollback()
+        conn.exec_driver_sql("ATTACH DATABASE ? AS legacy", (path,))
+        try:
+            for table in tables:
+                legacy_columns = {
+                    row[1] for row in conn.exec_driver_sql(f"PRAGMA legacy.table_info({table.name})")
+                }
+                # Older files predate some tables and columns.
+                columns = ", ".join(c.name for c in table.columns if c.name in legacy_columns)
+                if not columns:
+                    continue
+                result = conn.exec_driver_sql(
+                    f"INSERT INTO main.{table.name} ({columns}) SELECT {columns} FROM legacy.{table.name}"
+                )
+                copied += max(result.rowcount, 0)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.exec_driver_sql("DETACH DATABASE legacy")
+            conn.commit()
+    if copied:
+        logger.warning(f"Migrated {copied} rows from legacy database {path} into {target}; {path} can be removed")
+    return copied
 
 
 def get_session():
-    return SessionLocal()
+    return SessionLocal(bind=get_engine())
@@ -0,0 +1,397 @@
+"""
+Asyncio ingestion pipeline for the Polymarket refresh cycle.
+
+Markets, trades-by-market, per-token fallbacks and winning-token trades are
+all scheduled on one event loop.  The blocking fetchers in ``polymarket`` run
+on a dedicated executor, bounded by a global concurrency limit and a
+per-host semaphore, and every request is given its own deadline so a single
+slow upstream cannot stall the cycle.
+
+Trade pages are streamed: each raw record is normalized on the executor
+thread straight into a columnar ``TradeBatch`` as it is decoded, and batches
+are handed to the caller's sink once ``INGEST_BATCH_SIZE`` trades are
+pending rather than collected for the whole cycle.
+"""
+import os
+import json
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import polymarket
+from trade_batch import TradeBatch, TradeBatchBuilder
+
+logger = logging.getLogger(__name__)
+
+INGEST_CONCURRENCY = int(os.environ.get("INGEST_CONCURRENCY", "16"))
+INGEST_HOST_CONCURRENCY = int(os.environ.get("INGEST_HOST_CONCURRENCY", "8"))
+INGEST_REQUEST_DEADLINE_SECONDS = float(os.environ.get("INGEST_REQUEST_DEADLINE_SECONDS", "15"))
+INGEST_CURSOR_PAGE_SIZE = int(os.environ.get("INGEST_CURSOR_PAGE_SIZE", "50"))
+INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "500"))
+
+# High-water mark per market / token: (last seen trade timestamp, trade id).
+Cursor = Tuple[datetime, str]
+
+
+def _market_id(market: dict) -> str:
+    return (
+        market.get("id")
+        or market.get("conditionId")
+        or market.get("condition_id")
+        or market.get("slug")
+        or ""
+    )
+
+
+def _market_question(market: dict) -> str:
+    return market.get("question") or market.get("title") or ""
+
+
+def _market_tokens(market: dict) -> List[dict]:
+    tokens = market.get("tokens") or []
+    if tokens:
+        return tokens
+    clob_ids = market.get("clobTokenIds") or market.get("clobTokenIDs")
+    outcomes_raw = market.get("outcomes")
+    if isinstance(clob_ids, str):
+        try:
+            clob_ids = json.loads(clob_ids)
+        except Exception:
+            clob_ids = []
+    if isinstance(outcomes_raw, str):
+        try:
+            outcomes = json.loads(outcomes_raw)
+        except Exception:
+            outcomes = []
+    else:
+        outcomes = outcomes_raw or []
+    if isinstance(clob_ids, list) and clob_ids:
+        return [
+            {
+                "token_id": token_id,
+                "outcome": outcomes[idx] if idx < len(outcomes) else ""
+            }
+            for idx, token_id in enumerate(clob_ids)
+        ]
+    return []
+
+
+def _token_id(token: dict) -> str:
+    return token.get("token_id") or token.get("tokenId") or ""
+
+
+def market_cursor_key(market_id: str) -> str:
+    return f"market:{market_id}"
+
+
+def token_cursor_key(token_id: str) -> str:
+    return f"token:{token_id}"
+
+
+def _advance_cursor(trades: TradeBatch, cursor: Optional[Cursor]) -> Optional[Cursor]:
+    latest = trades.latest()
+    if latest and (cursor is None or latest[0] > cursor[0]):
+        return latest
+    return cursor
+
+
+def _drain_page(
+    fetch: Callable[..., Iterable[Dict]],
+    ident: str,
+    market: Dict,
+    cursor: Optional[Cursor],
+    **kwargs
+) -> Tuple[TradeBatch, int, bool]:
+    """
+    Normalize one streamed page of trades, stopping at the first trade at or
+    behind ``cursor``.  Returns ``(trades, records_read, caught_up)``.
+    """
+    records = fetch(ident, **kwargs)
+    builder = TradeBatchBuilder()
+    count = 0
+    try:
+        for raw in records:
+            count += 1
+            trade_id, timestamp = builder.append(market, raw)
+            if cursor is not None and (trade_id == cursor[1] or timestamp < cursor[0]):
+                builder.pop()
+                return builder.build(), count, True
+    finally:
+        close = getattr(records, "close", None)
+        if close:
+            close()
+    return builder.build(), count, False
+
+
+def _float_or_zero(value) -> float:
+    try:
+        return float(value or 0)
+    except Exception:
+        return 0.0
+
+
+def _synthetic_trade_from_market(market: dict) -> dict:
+    price = _float_or_zero(market.get("lastTradePrice"))
+    if price <= 0:
+        price = _float_or_zero(market.get("bestAsk"))
+    if price <= 0:
+        price = _float_or_zero(market.get("bestBid"))
+    volume = _float_or_zero(market.get("volume24hr"))
+    if volume <= 0:
+        volume = _float_or_zero(market.get("volume"))
+    if price <= 0 or volume <= 0:
+        return {}
+    timestamp = market.get("updatedAt") or market.get("createdAt") or market.get("startDate") or market.get("endDate")
+    return {
+        "price": price,
+        "size": volume / price if price else 0,
+        "timestamp": timestamp,
+        "maker_address": "market",
+        "side": "BUY"
+    }
+
+
+class IngestionResult:
+    def __init__(
+        self,
+        markets: List[Dict],
+        trades: TradeBatch,
+        winning_trades: TradeBatch,
+        cursors: Optional[Dict[str, Cursor]] = None,
+        markets_changed: bool = True
+    ):
+        self.markets = markets
+        self.trades = trades
+        self.winning_trades = winning_trades
+        # False when the active listing matched the previous cycle's response.
+        self.markets_changed = markets_changed
+        # Cursors that moved this cycle, keyed like the ``cursors`` input.
+        self.cursors = cursors or {}
+
+
+class IngestionEngine:
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        host_concurrency: Optional[int] = None,
+        deadline_seconds: Optional[float] = None,
+        page_size: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ):
+        self.concurrency = concurrency or INGEST_CONCURRENCY
+        self.host_concurrency = host_concurrency or INGEST_HOST_CONCURRENCY
+        self.deadline_seconds = deadline_seconds or INGEST_REQUEST_DEADLINE_SECONDS
+        self.page_size = page_size or INGEST_CURSOR_PAGE_SIZE
+        self.batch_size = batch_size or INGEST_BATCH_SIZE
+        self._sink: Optional[Callable[[TradeBatch], None]] = None
+        self._pending: List[TradeBatch] = []
+        self._pending_rows = 0
+        self._collected: List[TradeBatch] = []
+        self._cursors: Dict[str, Cursor] = {}
+        self._cursor_updates: Dict[str, Cursor] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._limit: Optional[asyncio.Semaphore] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.host_concurrency)
+            self._host_limits[host] = semaphore
+        return semaphore
+
+    async def _run(self, url: str, label: str, func, default):
+        loop = asyncio.get_running_loop()
+        async with self._limit, self._host_limit(url):
+            try:
+                return await asyncio.wait_for(loop.run_in_executor(self._executor, func), self.deadline_seconds)
+            except asyncio.TimeoutError:
+                logger.warning(f"Ingestion: {label} exceeded {self.deadline_seconds}s deadline")
+            except Exception as e:
+                logger.warning(f"Ingestion: {label} failed: {e}")
+        return default
+
+    async def _call(self, url: str, func, *args, **kwargs) -> List[Dict]:
+        return await self._run(url, f"{func.__name__}{args}", partial(func, *args, **kwargs), [])
+
+    async def _page(
+        self, fetch, ident: str, market: Dict, cursor: Optional[Cursor], **kwargs
+    ) -> Tuple[TradeBatch, int, bool, bool]:
+        """
+        ``_drain_page`` on the executor, plus whether it failed.  A failed
+        page reads as empty but must not be mistaken for the end of the data.
+        """
+        page = await self._run(
+            polymarket.TRADES_API,
+            f"{fetch.__name__}({ident!r})",
+            partial(_drain_page, fetch, ident, market, cursor, **kwargs),
+            None
+        )
+        if page is None:
+            return TradeBatch.empty(), 0, False, True
+        return page + (False,)
+
+    def _emit(self, trades: TradeBatch) -> None:
+        if not len(trades):
+            return
+        if self._sink is None:
+            self._collected.append(trades)
+            return
+        self._pending.append(trades)
+        self._pending_rows += len(trades)
+        if self._pending_rows >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._pending:
+            batch = TradeBatch.concat(self._pending)
+            self._pending = []
+            self._pending_rows = 0
+            self._sink(batch)
+
+    async def _token_trades(self, token_id: str, market: Dict, limit: int) -> TradeBatch:
+        trades, _, _, _ = await self._page(polymarket.iter_trades_for_token, token_id, market, None, limit=limit)
+        return trades
+
+    async def _new_trades(self, key: str, fetch, ident: str, market: Dict, limit: int) -> Tuple[TradeBatch, bool]:
+        """
+        Page newest-first through ``fetch`` until a trade at or behind the
+        cursor for ``key`` is reached.  Returns the unseen trades, normalized,
+        and whether upstream returned anything at all.
+
+        If a page fails the cursor stays put: the pages after it were never
+        read, so the next cycle has to page back through them.
+        """
+        cursor = self._cursors.get(key)
+        if cursor is None:
+            trades, count, _, failed = await self._page(fetch, ident, market, None, limit=limit)
+            updated = _advance_cursor(trades, None)
+            if updated and not failed:
+                self._cursor_updates[key] = updated
+            return trades, count > 0
+        pages: List[TradeBatch] = []
+        seen_any = False
+        offset = 0
+        while offset < limit:
+            size = min(self.page_size, limit - offset)
+            page, count, caught_up, failed = await self._page(fetch, ident, market, cursor, limit=size, offset=offset)
+            if failed:
+                break
+            seen_any = seen_any or count > 0
+            pages.append(page)
+            if caught_up or count < size:
+                break
+            offset += size
+        trades = TradeBatch.concat(pages)
+        if failed:
+            return trades, seen_any
+        updated = _advance_cursor(trades, cursor)
+        if updated != cursor:
+            self._cursor_updates[key] = updated
+        return trades, seen_any
+
+    async def _market_trades(self, market: Dict, limit: int) -> None:
+        market_id = _market_id(market)
+        if not market_id:
+            return
+        trades, seen_any = await self._new_trades(
+            market_cursor_key(market_id), polymarket.iter_trades_for_market, market_id, market, limit
+        )
+        if not seen_any:
+            token_ids = [t for t in (_token_id(token) for token in _market_tokens(market)) if t]
+            pages = await asyncio.gather(*(
+                self._new_trades(token_cursor_key(token_id), polymarket.iter_trades_for_token, token_id, market, limit)
+                for token_id in token_ids
+            ))
+            trades = TradeBatch.concat([page for page, _ in pages])
+            seen_any = any(page_seen for _, page_seen in pages)
+        if not seen_any:
+            synthetic = _synthetic_trade_from_market(market)
+            if synthetic:
+                builder = TradeBatchBuilder()
+                builder.append(market, synthetic)
+                trades = builder.build()
+        self._emit(trades)
+
+    async def _winning_trades(self, market_limit: int, trades_per_token: int) -> TradeBatch:
+        markets = await self._call(polymarket.GAMMA_API, polymarket.fetch_closed_markets, limit=market_limit)
+        jobs = []
+        for market in markets:
+            for token in _market_tokens(market):
+                token_id = _token_id(token)
+                if token.get("winner") is True and token_id:
+                    jobs.append(self._token_trades(token_id, market, trades_per_token))
+        pages = await asyncio.gather(*jobs)
+        return TradeBatch.concat(pages)
+
+    async def _active_trades(self, market_limit: int, trades_per_market: int):
+        listing = await self._call(polymarket.GAMMA_API, polymarket.fetch_markets_conditional, limit=market_limit)
+        markets, changed = listing or ([], False)
+        await asyncio.gather(*(self._market_trades(market, trades_per_market) for market in markets))
+        return markets, changed
+
+    async def run(
+        self,
+        market_limit: int = 25,
+        trades_per_market: int = 200,
+        winning_market_limit: int = 20,
+        winning_trades_per_token: int = 200,
+        cursors: Optional[Dict[str, Cursor]] = None,
+        sink: Optional[Callable[[TradeBatch], None]] = None
+    ) -> IngestionResult:
+        """
+        Run one fetch cycle.  With a ``sink``, active-market trades are
+        delivered to it in batches (on the event loop thread) and
+        ``IngestionResult.trades`` is left empty; without one they are
+        collected into the result.
+        """
+        self._sink = sink
+        self._pending = []
+        self._pending_rows = 0
+        self._collected = []
+        self._limit = asyncio.Semaphore(self.concurrency)
+        self._host_limits = {}
+        self._cursors = cursors or {}
+        self._cursor_updates = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="ingest")
+        try:
+            (markets, markets_changed), winning_trades = await asyncio.gather(
+                self._active_trades(market_limit, trades_per_market),
+                self._winning_trades(winning_market_limit, winning_trades_per_token)
+            )
+            self._flush()
+        finally:
+            # Requests that blew their deadline keep running until their own
+            # HTTP timeout; don't hold the refresh cycle hostage to them.
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        return IngestionResult(
+            markets=markets,
+            trades=TradeBatch.concat(self._collected),
+            winning_trades=winning_trades,
+            cursors=self._cursor_updates,
+            markets_changed=markets_changed
+        )
+
+
+def run_ingestion(
+    market_limit: int = 25,
+    trades_per_market: int = 200,
+    winning_market_limit: int = 20,
+    cursors: Optional[Dict[str, Cursor]] = None,
+    engine: Optional[IngestionEngine] = None,
+    sink: Optional[Callable[[TradeBatch], None]] = None
+) -> IngestionResult:
+    engine = engine or IngestionEngine()
+    return asyncio.run(engine.run(
+        market_limit=market_limit,
+        trades_per_market=trades_per_market,
+        winning_market_limit=winning_market_limit,
+        cursors=cursors,
+        sink=sink
+    ))
@@ -1,3 +1,4 @@
+import base64
 import logging
 import json
 import secrets
@@ -12,11 +13,10 @@ from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from apscheduler.schedulers.background import BackgroundScheduler
 from typing import List, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from sqlalchemy.dialects.sqlite import insert
-from sqlalchemy import func
+from sqlalchemy import and_, func, or_, text, tuple_
 
-from app.database import init_db, get_recent_alerts, create_user, get_user_by_email, get_db_connection, save_whale_trade
+from app.database import init_db, get_recent_alerts, create_user, get_user_by_email, get_db_connection, save_whale_trades
 from app.database import (
     upsert_subscription,
     get_latest_subscription,
@@ -25,7 +25,6 @@ from app.database import (
     get_latest_user_entitlement,
     get_entitlements_for_tier,
     get_transaction_user_id,
-    get_signals,
     get_signal_by_id,
     create_signal,
     upsert_signal_evaluation,
@@ -39,11 +38,9 @@ from app.database import (
     get_watchlist,
     add_to_watchlist,
     remove_from_watchlist,
-    get_daily_pulse,
     get_referral_code,
     insert_referral_code,
     redeem_referral_code,
-    get_feature_flags,
     get_metrics_counts,
     get_signal_stats,
     get_signal_credibility,
@@ -55,13 +52,26 @@ from app.services.auth_service import AuthService
 from app.services.market_service import MarketService
 from app.services.whale_service import WhaleService
 from app.services.fcm_service import FCMService
+from app import async_database as async_db
 from app.cache import cache
+from app.cache_warmer import (
+    CACHE_WARM_PAGES,
+    VERSIONED_CACHE_TTL_SECONDS,
+    data_changed,
+    data_version,
+    register as register_cache_warmer
+)
+from app.response_cache import body_response, cached_call, cached_call_async, render_body
+from app.engine import pool_status
+from app.migrations import applied_versions, explain_hot_queries
+from app.query_profiler import QUERY_PROFILE_FLUSH_SECONDS, SLOW_QUERY_THRESHOLD_MS, profiler as query_profiler
 from app.rate_limiter import rate_limiter
 from database import init_db as init_polymarket_db, get_session
-from models import Market, Trade, Whale, SmartWallet
-from polymarket import fetch_markets, fetch_trades_for_market, fetch_trades_for_token, fetch_closed_markets
-from whale import normalize_trade, detect_whales
-from smartmoney import update_smart_wallets
+from models import Market, Trade, Whale, SmartWallet, TradeCursor
+from ingestion import run_ingestion, _market_id, _market_question
+from polymarket import reset_listing_cache
+from trade_batch import TradeBatch, insert_trades, insert_whales, new_trades
+from smartmoney import add_wallet_trades, reconcile_wallet_stats, update_smart_wallets
 from app.schemas import (
     UserRegister,
     UserLogin,
@@ -108,7 +118,7 @@ logger = logging.getLogger(__name__)
 
 # Performance monitoring
 import time
-from prometheus_client import Counter, Histogram, generate_latest
+from prometheus_client import Counter, Gauge, Histogram, generate_latest
 from prometheus_client.exposition import CONTENT_TYPE_LATEST
 
 # Metrics definitions
@@ -116,6 +126,8 @@ REQUEST_COUNT = Counter('http_requests_total', 'Total HTTP Requests', ['method',
 REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'HTTP request latency', ['endpoint'])
 DB_QUERY_TIME = Histogram('db_query_duration_seconds', 'Database query duration', ['query_type'])
 REDIS_OPERATION_TIME = Histogram('redis_operation_duration_seconds', 'Redis operation duration', ['operation'])
+TRADES_INGESTED = Counter('polymarket_trades_ingested_total', 'Trades written by the refresh cycle', ['result'])
+TRADES_LAST_CYCLE = Gauge('polymarket_trades_last_cycle', 'Trades written by the most recent refresh cycle', ['result'])
 
 # Performance monitoring middleware
 async def performance_middleware(request: Request, call_next):
@@ -148,13 +160,17 @@ async def performance_middleware(request: Request, call_next):
 def _cache_key(prefix: str, parts: List[str]) -> str:
     return "api_cache:" + prefix + ":" + ":".join(parts)
 
+def _versioned_cache_key(dataset: str, parts: List[str]) -> str:
+    """``_cache_key`` under ``dataset``'s current data version."""
+    return _cache_key(dataset, [f"v{data_version(dataset)}"] + parts)
+
 def _cached_response(key: str, ttl_seconds: int, builder):
-    cached = cache.get(key)
-    if cached is not None:
-        return cached
-    data = builder()
-    cache.set(key, data, ttl_seconds=ttl_seconds)
-    return data
+    return cached_call(key, ttl_seconds, builder)
+
+def _invalidate_signal_caches():
+    """Drop cached signal pages and stats on every worker after a new signal."""
+    for prefix in ("signals", "signals_stats"):
+        cache.clear_pattern(_cache_key(prefix, ["*"]))
 
 def _utcnow():
     return datetime.now(timezone.utc).replace(tzinfo=None)
@@ -169,6 +185,60 @@ def _sanitize_pagination(limit: int, offset: int, max_limit: int = 200) -> tuple
     safe_offset = 0 if offset < 0 else offset
     return safe_limit, safe_offset
 
+# Keyset pagination.  List endpoints accept an opaque ``cursor`` next to
+# ``offset`` and return the cursor for the following page in X-Next-Cursor.
+# A cursor holds the source it was read from plus the last row's sort key and
+# unique tiebreak, so the next page is an index seek however deep it is.
+def _encode_cursor(source: str, key, tiebreak) -> str:
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    payload = json.dumps([source, key, tiebreak], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, sources: tuple) -> tuple:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        source, key, tiebreak = json.loads(payload)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if source not in sources or key is None or tiebreak is None:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return source, key, tiebreak
+
+def _cursor_key(value, kind):
+    try:
+        return datetime.fromisoformat(value) if kind is datetime else kind(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _page(items: list, rows: list, limit: int, cursor_for) -> dict:
+    # A short page is the last one.
+    next_cursor = cursor_for(rows[-1]) if rows and len(rows) >= limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+# Cached bodies are stored rendered, under keys of their own so entries in
+# the older object format are never read as bodies.
+def _cached_body_response(request: Optional[Request], key: str, ttl_seconds: int, builder, model=None) -> Response:
+    """``builder()``'s result as a cached, pre-rendered JSON response."""
+    rendered = cached_call(key + ":body", ttl_seconds, lambda: render_body(builder(), model))
+    return body_response(request, rendered)
+
+async def _cached_body_response_async(request: Optional[Request], key: str, ttl_seconds: int, builder, model=None) -> Response:
+    """``_cached_body_response`` for async endpoints; ``builder`` is awaited."""
+    async def render():
+        return render_body(await builder(), model)
+    rendered = await cached_call_async(key + ":body", ttl_seconds, render)
+    return body_response(request, rendered)
+
+async def _paged_response(request: Optional[Request], key: str, ttl_seconds: int, builder, model=None) -> Response:
+    """A cached ``_page`` as a pre-rendered JSON list; the next cursor goes in X-Next-Cursor."""
+    async def render():
+        page = await builder()
+        headers = {"X-Next-Cursor": page["next_cursor"]} if page.get("next_cursor") else {}
+        return render_body(page["items"], model, headers)
+    rendered = await cached_call_async(key + ":body", ttl_seconds, render)
+    return body_response(request, rendered)
+
 # Initialize Services
 auth_service = AuthService()
 market_service = MarketService()
@@ -232,87 +302,14 @@ def update_whale_data():
     logger.info("Scheduler: Fetching whale activity...")
     try:
         whales = whale_service.fetch_whale_activity()
-        for whale in whales:
-            try:
-                save_whale_trade(whale)
-            except Exception:
-                continue
-        logger.info("Scheduler: Whale activity updated.")
+        saved = save_whale_trades(whales)
+        logger.info(f"Scheduler: Whale activity updated ({saved} new of {len(whales)}).")
+        if saved:
+            data_changed("whales", "smart")
     except Exception as e:
         logger.error(f"Scheduler Error (Whale): {e}")
 
 
-def _market_id(market: dict) -> str:
-    return (
-        market.get("id")
-        or market.get("conditionId")
-        or market.get("condition_id")
-        or market.get("slug")
-        or ""
-    )
-
-
-def _market_question(market: dict) -> str:
-    return market.get("question") or market.get("title") or ""
-
-
-def _market_tokens(market: dict) -> List[dict]:
-    tokens = market.get("tokens") or []
-    if tokens:
-        return tokens
-    clob_ids = market.get("clobTokenIds") or market.get("clobTokenIDs")
-    outcomes_raw = market.get("outcomes")
-    if isinstance(clob_ids, str):
-        try:
-            clob_ids = json.loads(clob_ids)
-        except Exception:
-            clob_ids = []
-    if isinstance(outcomes_raw, str):
-        try:
-            outcomes = json.loads(outcomes_raw)
-        except Exception:
-            outcomes = []
-    else:
-        outcomes = outcomes_raw or []
-    if isinstance(clob_ids, list) and clob_ids:
-        return [
-            {
-                "token_id": token_id,
-                "outcome": outcomes[idx] if idx < len(outcomes) else ""
-            }
-            for idx, token_id in enumerate(clob_ids)
-        ]
-    return []
-
-
-def _float_or_zero(value) -> float:
-    try:
-        return float(value or 0)
-    except Exception:
-        return 0.0
-
-
-def _synthetic_trade_from_market(market: dict) -> dict:
-    price = _float_or_zero(market.get("lastTradePrice"))
-    if price <= 0:
-        price = _float_or_zero(market.get("bestAsk"))
-    if price <= 0:
-        price = _float_or_zero(market.get("bestBid"))
-    volume = _float_or_zero(market.get("volume24hr"))
-    if volume <= 0:
-        volume = _float_or_zero(market.get("volume"))
-    if price <= 0 or volume <= 0:
-        return {}
-    timestamp = market.get("updatedAt") or market.get("createdAt") or market.get("startDate") or market.get("endDate")
-    return {
-        "price": price,
-        "size": volume / price if price else 0,
-        "timestamp": timestamp,
-        "maker_address": "market",
-        "side": "BUY"
-    }
-
-
 def _normalize_market(market: dict) -> dict:
     market_id = _market_id(market)
     if not market_id:
@@ -325,44 +322,70 @@ def _normalize_market(market: dict) -> dict:
     }
 
 
-def _fetch_market_trades(market: dict, limit: int) -> List[dict]:
-    market_id = _market_id(market)
-    if not market_id:
-        return []
-    trades = fetch_trades_for_market(market_id, limit=limit)
-    if not trades:
-        for token in _market_tokens(market):
-            token_id = token.get("token_id") or token.get("tokenId")
-            if not token_id:
-                continue
-            trades.extend(fetch_trades_for_token(token_id, limit=limit))
-    if not trades:
-        synthetic = _synthetic_trade_from_market(market)
-        if synthetic:
-            trades = [synthetic]
-    return [normalize_trade(market, trade) for trade in trades]
-
-
-def _fetch_winning_trades(limit: int = 20) -> List[dict]:
-    markets = fetch_closed_markets(limit=limit)
-    winning_trades = []
-    for market in markets:
-        tokens = _market_tokens(market)
-        winning_tokens = [t for t in tokens if t.get("winner") is True]
-        for token in winning_tokens:
-            token_id = token.get("token_id") or token.get("tokenId")
-            if not token_id:
-                continue
-            trades = fetch_trades_for_token(token_id, limit=200)
-            winning_trades.extend([normalize_trade(market, trade) for trade in trades])
-    return winning_trades
+def _load_trade_cursors(session) -> dict:
+    return {
+        row.key: (row.last_timestamp, row.last_trade_id)
+        for row in session.query(TradeCursor).all()
+    }
+
+
+def _save_trade_cursors(session, cursors: dict) -> None:
+    if not cursors:
+        return
+    now = _utcnow()
+    rows = [
+        {"key": key, "last_timestamp": timestamp, "last_trade_id": trade_id, "updated_at": now}
+        for key, (timestamp, trade_id) in cursors.items()
+    ]
+    stmt = insert(TradeCursor).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TradeCursor.key],
+        set_={
+            "last_timestamp": stmt.excluded.last_timestamp,
+            "last_trade_id": stmt.excluded.last_trade_id,
+            "updated_at": stmt.excluded.updated_at
+        }
+    )
+    session.execute(stmt)
+
+
+def _record_trade_counts(fetched: int, inserted: int) -> None:
+    duplicates = max(fetched - inserted, 0)
+    TRADES_INGESTED.labels(result="new").inc(inserted)
+    TRADES_INGESTED.labels(result="duplicate").inc(duplicates)
+    TRADES_LAST_CYCLE.labels(result="new").set(inserted)
+    TRADES_LAST_CYCLE.labels(result="duplicate").set(duplicates)
+    logger.info(f"Scheduler: Polymarket refresh stored {inserted} new trades ({duplicates} duplicates)")
 
 
 def refresh_polymarket_data(market_limit: int = 25, trades_per_market: int = 200):
     session = get_session()
+    counts = {"fetched": 0, "inserted": 0}
+    changed_wallets = set()
+
+    def store_trades(batch: TradeBatch) -> None:
+        # Each batch commits on its own so the write lock isn't held for the
+        # whole fetch.  Inserts are idempotent and cursors are only saved
+        # after every batch landed, so a failed cycle just refetches.
+        # Wallet counters only take the trades that weren't stored yet.
+        fresh = new_trades(session, batch)
+        counts["inserted"] += insert_trades(session, fresh)
+        counts["fetched"] += len(batch)
+        changed_wallets.update(add_wallet_trades(session, fresh))
+        insert_whales(session, batch, min_value=1000)
+        session.commit()
+
     try:
-        markets_raw = fetch_markets(limit=market_limit)
-        markets = [m for m in (_normalize_market(m) for m in markets_raw) if m]
+        ingested = run_ingestion(
+            market_limit=market_limit,
+            trades_per_market=trades_per_market,
+            cursors=_load_trade_cursors(session),
+            sink=store_trades
+        )
+        # An unchanged listing was already normalized and upserted last cycle.
+        markets = []
+        if ingested.markets_changed:
+            markets = [m for m in (_normalize_market(m) for m in ingested.markets) if m]
         if markets:
             stmt = insert(Market).values(markets)
             stmt = stmt.on_conflict_do_update(
@@ -375,34 +398,39 @@ def refresh_polymarket_data(market_limit: int = 25, trades_per_market: int = 200
             )
             session.execute(stmt)
 
-        trades = []
-        with ThreadPoolExecutor(max_workers=8) as executor:
-            futures = [
-                executor.submit(_fetch_market_trades, market, trades_per_market)
-                for market in markets_raw
-            ]
-            for future in as_completed(futures):
-                trades.extend(future.result())
-
-        if trades:
-            trade_stmt = insert(Trade).values(trades)
-            trade_stmt = trade_stmt.on_conflict_do_nothing(index_elements=[Trade.id])
-            session.execute(trade_stmt)
-
-        whales = detect_whales(trades, min_value=1000)
-        if whales:
-            whale_stmt = insert(Whale).values(whales)
-            whale_stmt = whale_stmt.on_conflict_do_nothing(index_elements=[Whale.trade_id])
-            session.execute(whale_stmt)
-
-        winning_trades = _fetch_winning_trades(limit=20)
-        update_smart_wallets(session, winning_trades)
+        _save_trade_cursors(session, ingested.cursors)
+        update_smart_wallets(session, ingested.winning_trades, changed=changed_wallets)
         session.commit()
+        _record_trade_counts(counts["fetched"], counts["inserted"])
     except Exception as e:
         session.rollback()
+        # The listing validators were saved when it was fetched; keeping
+        # them would make the next cycle skip the upsert that just rolled back.
+        reset_listing_cache()
         logger.error(f"Scheduler Error (Polymarket): {e}")
     finally:
         session.close()
+    # Batches that committed before a failure still changed the lists.
+    if counts["inserted"] or changed_wallets:
+        data_changed("trades", "whales", "smart")
+
+def analyze_smart_money():
+    whale_service.analyze_smart_money()
+    data_changed("whales", "smart")
+
+def reconcile_smart_wallets():
+    session = get_session()
+    try:
+        repaired = reconcile_wallet_stats(session)
+        session.commit()
+        if repaired:
+            logger.warning(f"Scheduler: wallet stats reconciliation repaired {repaired} addresses")
+            data_changed("smart")
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Scheduler Error (wallet stats): {e}")
+    finally:
+        session.close()
 
 def expire_trials():
     conn = get_db_connection()
@@ -643,18 +671,22 @@ async def lifespan(app: FastAPI):
     if not disable_scheduler:
         scheduler = BackgroundScheduler()
         scheduler.add_job(update_whale_data, 'interval', minutes=2)
-        scheduler.add_job(whale_service.analyze_smart_money, 'interval', hours=6)
+        scheduler.add_job(analyze_smart_money, 'interval', hours=6)
         scheduler.add_job(refresh_polymarket_data, 'interval', minutes=1)
+        reconcile_hours = float(os.environ.get("WALLET_STATS_RECONCILE_HOURS") or "6")
+        scheduler.add_job(reconcile_smart_wallets, 'interval', hours=reconcile_hours)
         scheduler.add_job(expire_trials, 'interval', hours=24)
         scheduler.add_job(process_notification_queue, 'interval', seconds=5)
         scheduler.add_job(check_system_alerts, 'interval', seconds=60)
+        scheduler.add_job(query_profiler.flush, 'interval', seconds=QUERY_PROFILE_FLUSH_SECONDS)
         auto_interval = int(os.environ.get("AUTO_SIGNAL_BROADCAST_INTERVAL_SECONDS") or "0")
         if auto_interval > 0:
             scheduler.add_job(generate_demo_signal_and_broadcast, 'interval', seconds=auto_interval)
         scheduler.start()
         scheduler.add_job(update_whale_data)
-        scheduler.add_job(whale_service.analyze_smart_money) 
+        scheduler.add_job(analyze_smart_money)
         scheduler.add_job(refresh_polymarket_data)
+        scheduler.add_job(reconcile_smart_wallets)
         scheduler.add_job(expire_trials)
         scheduler.add_job(process_notification_queue)
         scheduler.add_job(check_system_alerts)
@@ -667,6 +699,8 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down...")
     if scheduler:
         scheduler.shutdown()
+    query_profiler.flush()
+    await async_db.close()
 
 app = FastAPI(title="PolyPulse API", lifespan=lifespan)
 
@@ -681,7 +715,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["Authorization", "Content-Type", "X-Requested-With", "X-Request-ID"],
-    expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "X-Request-ID", "X-Response-Time-ms", "Server-Timing"],
+    expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "X-Request-ID", "X-Response-Time-ms", "Server-Timing", "X-Next-Cursor"],
     max_age=600,  # 10分钟
 )
 
@@ -770,7 +804,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = get_user_by_email(payload.get("sub"))
+    user = await async_db.get_user_by_email(payload.get("sub"))
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
@@ -781,7 +815,7 @@ async def get_optional_user(token: str = Depends(oauth2_scheme_optional)):
     payload = auth_service.decode_token(token)
     if not payload:
         return None
-    user = get_user_by_email(payload.get("sub"))
+    user = await async_db.get_user_by_email(payload.get("sub"))
     return user
 
 # --- Endpoints ---
@@ -829,7 +863,12 @@ def _build_entitlements_response(tier: str, user_id: Optional[int] = None) -> En
     )
 
 def _resolve_tier_for_user(user_id: int) -> str:
-    entitlement = get_latest_user_entitlement(user_id)
+    return _tier_from_entitlement(get_latest_user_entitlement(user_id))
+
+async def _resolve_tier_for_user_async(user_id: int) -> str:
+    return _tier_from_entitlement(await async_db.get_latest_user_entitlement(user_id))
+
+def _tier_from_entitlement(entitlement: Optional[dict]) -> str:
     if not entitlement:
         return "free"
     try:
@@ -964,6 +1003,7 @@ def generate_demo_signal_and_broadcast() -> dict:
     content = "Top moves and whale activity. Unlock for details."
     tier_required = "pro"
     signal_id = create_signal(title, content, tier_required)
+    _invalidate_signal_caches()
     save_analytics_event(None, "signal_generated", json.dumps({"signalId": signal_id, "tier": tier_required}))
     broadcast = _broadcast_signal_to_users(signal_id)
     return {"status": "created", "signalId": signal_id, "broadcast": broadcast}
@@ -1018,8 +1058,8 @@ def get_alerts(current_user: dict = Depends(get_current_user)):
     return get_recent_alerts()
 
 @app.get("/api/alerts")
-def api_get_alerts():
-    return get_recent_alerts()
+async def api_get_alerts():
+    return await async_db.get_recent_alerts()
 
 @app.get("/watchlist")
 def watchlist_get(current_user: dict = Depends(get_current_user)):
@@ -1047,51 +1087,84 @@ def get_leaderboard(current_user: dict = Depends(get_current_user)):
 
 
 @app.get("/api/whales")
-def api_get_whales(limit: int = 50, offset: int = 0, sort: str = "latest"):
+async def api_get_whales(
+    request: Request,
+    limit: int = 50,
+    offset: int = 0,
+    sort: str = "latest",
+    cursor: Optional[str] = None
+):
     limit, offset = _sanitize_pagination(limit, offset, 200)
-    cache_key = _cache_key("whales", [str(limit), str(offset), sort])
+    sort = "value" if sort == "value" else "latest"
+    column = "value_usd" if sort == "value" else "timestamp"
+    sqlite_source, orm_source = f"whale_trades:{sort}", f"whales:{sort}"
+    after = None
+    if cursor:
+        source, key, tiebreak = _decode_cursor(cursor, (sqlite_source, orm_source))
+        if source == sqlite_source:
+            key, tiebreak = _cursor_key(key, float if sort == "value" else int), _cursor_key(tiebreak, int)
+        else:
+            key, tiebreak = _cursor_key(key, float if sort == "value" else datetime), _cursor_key(tiebreak, str)
+        after = (source, key, tiebreak)
+        offset = 0
+    cache_key = _versioned_cache_key("whales", [str(limit), str(offset), sort, cursor or ""])
     def build():
-        conn = get_db_connection()
-        try:
-            cursor = conn.cursor()
-            order_by = "value_usd DESC" if sort == "value" else "timestamp DESC"
-            cursor.execute(
-                f"""
-                SELECT id, timestamp, maker_address, market_question, outcome, side, size, price, value_usd, market_slug
-                FROM whale_trades
-                ORDER BY {order_by}
-                LIMIT ? OFFSET ?
-                """,
-                (limit, offset)
-            )
-            rows = cursor.fetchall()
-            if rows:
-                return [
-                    {
-                        "trade_id": f"sqlite-{row['id']}",
-                        "market_question": row["market_question"],
-                        "outcome": row["outcome"],
-                        "side": row["side"],
-                        "price": row["price"],
-                        "size": row["size"],
-                        "value_usd": row["value_usd"],
-                        "timestamp": datetime.fromtimestamp(row["timestamp"], timezone.utc).replace(tzinfo=None).isoformat(),
-                        "maker_address": row["maker_address"],
-                        "market_slug": row["market_slug"]
-                    }
-                    for row in rows
-                ]
-        finally:
-            conn.close()
+        # whale_trades and the ORM whale tables live in the same store; one
+        # session reads whichever the page comes from.
         session = get_session()
         try:
+            if after is None or after[0] == sqlite_source:
+                if after:
+                    rows = session.execute(
+                        text(
+                            f"""
+                            SELECT id, timestamp, maker_address, market_question, outcome, side, size, price, value_usd, market_slug
+                            FROM whale_trades
+                            WHERE ({column}, id) < (:key, :tiebreak)
+                            ORDER BY {column} DESC, id DESC
+                            LIMIT :limit
+                            """
+                        ),
+                        {"key": after[1], "tiebreak": after[2], "limit": limit}
+                    ).mappings().all()
+                else:
+                    rows = session.execute(
+                        text(
+                            f"""
+                            SELECT id, timestamp, maker_address, market_question, outcome, side, size, price, value_usd, market_slug
+                            FROM whale_trades
+                            ORDER BY {column} DESC, id DESC
+                            LIMIT :limit OFFSET :offset
+                            """
+                        ),
+                        {"limit": limit, "offset": offset}
+                    ).mappings().all()
+                if rows or after:
+                    items = [
+                        {
+                            "trade_id": f"sqlite-{row['id']}",
+                            "market_question": row["market_question"],
+                            "outcome": row["outcome"],
+                            "side": row["side"],
+                            "price": row["price"],
+                            "size": row["size"],
+                            "value_usd": row["value_usd"],
+                            "timestamp": datetime.fromtimestamp(row["timestamp"], timezone.utc).replace(tzinfo=None).isoformat(),
+                            "maker_address": row["maker_address"],
+                            "market_slug": row["market_slug"]
+                        }
+                        for row in rows
+                    ]
+                    return _page(items, rows, limit, lambda row: _encode_cursor(sqlite_source, row[column], row["id"]))
+            key_column = Whale.value if sort == "value" else Whale.timestamp
             query = session.query(Whale, Trade).join(Trade, Whale.trade_id == Trade.id)
-            if sort == "value":
-                query = query.order_by(Whale.value.desc())
-            else:
-                query = query.order_by(Whale.timestamp.desc())
-            rows = query.offset(offset).limit(limit).all()
-            return [
+            if after:
+                query = query.filter(tuple_(key_column, Whale.trade_id) < (after[1], after[2]))
+            query = query.order_by(key_column.desc(), Whale.trade_id.desc())
+            if not after:
+                query = query.offset(offset)
+            rows = query.limit(limit).all()
+            items = [
                 {
                     "trade_id": whale.trade_id,
                     "market_question": trade.question,
@@ -1106,26 +1179,40 @@ def api_get_whales(limit: int = 50, offset: int = 0, sort: str = "latest"):
                 }
                 for whale, trade in rows
             ]
+            return _page(items, rows, limit, lambda row: _encode_cursor(
+                orm_source, row[0].value if sort == "value" else row[0].timestamp, row[0].trade_id
+            ))
         finally:
             session.close()
-    return _cached_response(cache_key, 10, build)
+    return await _paged_response(request, cache_key, VERSIONED_CACHE_TTL_SECONDS, lambda: async_db.run_sync(build))
 
 
 @app.get("/api/whales/leaderboard")
-def api_whale_leaderboard(limit: int = 50, offset: int = 0):
+async def api_whale_leaderboard(request: Request, limit: int = 50, offset: int = 0, cursor: Optional[str] = None):
     limit, offset = _sanitize_pagination(limit, offset, 200)
-    return api_get_whales(limit=limit, offset=offset, sort="value")
+    return await api_get_whales(request, limit=limit, offset=offset, sort="value", cursor=cursor)
 
 
 @app.get("/api/trades")
-def api_get_trades(limit: int = 100, offset: int = 0):
+async def api_get_trades(request: Request, limit: int = 100, offset: int = 0, cursor: Optional[str] = None):
     limit, offset = _sanitize_pagination(limit, offset, 200)
-    cache_key = _cache_key("trades", [str(limit), str(offset)])
+    after = None
+    if cursor:
+        _, key, tiebreak = _decode_cursor(cursor, ("trades",))
+        after = (_cursor_key(key, datetime), _cursor_key(tiebreak, str))
+        offset = 0
+    cache_key = _versioned_cache_key("trades", [str(limit), str(offset), cursor or ""])
     def build():
         session = get_session()
         try:
-            rows = session.query(Trade).order_by(Trade.timestamp.desc()).offset(offset).limit(limit).all()
-            return [
+            query = session.query(Trade)
+            if after:
+                query = query.filter(tuple_(Trade.timestamp, Trade.id) < after)
+            query = query.order_by(Trade.timestamp.desc(), Trade.id.desc())
+            if not after:
+                query = query.offset(offset)
+            rows = query.limit(limit).all()
+            items = [
                 {
                     "id": trade.id,
                     "market_question": trade.question,
@@ -1139,32 +1226,40 @@ def api_get_trades(limit: int = 100, offset: int = 0):
                 }
                 for trade in rows
             ]
+            return _page(items, rows, limit, lambda trade: _encode_cursor("trades", trade.timestamp, trade.id))
         finally:
             session.close()
-    return _cached_response(cache_key, 10, build)
+    return await _paged_response(request, cache_key, VERSIONED_CACHE_TTL_SECONDS, lambda: async_db.run_sync(build))
 
 
 @app.get("/signals", response_model=List[SignalResponse])
-def get_signals_api(
+async def get_signals_api(
+    request: Request,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_optional_user)
 ):
     limit, offset = _sanitize_pagination(limit, offset, 200)
+    before = None
+    if cursor:
+        _, key, tiebreak = _decode_cursor(cursor, ("signals",))
+        before = (_cursor_key(key, str), _cursor_key(tiebreak, int))
+        offset = 0
     tier = "free"
     if current_user:
-        tier = _resolve_tier_for_user(current_user["id"])
-    cache_key = _cache_key("signals", [tier, str(limit), str(offset)])
-    def build():
-        rows = get_signals(limit=limit, offset=offset)
-        response = []
+        tier = await _resolve_tier_for_user_async(current_user["id"])
+    cache_key = _cache_key("signals", [tier, str(limit), str(offset), cursor or ""])
+    async def build():
+        rows = await async_db.get_signals(limit=limit, offset=offset, before=before)
+        items = []
         for row in rows:
             required = row["tier_required"]
             locked = _is_signal_locked(required, tier)
             evidence_payload = None
             if row["evidence_json"]:
                 evidence_payload = SignalEvidence(**json.loads(row["evidence_json"])).model_dump()
-            response.append(
+            items.append(
                 {
                     "id": row["id"],
                     "title": row["title"],
@@ -1175,11 +1270,11 @@ def get_signals_api(
                     "evidence": evidence_payload
                 }
             )
-        return response
-    return _cached_response(cache_key, 15, build)
+        return _page(items, rows, limit, lambda row: _encode_cursor("signals", row["created_at"], row["id"]))
+    return await _paged_response(request, cache_key, 15, build, List[SignalResponse])
 
 @app.get("/signals/stats", response_model=SignalStatsResponse)
-def get_signal_stats_api():
+def get_signal_stats_api(request: Request):
     cache_key = _cache_key("signals_stats", ["7"])
     def build():
         stats = get_signal_stats()
@@ -1187,10 +1282,10 @@ def get_signal_stats_api():
             signals7d=stats["signals_7d"],
             evidence7d=stats["evidence_7d"]
         ).model_dump()
-    return _cached_response(cache_key, 30, build)
+    return _cached_body_response(request, cache_key, 30, build, SignalStatsResponse)
 
 @app.get("/insights/credibility", response_model=SignalCredibilityResponse)
-def get_signal_credibility_api():
+def get_signal_credibility_api(request: Request):
     cache_key = _cache_key("insights_credibility", ["7", "30"])
     def build():
         w7 = get_signal_credibility(7)
@@ -1236,10 +1331,10 @@ def get_signal_credibility_api():
             )
         )
         return payload.model_dump()
-    return _cached_response(cache_key, 60, build)
+    return _cached_body_response(request, cache_key, 60, build, SignalCredibilityResponse)
 
 @app.get("/insights/delivery", response_model=DeliveryObservabilityResponse)
-def get_delivery_observability_api():
+def get_delivery_observability_api(request: Request):
     cache_key = _cache_key("insights_delivery", ["1", "7"])
     def build():
         w1 = get_delivery_observability(1)
@@ -1295,7 +1390,39 @@ def get_delivery_observability_api():
             redisOldestDueSeconds=oldest_due_seconds
         )
         return payload.model_dump()
-    return _cached_response(cache_key, 30, build)
+    return _cached_body_response(request, cache_key, 30, build, DeliveryObservabilityResponse)
+
+@app.get("/debug/queries")
+def debug_queries(
+    request: Request,
+    limit: int = 50,
+    min_avg_ms: float = 0.0,
+    x_admin_key: Optional[str] = Header(default=None, alias="X-Admin-Key")
+):
+    """Per-fingerprint query timings gathered by this process."""
+    _require_admin(request, x_admin_key)
+    limit, _ = _sanitize_pagination(limit, 0, 500)
+    return {
+        "since": datetime.fromtimestamp(query_profiler.started_at, timezone.utc).replace(tzinfo=None).isoformat(),
+        "slow_threshold_ms": SLOW_QUERY_THRESHOLD_MS,
+        "queries": query_profiler.snapshot(limit=limit, min_avg_ms=min_avg_ms)
+    }
+
+
+@app.get("/admin/db/indexes")
+def admin_db_indexes(
+    request: Request,
+    x_admin_key: Optional[str] = Header(default=None, alias="X-Admin-Key")
+):
+    """Applied schema migrations and EXPLAIN plans for the hot-path queries."""
+    _require_admin(request, x_admin_key)
+    conn = get_db_connection()
+    try:
+        versions = sorted(applied_versions(conn.cursor()))
+        return {"migrations": versions, "queries": explain_hot_queries(conn)}
+    finally:
+        conn.close()
+
 
 @app.post("/admin/signals/{signal_id}/evaluation")
 def admin_upsert_signal_evaluation(
@@ -1317,25 +1444,25 @@ def admin_upsert_signal_evaluation(
 
 
 @app.get("/signals/{signal_id}", response_model=SignalResponse)
-def get_signal_detail(
+async def get_signal_detail(
     signal_id: int,
     requireUnlocked: bool = False,
     current_user: dict = Depends(get_optional_user)
 ):
-    row = get_signal_by_id(signal_id)
+    row = await async_db.get_signal_by_id(signal_id)
     if not row:
         raise HTTPException(status_code=404, detail="Signal not found")
     tier = "free"
     user_id = None
     if current_user:
         user_id = current_user["id"]
-        tier = _resolve_tier_for_user(user_id)
+        tier = await _resolve_tier_for_user_async(user_id)
     required = row["tier_required"]
     locked = _is_signal_locked(required, tier)
     if locked and requireUnlocked:
         raise HTTPException(status_code=402, detail="Payment required")
     properties = json.dumps({"signalId": signal_id, "locked": locked})
-    save_analytics_event(user_id, "signal_view", properties)
+    await async_db.run_sync(save_analytics_event, user_id, "signal_view", properties)
     evidence = None
     if row["evidence_json"]:
         evidence = SignalEvidence(**json.loads(row["evidence_json"]))
@@ -1456,6 +1583,7 @@ def admin_create_signal(
 ):
     _require_admin(request, x_admin_key)
     signal_id = create_signal(payload.title, payload.content, payload.tierRequired)
+    _invalidate_signal_caches()
     result = {"status": "created", "signalId": signal_id}
     if payload.broadcast:
         result["broadcast"] = admin_broadcast_signal(signal_id, request, x_admin_key)
@@ -1493,18 +1621,22 @@ def track_event(
 
 
 @app.get("/daily-pulse", response_model=List[DailyPulseResponse])
-def get_daily_pulse_api(limit: int = 20, offset: int = 0):
-    rows = get_daily_pulse(limit=limit, offset=offset)
-    return [
-        DailyPulseResponse(
-            id=row["id"],
-            title=row["title"],
-            summary=row["summary"],
-            content=row["content"],
-            createdAt=row["created_at"]
-        )
-        for row in rows
-    ]
+async def get_daily_pulse_api(request: Request, limit: int = 20, offset: int = 0):
+    limit, offset = _sanitize_pagination(limit, offset, 200)
+    cache_key = _cache_key("daily_pulse", [str(limit), str(offset)])
+    async def build():
+        rows = await async_db.get_daily_pulse(limit=limit, offset=offset)
+        return [
+            DailyPulseResponse(
+                id=row["id"],
+                title=row["title"],
+                summary=row["summary"],
+                content=row["content"],
+                createdAt=row["created_at"]
+            ).model_dump()
+            for row in rows
+        ]
+    return await _cached_body_response_async(request, cache_key, 60, build, List[DailyPulseResponse])
 
 
 @app.get("/referral/code", response_model=ReferralCodeResponse)
@@ -1536,11 +1668,11 @@ def redeem_referral_code_api(
 
 
 @app.get("/feature-flags", response_model=List[FeatureFlagResponse])
-def feature_flags(current_user: dict = Depends(get_optional_user)):
+async def feature_flags(current_user: dict = Depends(get_optional_user)):
     tier = "free"
     if current_user:
-        tier = _resolve_tier_for_user(current_user["id"])
-    rows = get_feature_flags(tier)
+        tier = await _resolve_tier_for_user_async(current_user["id"])
+    rows = await async_db.get_feature_flags(tier)
     return [
         FeatureFlagResponse(key=row["feature_key"], enabled=bool(row["enabled"]))
         for row in rows
@@ -1556,20 +1688,34 @@ def metrics():
 
 
 @app.get("/api/smart")
-def api_get_smart_wallets(limit: int = 50, offset: int = 0):
+async def api_get_smart_wallets(request: Request, limit: int = 50, offset: int = 0, cursor: Optional[str] = None):
     limit, offset = _sanitize_pagination(limit, offset, 200)
-    cache_key = _cache_key("smart", [str(limit), str(offset)])
+    after = None
+    if cursor:
+        source, key, tiebreak = _decode_cursor(cursor, ("smart_wallets", "whale_leaderboard", "whales"))
+        after = (source, _cursor_key(key, float), _cursor_key(tiebreak, str))
+        offset = 0
+    cache_key = _versioned_cache_key("smart", [str(limit), str(offset), cursor or ""])
     def build():
+        source = after[0] if after else None
+        # Every fallback reads the same store, so one session serves the chain.
         session = get_session()
         try:
-            rows = session.query(SmartWallet).order_by(SmartWallet.profit.desc()).offset(offset).limit(limit).all()
-            if rows:
-                has_signal = any(
+            if source in (None, "smart_wallets"):
+                query = session.query(SmartWallet)
+                if after:
+                    query = query.filter(tuple_(SmartWallet.profit, SmartWallet.address) < (after[1], after[2]))
+                query = query.order_by(SmartWallet.profit.desc(), SmartWallet.address.desc())
+                if not after:
+                    query = query.offset(offset)
+                rows = query.limit(limit).all()
+                # Once paging through smart wallets, stay on them.
+                has_signal = bool(after) or any(
                     (wallet.profit or 0) != 0 or (wallet.roi or 0) != 0 or (wallet.win_rate or 0) != 0
                     for wallet in rows
                 )
                 if has_signal:
-                    return [
+                    items = [
                         {
                             "address": wallet.address,
                             "profit": wallet.profit,
@@ -1579,60 +1725,71 @@ def api_get_smart_wallets(limit: int = 50, offset: int = 0):
                         }
                         for wallet in rows
                     ]
-        finally:
-            session.close()
-        conn = get_db_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT maker_address as address,
-                       SUM(value_usd) as total_value,
-                       SUM(CASE WHEN side = 'BUY' THEN value_usd ELSE 0 END) as buy_value,
-                       SUM(CASE WHEN side = 'SELL' THEN value_usd ELSE 0 END) as sell_value,
-                       COUNT(*) as total_trades
-                FROM whale_trades
-                GROUP BY maker_address
-                ORDER BY total_value DESC
-                LIMIT ? OFFSET ?
-                """,
-                (limit, offset)
-            )
-            rows = cursor.fetchall()
-            if rows:
-                return [
-                    {
-                        "address": row["address"],
-                        "profit": row["total_value"],
-                        "roi": (
-                            (row["buy_value"] - row["sell_value"]) / row["total_value"]
-                            if row["total_value"] else 0.0
+                    return _page(items, rows, limit, lambda wallet: _encode_cursor(
+                        "smart_wallets", wallet.profit, wallet.address
+                    ))
+            if source in (None, "whale_leaderboard"):
+                if after:
+                    rows = session.execute(
+                        text(
+                            """
+                            SELECT maker_address, total_volume, buy_volume, sell_volume, trade_count
+                            FROM whale_leaderboard
+                            WHERE (total_volume, maker_address) < (:key, :tiebreak)
+                            ORDER BY total_volume DESC, maker_address DESC
+                            LIMIT :limit
+                            """
                         ),
-                        "win_rate": (
-                            row["buy_value"] / row["total_value"]
-                            if row["total_value"] else 0.0
+                        {"key": after[1], "tiebreak": after[2], "limit": limit}
+                    ).mappings().all()
+                else:
+                    rows = session.execute(
+                        text(
+                            """
+                            SELECT maker_address, total_volume, buy_volume, sell_volume, trade_count
+                            FROM whale_leaderboard
+                            ORDER BY total_volume DESC, maker_address DESC
+                            LIMIT :limit OFFSET :offset
+                            """
                         ),
-                        "total_trades": row["total_trades"]
-                    }
-                    for row in rows
-                ]
-        finally:
-            conn.close()
-        session = get_session()
-        try:
-            whale_rows = (
-                session.query(
-                    Whale.address.label("address"),
-                    func.sum(Whale.value).label("total_value"),
-                    func.count(Whale.trade_id).label("total_trades")
-                )
-                .group_by(Whale.address)
-                .order_by(func.sum(Whale.value).desc())
-                .offset(offset)
-                .limit(limit)
-                .all()
-            )
-            return [
+                        {"limit": limit, "offset": offset}
+                    ).mappings().all()
+                if rows or after:
+                    items = [
+                        {
+                            "address": row["maker_address"],
+                            "profit": row["total_volume"],
+                            "roi": (
+                                (row["buy_volume"] - row["sell_volume"]) / row["total_volume"]
+                                if row["total_volume"] else 0.0
+                            ),
+                            "win_rate": (
+                                row["buy_volume"] / row["total_volume"]
+                                if row["total_volume"] else 0.0
+                            ),
+                            "total_trades": row["trade_count"]
+                        }
+                        for row in rows
+                    ]
+                    return _page(items, rows, limit, lambda row: _encode_cursor(
+                        "whale_leaderboard", row["total_volume"], row["maker_address"]
+                    ))
+            total_value = func.sum(Whale.value)
+            query = session.query(
+                Whale.address.label("address"),
+                total_value.label("total_value"),
+                func.count(Whale.trade_id).label("total_trades")
+            ).group_by(Whale.address)
+            if after:
+                query = query.having(or_(
+                    total_value < after[1],
+                    and_(total_value == after[1], Whale.address < after[2])
+                ))
+            query = query.order_by(total_value.desc(), Whale.address.desc())
+            if not after:
+                query = query.offset(offset)
+            whale_rows = query.limit(limit).all()
+            items = [
                 {
                     "address": row.address,
                     "profit": row.total_value,
@@ -1642,9 +1799,30 @@ def api_get_smart_wallets(limit: int = 50, offset: int = 0):
                 }
                 for row in whale_rows
             ]
+            return _page(items, whale_rows, limit, lambda row: _encode_cursor("whales", row.total_value, row.address))
         finally:
             session.close()
-    return _cached_response(cache_key, 15, build)
+    return await _paged_response(request, cache_key, VERSIONED_CACHE_TTL_SECONDS, lambda: async_db.run_sync(build))
+
+
+# The first pages of each list, at the page sizes the clients request, are
+# rebuilt whenever ingestion changes their data.
+async def _warm_whales():
+    for sort in ("latest", "value"):
+        for page in range(CACHE_WARM_PAGES):
+            await api_get_whales(None, limit=50, offset=page * 50, sort=sort, cursor=None)
+
+async def _warm_trades():
+    for page in range(CACHE_WARM_PAGES):
+        await api_get_trades(None, limit=100, offset=page * 100, cursor=None)
+
+async def _warm_smart():
+    for page in range(CACHE_WARM_PAGES):
+        await api_get_smart_wallets(None, limit=50, offset=page * 50, cursor=None)
+
+register_cache_warmer("whales", _warm_whales)
+register_cache_warmer("trades", _warm_trades)
+register_cache_warmer("smart", _warm_smart)
 
 
 @app.post("/api/refresh")
@@ -1819,8 +1997,24 @@ def performance_dashboard():
             "http_requests_total",
             "http_request_duration_seconds", 
             "db_query_duration_seconds",
-            "redis_operation_duration_seconds"
-        ]
+            "redis_operation_duration_seconds",
+            "polymarket_http_pool_checkouts_total",
+            "polymarket_http_handshakes_total",
+            "polymarket_trades_ingested_total",
+            "polymarket_trades_last_cycle",
+            "polymarket_listing_responses_total",
+            "db_pool_checkout_wait_seconds",
+            "db_pool_checkout_timeouts_total",
+            "db_pool_connections_in_use",
+            "db_pool_connections_open",
+            "db_pool_connections_created_total",
+            "db_pool_connections_closed_total",
+            "cache_hits_total",
+            "cache_misses_total",
+            "cache_evictions_total"
+        ],
+        "db_pools": pool_status(),
+        "local_cache": {"entries": len(cache.local), "bytes": cache.local.bytes} if cache.local is not None else None
     }
 
 
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Index, Text
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -31,6 +31,9 @@ class Trade(Base):
     timestamp = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=_utcnow)
 
+    # Keyset pagination: (sort key, unique tiebreak), newest / largest first.
+    __table_args__ = (Index("ix_trades_timestamp_id", timestamp.desc(), id.desc()),)
+
 
 class Whale(Base):
     __tablename__ = "whales"
@@ -44,6 +47,11 @@ class Whale(Base):
 
     trade = relationship("Trade")
 
+    __table_args__ = (
+        Index("ix_whales_timestamp_trade", timestamp.desc(), trade_id.desc()),
+        Index("ix_whales_value_trade", value.desc(), trade_id.desc()),
+    )
+
 
 class SmartWallet(Base):
     __tablename__ = "smart_wallets"
@@ -55,3 +63,26 @@ class SmartWallet(Base):
     win_rate = Column(Float, nullable=False)
     total_trades = Column(Integer, nullable=False)
     updated_at = Column(DateTime, default=_utcnow)
+
+    __table_args__ = (Index("ix_smart_wallets_profit_address", profit.desc(), address.desc()),)
+
+
+class TradeCursor(Base):
+    __tablename__ = "trade_cursors"
+
+    key = Column(String, primary_key=True)
+    last_timestamp = Column(DateTime, nullable=False)
+    last_trade_id = Column(String, nullable=False)
+    updated_at = Column(DateTime, default=_utcnow, onupdate=_utcnow)
+
+
+class WalletStats(Base):
+    __tablename__ = "wallet_stats"
+
+    address = Column(String, primary_key=True)
+    total_trades = Column(Integer, nullable=False, default=0)
+    total_value = Column(Float, nullable=False, default=0)
+    # Snapshot of the latest cycle's winning trades, as used for profit.
+    win_trades = Column(Integer, nullable=False, default=0)
+    win_value = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime, default=_utcnow, onupdate=_utcnow)
@@ -1,12 +1,22 @@
 import os
+import json
+import codecs
+import hashlib
 import requests
-from typing import Dict, List, Optional
+from json.decoder import WHITESPACE
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime, timezone
 from database import get_session
+from app.http_client import http_get
 from models import Market as DbMarket, Trade as DbTrade
+from prometheus_client import Counter
 
-GAMMA_API = "https://gamma-api.polymarket.com"
-TRADES_API = "https://data-api.polymarket.com/trades"
+GAMMA_API = os.environ.get("POLYMARKET_GAMMA_API", "https://gamma-api.polymarket.com")
+TRADES_API = os.environ.get("POLYMARKET_TRADES_API", "https://data-api.polymarket.com/trades")
+STREAM_CHUNK_SIZE = int(os.environ.get("POLYMARKET_STREAM_CHUNK_SIZE", str(64 * 1024)))
+# Rest of a body worth reading to keep its connection, when a stream stops early.
+STREAM_DRAIN_MAX_BYTES = int(os.environ.get("POLYMARKET_STREAM_DRAIN_MAX_BYTES", str(64 * 1024)))
 
 MOCK_MARKETS = [
     {
@@ -42,37 +52,30 @@ MOCK_MARKETS = [
 ]
 
 
-def _request_get(url: str, params: Optional[Dict] = None) -> requests.Response:
-    mode = os.getenv("POLYMARKET_PROXY_MODE", "auto").lower()
-    if mode == "proxy":
-        modes = [True]
-    elif mode == "direct":
-        modes = [False]
-    else:
-        modes = [True, False]
-    last_exc: Optional[Exception] = None
-    for use_proxy in modes:
-        try:
-            session = requests.Session()
-            session.trust_env = use_proxy
-            response = session.get(
-                url,
-                params=params or {},
-                timeout=10,
-                headers={"User-Agent": "Mozilla/5.0"}
-            )
-            response.raise_for_status()
-            return response
-        except Exception as e:
-            last_exc = e
-    if last_exc:
-        raise last_exc
-    raise RuntimeError("Request failed")
+LISTING_RESPONSES = Counter(
+    'polymarket_listing_responses_total',
+    'Gamma market listing responses by freshness',
+    ['result']
+)
 
+# Validators and parsed body of the last listing response, per URL + params.
+_listing_cache: Dict[Tuple, Dict] = {}
+_listing_cache_lock = Lock()
 
-def _get_json(url: str, params: Optional[Dict] = None) -> List[Dict]:
-    response = _request_get(url, params=params)
-    data = response.json()
+
+_decoder = json.JSONDecoder()
+
+
+def _request_get(
+    url: str,
+    params: Optional[Dict] = None,
+    headers: Optional[Dict] = None,
+    stream: bool = False
+) -> requests.Response:
+    return http_get(url, params=params, timeout=10, headers=headers, stream=stream)
+
+
+def _unwrap(data) -> List[Dict]:
     if isinstance(data, dict) and "data" in data:
         return data["data"] or []
     if isinstance(data, list):
@@ -80,6 +83,129 @@ def _get_json(url: str, params: Optional[Dict] = None) -> List[Dict]:
     return []
 
 
+def _iter_json_array(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """
+    Decode a JSON body chunk by chunk, yielding the elements of a top-level
+    array as soon as each one is complete.  Only the undecoded tail of the
+    stream is buffered.  Bodies that are not a bare array (``{"data": [...]}``)
+    are read whole and unwrapped as usual.
+    """
+    chunks = iter(chunks)
+    text = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    started = False
+    for chunk in chunks:
+        buf += text.decode(chunk)
+        pos = WHITESPACE.match(buf, 0).end()
+        if not started:
+            if pos == len(buf):
+                continue
+            if buf[pos] != "[":
+                rest = buf + "".join(text.decode(c) for c in chunks) + text.decode(b"", final=True)
+                yield from _unwrap(json.loads(rest))
+                return
+            started = True
+            pos = WHITESPACE.match(buf, pos + 1).end()
+        while pos < len(buf):
+            if buf[pos] == "]":
+                return
+            if buf[pos] == ",":
+                pos = WHITESPACE.match(buf, pos + 1).end()
+                continue
+            try:
+                item, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Element straddles the chunk boundary; wait for more bytes.
+                break
+            if end == len(buf) and not isinstance(item, (dict, list, str)):
+                # A number cut at the boundary decodes too ("12" of "125");
+                # only trust a scalar once a delimiter follows it.
+                break
+            yield item
+            pos = WHITESPACE.match(buf, end).end()
+        buf = buf[pos:]
+    if not started and not buf.strip():
+        return
+    raise ValueError("Truncated JSON array in response body")
+
+
+def _release(response: requests.Response) -> None:
+    """
+    Hand the connection back to the pool once the body is read to its end,
+    reading at most ``STREAM_DRAIN_MAX_BYTES`` more of it.  A longer remainder
+    (the caller reached its cursor early in a big page) drops the connection
+    instead.
+    """
+    remaining = STREAM_DRAIN_MAX_BYTES
+    try:
+        while remaining >= 0:
+            chunk = response.raw.read(min(STREAM_CHUNK_SIZE, remaining + 1), decode_content=True)
+            if not chunk:
+                response.raw.release_conn()
+                return
+            remaining -= len(chunk)
+    except Exception:
+        pass
+    response.close()
+
+
+def _iter_json(url: str, params: Optional[Dict] = None) -> Iterator[Dict]:
+    response = _request_get(url, params=params, stream=True)
+    try:
+        yield from _iter_json_array(response.iter_content(STREAM_CHUNK_SIZE))
+    finally:
+        _release(response)
+
+
+def _get_json(url: str, params: Optional[Dict] = None) -> List[Dict]:
+    return list(_iter_json(url, params=params))
+
+
+def _get_json_conditional(url: str, params: Optional[Dict] = None) -> Tuple[List[Dict], bool]:
+    """
+    Like ``_get_json`` but revalidates against the last response for the same
+    request.  Returns ``(data, changed)``; ``changed`` is False on a 304 or
+    when the body hashes to the same digest as last time, in which case the
+    previously parsed data is returned without decoding the body again.
+
+    The validators are kept as soon as the response arrives; a caller whose
+    processing of changed data fails must ``reset_listing_cache`` so the next
+    call reports it as changed again.
+    """
+    key = (url, tuple(sorted((params or {}).items())))
+    with _listing_cache_lock:
+        entry = _listing_cache.get(key)
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    response = _request_get(url, params=params, headers=headers or None)
+    if entry and response.status_code == 304:
+        LISTING_RESPONSES.labels(result="not_modified").inc()
+        return entry["data"], False
+    digest = hashlib.sha256(response.content).hexdigest()
+    if entry and entry["digest"] == digest:
+        LISTING_RESPONSES.labels(result="unchanged").inc()
+        return entry["data"], False
+    data = _unwrap(response.json())
+    with _listing_cache_lock:
+        _listing_cache[key] = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "digest": digest,
+            "data": data
+        }
+    LISTING_RESPONSES.labels(result="modified").inc()
+    return data, True
+
+
+def reset_listing_cache() -> None:
+    with _listing_cache_lock:
+        _listing_cache.clear()
+
+
 def _cached_markets(limit: int) -> List[Dict]:
     session = get_session()
     try:
@@ -104,13 +230,14 @@ def _cached_markets(limit: int) -> List[Dict]:
         session.close()
 
 
-def _cached_trades_by_market(market_id: str, limit: int) -> List[Dict]:
+def _cached_trades_by_market(market_id: str, limit: int, offset: int = 0) -> List[Dict]:
     session = get_session()
     try:
         rows = (
             session.query(DbTrade)
             .filter(DbTrade.market == market_id)
             .order_by(DbTrade.timestamp.desc())
+            .offset(offset)
             .limit(limit)
             .all()
         )
@@ -135,7 +262,9 @@ def _mock_markets(limit: int) -> List[Dict]:
     return MOCK_MARKETS[:limit]
 
 
-def _mock_trades(limit: int, market_id: str, token_id: Optional[str] = None) -> List[Dict]:
+def _mock_trades(limit: int, market_id: str, token_id: Optional[str] = None, offset: int = 0) -> List[Dict]:
+    if offset:
+        return []
     now = datetime.now(timezone.utc).replace(tzinfo=None)
     base_price = 0.6 if token_id and token_id.endswith("yes") else 0.4
     trades = []
@@ -151,15 +280,19 @@ def _mock_trades(limit: int, market_id: str, token_id: Optional[str] = None) ->
     return trades
 
 
-def fetch_markets(limit: int = 50) -> List[Dict]:
+def fetch_markets_conditional(limit: int = 50) -> Tuple[List[Dict], bool]:
+    """
+    Active market listing plus whether it changed since the previous call.
+    Listings served from the local database are never reported as changed.
+    """
     mode = os.getenv("POLYMARKET_DATA_MODE", "live").lower()
     cache_fallback = os.getenv("POLYMARKET_CACHE_FALLBACK", "1") == "1"
     if mode == "mock":
-        return _mock_markets(limit)
+        return _mock_markets(limit), True
     if mode == "cache":
-        return _cached_markets(limit)
+        return _cached_markets(limit), False
     try:
-        return _get_json(
+        return _get_json_conditional(
             f"{GAMMA_API}/markets",
             params={
                 "limit": limit,
@@ -169,7 +302,11 @@ def fetch_markets(limit: int = 50) -> List[Dict]:
             }
         )
     except Exception:
-        return _cached_markets(limit) if cache_fallback else []
+        return (_cached_markets(limit) if cache_fallback else []), False
+
+
+def fetch_markets(limit: int = 50) -> List[Dict]:
+    return fetch_markets_conditional(limit)[0]
 
 
 def fetch_closed_markets(limit: int = 20) -> List[Dict]:
@@ -180,7 +317,7 @@ def fetch_closed_markets(limit: int = 20) -> List[Dict]:
     if mode == "cache":
         return _cached_markets(limit)
     try:
-        return _get_json(
+        data, _ = _get_json_conditional(
             f"{GAMMA_API}/markets",
             params={
                 "limit": limit,
@@ -189,37 +326,65 @@ def fetch_closed_markets(limit: int = 20) -> List[Dict]:
                 "order": "volume"
             }
         )
+        return data
     except Exception:
         return _cached_markets(limit) if cache_fallback else []
 
 
-def fetch_trades_for_market(market_id: str, limit: int = 200) -> List[Dict]:
+def _trade_params(key: str, value: str, limit: int, offset: int) -> Dict:
+    params = {key: value, "limit": limit}
+    if offset:
+        params["offset"] = offset
+    return params
+
+
+def _iter_with_fallback(url: str, params: Dict, fallback: Callable[[], List[Dict]]) -> Iterator[Dict]:
+    produced = False
+    try:
+        for record in _iter_json(url, params=params):
+            produced = True
+            yield record
+    except Exception:
+        # Records already handed out can't be retracted.  A stream cut off
+        # after them must not read as a short page, or callers would move
+        # their cursor past the trades never received.
+        if produced:
+            raise
+        yield from fallback()
+
+
+def iter_trades_for_market(market_id: str, limit: int = 200, offset: int = 0) -> Iterator[Dict]:
+    """Stream raw trade records for a market, newest first."""
     mode = os.getenv("POLYMARKET_DATA_MODE", "live").lower()
     cache_fallback = os.getenv("POLYMARKET_CACHE_FALLBACK", "1") == "1"
     if mode == "mock":
-        return _mock_trades(limit, market_id)
+        return iter(_mock_trades(limit, market_id, offset=offset))
     if mode == "cache":
-        return _cached_trades_by_market(market_id, limit)
-    try:
-        return _get_json(
-            TRADES_API,
-            params={"market": market_id, "limit": limit}
-        )
-    except Exception:
-        return _cached_trades_by_market(market_id, limit) if cache_fallback else []
+        return iter(_cached_trades_by_market(market_id, limit, offset))
+    return _iter_with_fallback(
+        TRADES_API,
+        _trade_params("market", market_id, limit, offset),
+        lambda: _cached_trades_by_market(market_id, limit, offset) if cache_fallback else []
+    )
 
 
-def fetch_trades_for_token(token_id: str, limit: int = 200) -> List[Dict]:
+def iter_trades_for_token(token_id: str, limit: int = 200, offset: int = 0) -> Iterator[Dict]:
+    """Stream raw trade records for an outcome token, newest first."""
     mode = os.getenv("POLYMARKET_DATA_MODE", "live").lower()
-    cache_fallback = os.getenv("POLYMARKET_CACHE_FALLBACK", "1") == "1"
     if mode == "mock":
-        return _mock_trades(limit, token_id, token_id=token_id)
+        return iter(_mock_trades(limit, token_id, token_id=token_id, offset=offset))
     if mode == "cache":
-        return []
-    try:
-        return _get_json(
-            TRADES_API,
-            params={"asset": token_id, "limit": limit}
-        )
-    except Exception:
-        return [] if not cache_fallback else []
+        return iter([])
+    return _iter_with_fallback(
+        TRADES_API,
+        _trade_params("asset", token_id, limit, offset),
+        lambda: []
+    )
+
+
+def fetch_trades_for_market(market_id: str, limit: int = 200, offset: int = 0) -> List[Dict]:
+    return list(iter_trades_for_market(market_id, limit, offset))
+
+
+def fetch_trades_for_token(token_id: str, limit: int = 200, offset: int = 0) -> List[Dict]:
+    return list(iter_trades_for_token(token_id, limit, offset))
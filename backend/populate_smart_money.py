@@ -6,7 +6,7 @@ from datetime import datetime
 # Add current directory to path so we can import app
 sys.path.append(os.getcwd())
 
-from app.database import save_whale_trade
+from app.database import save_whale_trades
 
 WINNER_TOKENS = [
     {"id": "63091090051089570059675982328375731315493169331993358528823242988118415010764", "question": "NBA: Mavericks vs. 76ers", "outcome": "Mavericks", "slug": "nba-mavericks-vs-76ers"},
@@ -29,7 +29,7 @@ def check_trades(token_id, market_question, outcome, market_slug):
         trades = r.json()
         print(f"Fetching trades for {market_question} ({outcome})... found {len(trades)}")
         
-        count = 0
+        records = []
         for t in trades:
             try:
                 size = float(t.get('size', 0))
@@ -49,11 +49,11 @@ def check_trades(token_id, market_question, outcome, market_slug):
                         "maker_address": t.get('proxyWallet') or t.get('maker_address', 'Unknown'),
                         "market_slug": market_slug
                     }
-                    save_whale_trade(trade_record)
-                    count += 1
+                    records.append(trade_record)
             except Exception as e:
                 continue
                 
+        count = save_whale_trades(records)
         print(f"  Saved {count} trades to DB")
             
     except Exception as e:
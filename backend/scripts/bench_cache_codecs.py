@@ -0,0 +1,108 @@
+"""
+Benchmark the Redis cache codecs on the payloads the API actually caches.
+
+Every installed codec x compression pair (see ``app.cache.CODECS`` and
+``COMPRESSORS``) encodes and decodes three ``TieredCache`` envelopes:
+
+* ``whale-rows``: an uncached-body list entry, 200 whale trade dicts.
+* ``credibility``: the credibility insight, two windows with histograms.
+* ``signals-body``: a rendered ``/signals`` page (``render_body`` output),
+  i.e. one large JSON string plus its ETag.
+
+Compression only applies from ``--min-bytes`` up, as in production.  No
+Redis is needed; this times ``Serializer.dumps``/``loads`` alone.
+
+Usage (from backend/):
+    python -m scripts.bench_cache_codecs --rounds 2000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.cache import CACHE_COMPRESS_MIN_BYTES, CODECS, COMPRESSORS, Serializer
+from app.response_cache import render_body
+
+
+def _envelope(value) -> dict:
+    return {"value": value, "fresh_until": 1700000000.25, "build_seconds": 0.0123}
+
+
+def _payloads() -> dict:
+    rng = random.Random(1)
+    whales = [
+        {
+            "timestamp": 1700000000 + idx,
+            "maker_address": f"0x{rng.getrandbits(160):040x}",
+            "market_question": f"Will market {idx % 17} resolve YES by the end of the quarter?",
+            "outcome": rng.choice(["Yes", "No"]),
+            "side": rng.choice(["BUY", "SELL"]),
+            "size": round(rng.uniform(1000, 200000), 2),
+            "price": round(rng.random(), 4),
+            "value_usd": round(rng.uniform(10000, 500000), 2),
+            "market_slug": f"market-{idx % 17}",
+        }
+        for idx in range(200)
+    ]
+
+    def window(days: int) -> dict:
+        return {
+            "windowDays": days,
+            "signals": rng.randint(50, 500),
+            "hitRate": round(rng.random(), 4),
+            "avgLatencySeconds": round(rng.uniform(1, 90), 3),
+            "latencyHistogram": [{"bucket": b, "count": rng.randint(0, 300)} for b in ("<1m", "1-5m", "5-15m", ">15m")],
+            "leadHistogram": [{"bucket": b, "count": rng.randint(0, 300)} for b in ("<0", "0-1h", "1-6h", ">6h")],
+        }
+
+    signals = [
+        {
+            "id": idx,
+            "title": f"Smart money piling into market {idx}",
+            "content": "Three tracked wallets bought YES within ten minutes. " * 4,
+            "tier_required": rng.choice(["free", "pro"]),
+            "created_at": f"2025-06-{1 + idx % 28:02d}T12:00:00",
+        }
+        for idx in range(50)
+    ]
+    return {
+        "whale-rows": _envelope(whales),
+        "credibility": _envelope({"window7d": window(7), "window30d": window(30), "generatedAt": "2025-06-01T00:00:00"}),
+        "signals-body": _envelope(render_body(signals, headers={"X-Next-Cursor": "MjAyNS0wNi0wMQ"})),
+    }
+
+
+def _time(fn, arg, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--min-bytes", type=int, default=CACHE_COMPRESS_MIN_BYTES)
+    args = parser.parse_args()
+
+    payloads = _payloads()
+    print(f"codecs: {', '.join(sorted(CODECS))}; compression: {', '.join(sorted(COMPRESSORS))}")
+    for name, payload in payloads.items():
+        print(f"\n{name}")
+        print(f"  {'codec':18s} {'bytes':>8s} {'encode':>10s} {'decode':>10s}")
+        for codec in sorted(CODECS):
+            for compression in sorted(COMPRESSORS):
+                serializer = Serializer(codec, compression, args.min_bytes)
+                raw = serializer.dumps(payload)
+                if compression != "none" and raw[0] == Serializer(codec, "none").dumps({})[0]:
+                    # Below the threshold: identical to the uncompressed row.
+                    continue
+                encode = _time(serializer.dumps, payload, args.rounds)
+                decode = _time(serializer.loads, raw, args.rounds)
+                print(f"  {codec + '+' + compression:18s} {len(raw):8d} {encode:8.1f}us {decode:8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark one refresh cycle's fetch phase against the local Polymarket stub.
+
+Compares the previous ThreadPoolExecutor fan-out (serial per-token fallbacks,
+serial winning-token fetches) with the asyncio ingestion engine.
+
+Usage (from backend/):
+    python -m scripts.bench_ingestion --latency-ms 100 --markets 25
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from scripts.polymarket_stub import start_stub_server
+
+
+def _legacy_cycle(market_limit: int, trades_per_market: int) -> int:
+    import polymarket
+    from ingestion import _market_id, _market_tokens, _token_id, _synthetic_trade_from_market
+    from whale import normalize_trade
+
+    def fetch_market_trades(market):
+        trades = polymarket.fetch_trades_for_market(_market_id(market), limit=trades_per_market)
+        if not trades:
+            for token in _market_tokens(market):
+                trades.extend(polymarket.fetch_trades_for_token(_token_id(token), limit=trades_per_market))
+        if not trades:
+            synthetic = _synthetic_trade_from_market(market)
+            trades = [synthetic] if synthetic else []
+        return [normalize_trade(market, trade) for trade in trades]
+
+    markets = polymarket.fetch_markets(limit=market_limit)
+    trades = []
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for future in as_completed([executor.submit(fetch_market_trades, m) for m in markets]):
+            trades.extend(future.result())
+    winning = []
+    for market in polymarket.fetch_closed_markets(limit=20):
+        for token in _market_tokens(market):
+            if token.get("winner") is True:
+                page = polymarket.fetch_trades_for_token(_token_id(token), limit=200)
+                winning.extend(normalize_trade(market, trade) for trade in page)
+    return len(trades) + len(winning)
+
+
+def _async_cycle(market_limit: int, trades_per_market: int) -> int:
+    from ingestion import run_ingestion
+    result = run_ingestion(market_limit=market_limit, trades_per_market=trades_per_market)
+    return len(result.trades) + len(result.winning_trades)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--markets", type=int, default=25)
+    parser.add_argument("--trades", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency_ms=args.latency_ms, trades_per_page=args.trades)
+    os.environ["POLYMARKET_GAMMA_API"] = base_url
+    os.environ["POLYMARKET_TRADES_API"] = f"{base_url}/trades"
+    os.environ["POLYMARKET_PROXY_MODE"] = "direct"
+    os.environ["POLYMARKET_DATA_MODE"] = "live"
+    os.environ["POLYMARKET_CACHE_FALLBACK"] = "0"
+
+    print(f"stub latency={args.latency_ms}ms markets={args.markets} trades/market={args.trades}")
+    for name, cycle in (("threadpool", _legacy_cycle), ("asyncio", _async_cycle)):
+        timings = []
+        rows = 0
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            rows = cycle(args.markets, args.trades)
+            timings.append(time.perf_counter() - start)
+        print(f"{name:>10}: best={min(timings) * 1000:8.1f}ms  mean={sum(timings) / len(timings) * 1000:8.1f}ms  rows={rows}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
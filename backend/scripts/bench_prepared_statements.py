@@ -0,0 +1,94 @@
+"""
+Benchmark per-request DB time of the authenticated hot path.
+
+One "request" is what an authenticated push-settings call does: look the
+user up by email, read their latest entitlement, notification settings and
+FCM tokens, then one signal.  Each mode runs ``--requests`` of them on one
+pooled connection, against whatever ``DATABASE_URL`` / ``DB_PATH`` points
+at, after seeding ``--users`` users.
+
+``plain`` sends the statement text with every call (the old path);
+``prepared`` goes through ``execute_prepared``, which on Postgres sends
+PREPARE once per connection and only EXECUTE afterwards.  On SQLite both
+modes hit sqlite3's own statement cache, so expect them to match there.
+
+Usage (from backend/):
+    DATABASE_URL=postgresql://... python -m scripts.bench_prepared_statements --requests 5000
+"""
+import argparse
+import random
+import statistics
+import time
+
+import app.database as app_db
+from app.database import execute_prepared, execute_sql, get_db_connection
+
+
+def _seed(users: int):
+    app_db.init_db()
+    ids = []
+    for idx in range(users):
+        email = f"bench-{idx}@example.com"
+        user = app_db.get_user_by_email(email)
+        user_id = user["id"] if user else app_db.create_user(email, "x")
+        if not user:
+            app_db.set_user_entitlements(user_id, "pro", "2025-01-01", "2030-01-01")
+            app_db.upsert_fcm_token(user_id, f"token-{idx}")
+        ids.append((email, user_id))
+    signal_id = app_db.create_signal("Benchmark", "body", "free")
+    return ids, signal_id
+
+
+def _request(run, conn, cursor, email, user_id, signal_id) -> None:
+    for stmt, params in (
+        (app_db._USER_BY_EMAIL, (email,)),
+        (app_db._LATEST_USER_ENTITLEMENT, (user_id,)),
+        (app_db._NOTIFICATION_SETTINGS, (user_id,)),
+        (app_db._FCM_TOKENS_FOR_USER, (user_id,)),
+        (app_db._SIGNAL_BY_ID, (signal_id,)),
+    ):
+        run(conn, cursor, stmt, params)
+        cursor.fetchall()
+
+
+def _plain(conn, cursor, stmt, params):
+    # The pre-registry path: the raw ``?`` text, rewritten on every call.
+    execute_sql(cursor, stmt.sqlite, params)
+
+
+def _run(label: str, run, users, signal_id, args) -> None:
+    rng = random.Random(1)
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        for email, user_id in users[:10]:
+            _request(run, conn, cursor, email, user_id, signal_id)
+        timings = []
+        for _ in range(args.requests):
+            email, user_id = rng.choice(users)
+            start = time.perf_counter()
+            _request(run, conn, cursor, email, user_id, signal_id)
+            timings.append(time.perf_counter() - start)
+        conn.rollback()
+    finally:
+        conn.close()
+    ordered = sorted(timings)
+    print(f"{label:10s} mean {statistics.mean(ordered) * 1000:7.3f}ms   "
+          f"median {statistics.median(ordered) * 1000:7.3f}ms   "
+          f"p95 {ordered[int(len(ordered) * 0.95)] * 1000:7.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    users, signal_id = _seed(args.users)
+    print(f"{'postgres' if app_db.IS_POSTGRES else 'sqlite'}, {args.requests} requests of 5 lookups")
+    _run("plain", _plain, users, signal_id, args)
+    _run("prepared", execute_prepared, users, signal_id, args)
+
+
+if __name__ == "__main__":
+    main()
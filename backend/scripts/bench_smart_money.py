@@ -0,0 +1,134 @@
+"""
+Benchmark ``EnhancedSmartMoneyAnalyzer`` against the per-trade implementation
+it replaced, over N trade dicts spread across 20k addresses and 40 days.
+
+Reports metrics and 24h/7d/30d trends (the old code called
+``get_performance_trend`` once per address; the vectorised engine computes
+every address's trend in one pass), end to end from dicts and from columns
+already built.
+
+Usage (from backend/):
+    python -m scripts.bench_smart_money --count 1000000
+"""
+import argparse
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from app.services.smart_money_enhanced import EnhancedSmartMoneyAnalyzer, trade_columns
+from app.timestamps import TimestampParser
+
+
+def _legacy_metrics(analyzer, trades):
+    data = defaultdict(lambda: {'times': [], 'total_volume': 0.0, 'recent_volume': 0.0,
+                                'win_count': 0, 'recent_win_count': 0})
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    cutoff = now - timedelta(hours=24)
+    timestamps = TimestampParser()
+    for trade in trades:
+        address = trade.get('address', '')
+        if not address:
+            continue
+        trade_time = timestamps.parse(trade.get('timestamp'), now)
+        value = float(trade.get('value', 0))
+        is_win = trade.get('is_winning', False)
+        row = data[address]
+        row['times'].append(trade_time)
+        row['total_volume'] += value
+        if trade_time >= cutoff:
+            row['recent_volume'] += value
+            if is_win:
+                row['recent_win_count'] += 1
+        if is_win:
+            row['win_count'] += 1
+    results = []
+    for address, row in data.items():
+        total_trades = len(row['times'])
+        if total_trades < analyzer.min_trades_threshold or row['total_volume'] < analyzer.min_volume_threshold:
+            continue
+        win_rate = row['win_count'] / total_trades
+        recent_count = sum(1 for ts in row['times'] if ts >= cutoff)
+        recent_win_rate = row['recent_win_count'] / recent_count if recent_count else win_rate
+        combined = analyzer.recency_weight * recent_win_rate + (1 - analyzer.recency_weight) * win_rate
+        if row['recent_volume'] > 0 and row['total_volume'] > 0:
+            consistency = min(row['recent_volume'] / row['total_volume'] * 5, 1.0)
+        else:
+            consistency = 0.5
+        results.append({'address': address, 'confidence_score': combined * consistency})
+    results.sort(key=lambda x: x['confidence_score'], reverse=True)
+    return results
+
+
+def _legacy_trends(trades):
+    # Per address: filter, parse, then one scan per period.
+    by_address = defaultdict(list)
+    for trade in trades:
+        if trade.get('address'):
+            by_address[trade['address']].append(trade)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    trends = {}
+    for address, owned in by_address.items():
+        timestamps = TimestampParser()
+        times = [timestamps.parse(t.get('timestamp'), now) for t in owned]
+        trend = {}
+        for period, delta in (('24h', timedelta(hours=24)), ('7d', timedelta(days=7)), ('30d', timedelta(days=30))):
+            window = [t for t, ts in zip(owned, times) if ts >= now - delta]
+            if window:
+                wins = sum(1 for t in window if t.get('is_winning', False))
+                trend[period] = {
+                    'trades': len(window),
+                    'win_rate': wins / len(window),
+                    'total_volume': sum(float(t.get('value', 0)) for t in window),
+                    'win_count': wins
+                }
+        trends[address] = trend
+    return trends
+
+
+def _trades(count: int, seed: int = 5):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return [
+        {
+            'address': f"0x{rng.randrange(20000):040x}",
+            'value': rng.random() * 5000,
+            'is_winning': rng.random() < 0.45,
+            'timestamp': int((now - timedelta(seconds=rng.randrange(40 * 86400)) - datetime(1970, 1, 1)).total_seconds())
+        }
+        for _ in range(count)
+    ]
+
+
+def _time(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<36} {elapsed * 1000:10.1f}ms")
+    return elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    trades = _trades(args.count)
+    analyzer = EnhancedSmartMoneyAnalyzer()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    print(f"{len(trades)} trades")
+
+    legacy, _ = _time("legacy calculate_enhanced_metrics", lambda: _legacy_metrics(analyzer, trades))
+    fast, _ = _time("calculate_enhanced_metrics", lambda: analyzer.calculate_enhanced_metrics(trades))
+    built, columns = _time("  trade_columns", lambda: trade_columns(trades, now))
+    engine, _ = _time("  metrics_from_columns", lambda: analyzer.metrics_from_columns(columns, now))
+    print(f"  speedup {legacy / fast:.1f}x end to end, {legacy / engine:.0f}x from columns")
+
+    legacy, _ = _time("legacy trends (per address)", lambda: _legacy_trends(trades))
+    fast, _ = _time("trends_from_columns incl. columns",
+                    lambda: analyzer.trends_from_columns(trade_columns(trades, now), now))
+    print(f"  speedup {legacy / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark SQLite read/write contention with and without the pragma profile.
+
+One writer thread mimics the scheduler: every ``--write-interval`` it
+inserts a batch of whale trades in one transaction.  ``--readers`` threads
+mimic API requests, running the leaderboard and latest-whales queries in a
+loop.  Each profile runs for ``--seconds`` against a fresh database seeded
+with ``--rows`` trades.
+
+The baseline is a plain ``sqlite3.connect`` (rollback journal, FULL sync,
+5s busy timeout); the tuned run applies ``app.engine.SQLITE_PRAGMAS``.
+
+Usage (from backend/):
+    python -m scripts.bench_sqlite_contention --seconds 10 --readers 8
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from app.engine import SQLITE_PRAGMAS, apply_sqlite_pragmas
+
+_SCHEMA = """
+CREATE TABLE whale_trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp INTEGER, maker_address TEXT, market_question TEXT, outcome TEXT,
+    side TEXT, size REAL, price REAL, value_usd REAL, market_slug TEXT
+);
+CREATE INDEX idx_whale_trades_timestamp_id ON whale_trades (timestamp DESC, id DESC);
+CREATE INDEX idx_whale_trades_maker ON whale_trades (maker_address);
+"""
+
+_READS = (
+    "SELECT * FROM whale_trades ORDER BY timestamp DESC, id DESC LIMIT 50",
+    """
+    SELECT maker_address, SUM(value_usd) AS total_volume, COUNT(*) AS trade_count
+    FROM whale_trades
+    GROUP BY maker_address
+    ORDER BY total_volume DESC
+    LIMIT 10
+    """,
+)
+
+
+def _rows(rng: random.Random, count: int, start: int):
+    return [
+        (start + i, f"0x{rng.randrange(500):040x}", "Q?", "Yes", rng.choice(("BUY", "SELL")),
+         100.0, 0.5, rng.uniform(1000, 50000), "q")
+        for i in range(count)
+    ]
+
+
+def _insert(conn, rows) -> None:
+    conn.executemany(
+        "INSERT INTO whale_trades (timestamp, maker_address, market_question, outcome, side, size, price, value_usd, "
+        "market_slug) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+
+
+def _connect(path: str, pragmas) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    if pragmas:
+        apply_sqlite_pragmas(conn, pragmas)
+    return conn
+
+
+def _run(label: str, pragmas, args) -> None:
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "contention.db")
+    setup = _connect(path, pragmas)
+    setup.executescript(_SCHEMA)
+    _insert(setup, _rows(random.Random(1), args.rows, 1_700_000_000))
+    setup.commit()
+    setup.close()
+
+    stop = threading.Event()
+    latencies = []
+    errors = {"read": 0, "write": 0}
+    writes = {"batches": 0, "max_ms": 0.0}
+    lock = threading.Lock()
+
+    def reader(seed: int):
+        conn = _connect(path, pragmas)
+        rng = random.Random(seed)
+        local = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                conn.execute(rng.choice(_READS)).fetchall()
+            except sqlite3.OperationalError:
+                with lock:
+                    errors["read"] += 1
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    def writer():
+        conn = _connect(path, pragmas)
+        rng = random.Random(2)
+        next_ts = 1_800_000_000
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                _insert(conn, _rows(rng, args.batch, next_ts))
+                conn.commit()
+                next_ts += args.batch
+                writes["batches"] += 1
+                writes["max_ms"] = max(writes["max_ms"], (time.perf_counter() - start) * 1000)
+            except sqlite3.OperationalError:
+                conn.rollback()
+                errors["write"] += 1
+            stop.wait(args.write_interval)
+        conn.close()
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95)] * 1000 if ordered else float("nan")
+    p99 = ordered[int(len(ordered) * 0.99)] * 1000 if ordered else float("nan")
+    print(f"{label}")
+    print(f"  reads/s {len(latencies) / args.seconds:10.0f}   "
+          f"median {statistics.median(ordered) * 1000 if ordered else float('nan'):6.2f}ms   "
+          f"p95 {p95:6.2f}ms   p99 {p99:6.2f}ms")
+    print(f"  write batches {writes['batches']:6d}   slowest commit {writes['max_ms']:7.1f}ms   "
+          f"locked errors read={errors['read']} write={errors['write']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--write-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    _run("default (rollback journal)", None, args)
+    _run("tuned " + ", ".join(f"{k}={v}" for k, v in SQLITE_PRAGMAS.items()), SQLITE_PRAGMAS, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark timestamp parsing over a million mixed-format values.
+
+The mix mirrors what the backend sees: epoch seconds from the Data API (as
+ints and digit strings), ``...Z`` ISO strings with milliseconds from Gamma,
+``isoformat()`` strings with ``+00:00`` and naive ``YYYY-MM-DD HH:MM:SS``
+rows from the database.  Upstreams arrive in runs, and many trades share the
+same second.
+
+Compares the previous parsers (``whale._parse_timestamp`` for upstream
+values, the strptime loop of ``_parse_db_datetime`` for database rows) with
+``app.timestamps.TimestampParser``: one parser per upstream, and a single
+parser over a fully shuffled mix (the worst case for format sniffing).
+
+Usage (from backend/):
+    python -m scripts.bench_timestamps --count 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.timestamps import TimestampParser
+
+
+def _legacy_parse(value) -> datetime:
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+    if isinstance(value, str):
+        try:
+            if value.isdigit():
+                return datetime.fromtimestamp(int(value), timezone.utc).replace(tzinfo=None)
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+        except Exception:
+            pass
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _legacy_parse_db(value):
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f"):
+        try:
+            return datetime.strptime(value, fmt)
+        except Exception:
+            continue
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+    except Exception:
+        return None
+
+
+def _upstreams(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    formats = {
+        "epoch_int": lambda dt: int((dt - datetime(1970, 1, 1)).total_seconds()),
+        "epoch_str": lambda dt: str(int((dt - datetime(1970, 1, 1)).total_seconds())),
+        "iso_z_ms": lambda dt: dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z",
+        "iso_utc": lambda dt: dt.replace(tzinfo=timezone.utc).isoformat(),
+        "db_naive": lambda dt: dt.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    per_format = count // len(formats)
+    groups = {}
+    for name, render in formats.items():
+        # ~4 trades per distinct second on average.
+        groups[name] = [
+            render(base + timedelta(seconds=rng.randrange(per_format // 4), milliseconds=rng.randrange(4) * 250))
+            for _ in range(per_format)
+        ]
+    return groups
+
+
+def _time(label: str, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {elapsed * 1000:9.1f}ms")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    groups = _upstreams(args.count)
+    runs = [value for values in groups.values() for value in values]
+    shuffled = list(runs)
+    random.Random(11).shuffle(shuffled)
+    print(f"{len(runs)} values, {len(groups)} layouts, {len(set(runs))} distinct")
+
+    print("runs by upstream")
+    legacy = 0.0
+    fast = 0.0
+    for name, values in groups.items():
+        legacy_parse = _legacy_parse_db if name == "db_naive" else _legacy_parse
+        legacy += _time(f"legacy {name}", lambda: [legacy_parse(v) for v in values])
+
+        def per_upstream():
+            p = TimestampParser()
+            [p.parse(v) for v in values]
+
+        fast += _time(f"TimestampParser {name}", per_upstream)
+    print(f"  total legacy={legacy * 1000:.1f}ms new={fast * 1000:.1f}ms speedup {legacy / fast:.1f}x")
+
+    print("shuffled mix, one parser")
+    legacy = _time("legacy _parse_timestamp", lambda: [_legacy_parse(v) for v in shuffled])
+
+    def shared():
+        p = TimestampParser()
+        [p.parse(v) for v in shuffled]
+
+    def no_memo():
+        p = TimestampParser(memo_size=0)
+        [p.parse(v) for v in shuffled]
+
+    fast = _time("TimestampParser", shared)
+    _time("TimestampParser without memo", no_memo)
+    print(f"  speedup {legacy / fast:.1f}x")
+
+    p = TimestampParser()
+    mismatches = sum(1 for v in shuffled[:100_000] if p.parse(v) != _legacy_parse(v))
+    print(f"mismatches vs legacy (first 100k shuffled): {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Microbenchmark: list-of-dicts trades vs the columnar ``TradeBatch``.
+
+Each path normalizes N raw trade records, detects whales, aggregates winning
+value per address, and inserts trades + whales into an in-memory SQLite
+database.  Inserts on the dict path go through ``insert(...).values(...)`` in
+``INGEST_BATCH_SIZE`` chunks, like the refresh cycle did before.
+
+Usage (from backend/):
+    python -m scripts.bench_trade_batch --sizes 10000 100000 1000000
+"""
+import argparse
+import time
+import tracemalloc
+from collections import defaultdict
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from ingestion import INGEST_BATCH_SIZE
+from models import Trade, Whale
+from smartmoney import _win_totals
+from trade_batch import TradeBatchBuilder, insert_trades, insert_whales, whale_mask
+from whale import detect_whales, normalize_trade
+
+MARKETS = [{"id": f"market-{i}", "question": f"Question {i}?"} for i in range(50)]
+
+
+def _raw(count: int):
+    return [
+        {
+            "id": f"trade-{i}",
+            "price": 0.05 + (i % 19) * 0.05,
+            "size": float((i * 37) % 5000),
+            "side": "BUY" if i % 2 else "SELL",
+            "proxyWallet": f"0x{i % 2000:040x}",
+            "timestamp": 1700000000 + i
+        }
+        for i in range(count)
+    ]
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def _dict_path(raw):
+    stages = {}
+    start = time.perf_counter()
+    trades = _normalize_dicts(raw)
+    stages["normalize"] = time.perf_counter()
+    whales = detect_whales(trades, min_value=1000)
+    stages["whales"] = time.perf_counter()
+    win_count = defaultdict(int)
+    win_value = defaultdict(float)
+    for trade in trades:
+        if trade["address"]:
+            win_count[trade["address"]] += 1
+            win_value[trade["address"]] += trade["value"]
+    stages["aggregate"] = time.perf_counter()
+    session = _session()
+    for offset in range(0, len(trades), INGEST_BATCH_SIZE):
+        stmt = insert(Trade).values(trades[offset:offset + INGEST_BATCH_SIZE])
+        session.execute(stmt.on_conflict_do_nothing(index_elements=[Trade.id]))
+    for offset in range(0, len(whales), INGEST_BATCH_SIZE):
+        stmt = insert(Whale).values(whales[offset:offset + INGEST_BATCH_SIZE])
+        session.execute(stmt.on_conflict_do_nothing(index_elements=[Whale.trade_id]))
+    session.commit()
+    session.close()
+    stages["insert"] = time.perf_counter()
+    return start, stages, trades
+
+
+def _normalize_dicts(raw):
+    return [normalize_trade(MARKETS[i % len(MARKETS)], trade) for i, trade in enumerate(raw)]
+
+
+def _build_batch(raw):
+    builder = TradeBatchBuilder()
+    for i, trade in enumerate(raw):
+        builder.append(MARKETS[i % len(MARKETS)], trade)
+    return builder.build()
+
+
+def _batch_path(raw):
+    stages = {}
+    start = time.perf_counter()
+    batch = _build_batch(raw)
+    stages["normalize"] = time.perf_counter()
+    whale_mask(batch, 1000)
+    stages["whales"] = time.perf_counter()
+    _win_totals(batch)
+    stages["aggregate"] = time.perf_counter()
+    session = _session()
+    insert_trades(session, batch)
+    insert_whales(session, batch, min_value=1000)
+    session.commit()
+    session.close()
+    stages["insert"] = time.perf_counter()
+    return start, stages, batch
+
+
+def _retained_bytes(build, raw) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build(raw)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def _report(name, start, stages, retained):
+    previous = start
+    parts = []
+    for stage, stamp in stages.items():
+        parts.append(f"{stage}={(stamp - previous) * 1000:8.1f}ms")
+        previous = stamp
+    total = (previous - start) * 1000
+    print(f"  {name:>6}: total={total:9.1f}ms  {'  '.join(parts)}  retained={retained / 1e6:7.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        raw = _raw(size)
+        print(f"{size} trades")
+        for name, path, build in (("dicts", _dict_path, _normalize_dicts), ("batch", _batch_path, _build_batch)):
+            retained = _retained_bytes(build, raw)
+            start, stages, _ = path(raw)
+            _report(name, start, stages, retained)
+
+
+if __name__ == "__main__":
+    main()
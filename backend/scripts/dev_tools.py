@@ -10,28 +10,18 @@ import sqlite3
 import re
 import pandas as pd
 from app.database import get_db_connection
+from app.query_profiler import profiler, recent_query_stats
 
 def analyze_query_performance() -> Dict[str, Any]:
     """
     Analyze database query performance
     Returns slow queries and optimization suggestions
     """
+    # Push this process's unflushed timings, then read the last hour of
+    # flushed profiler stats (all processes).
+    profiler.flush()
     conn = get_db_connection()
-    
-    # Get query performance metrics
-    queries = conn.execute("""
-        SELECT 
-            query, 
-            COUNT(*) as execution_count,
-            AVG(duration) as avg_duration,
-            MAX(duration) as max_duration,
-            SUM(duration) as total_duration
-        FROM query_metrics 
-        WHERE timestamp > datetime('now', '-1 hour')
-        GROUP BY query
-        ORDER BY total_duration DESC
-        LIMIT 10
-    """).fetchall()
+    queries = recent_query_stats(conn, hours=1, limit=10)
     
     # Get table statistics
     tables = conn.execute("""
@@ -43,7 +33,7 @@ def analyze_query_performance() -> Dict[str, Any]:
     table_stats = {}
     for table in tables:
         table_name = table[0]
-        if table_name not in ['query_metrics', 'sqlite_sequence'] and re.match(r"^[A-Za-z0-9_]+$", table_name):
+        if table_name not in ['query_metrics', 'query_stats', 'sqlite_sequence'] and re.match(r"^[A-Za-z0-9_]+$", table_name):
             count = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
             table_stats[table_name] = {
                 'row_count': count,
@@ -55,11 +45,12 @@ def analyze_query_performance() -> Dict[str, Any]:
     return {
         'slow_queries': [
             {
-                'query': q[0],
-                'execution_count': q[1],
-                'avg_duration_ms': round(q[2] * 1000, 2),
-                'max_duration_ms': round(q[3] * 1000, 2),
-                'total_duration_ms': round(q[4] * 1000, 2)
+                'query': q['query'],
+                'fingerprint': q['fingerprint'],
+                'execution_count': q['calls'],
+                'avg_duration_ms': round(q['total_ms'] / q['calls'], 2),
+                'max_duration_ms': round(q['max_ms'], 2),
+                'total_duration_ms': round(q['total_ms'], 2)
             } for q in queries
         ],
         'table_statistics': table_stats,
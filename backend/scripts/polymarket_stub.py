@@ -0,0 +1,126 @@
+"""
+Local stand-in for the Gamma and Data APIs, for offline ingestion benchmarks.
+
+Serves ``/markets`` (active and closed listings) and ``/trades`` (by
+``market`` or ``asset``) with a configurable per-request latency.  Every
+other market returns no trades by market id, which forces the per-token
+fallback path.  Listings carry a content ETag and honour ``If-None-Match``
+unless started with ``--no-etag``.
+
+Usage (from backend/):
+    python -m scripts.polymarket_stub --port 8765 --latency-ms 200
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def _market(idx: int, closed: bool) -> dict:
+    prefix = "closed" if closed else "stub"
+    return {
+        "id": f"{prefix}-market-{idx}",
+        "question": f"Stub market {idx}?",
+        "volume": 100000 - idx,
+        "liquidity": 5000,
+        "clobTokenIds": json.dumps([f"{prefix}-{idx}-yes", f"{prefix}-{idx}-no"]),
+        "outcomes": json.dumps(["Yes", "No"]),
+        "tokens": [
+            {"token_id": f"{prefix}-{idx}-yes", "outcome": "Yes", "winner": True},
+            {"token_id": f"{prefix}-{idx}-no", "outcome": "No", "winner": False}
+        ] if closed else [],
+        "lastTradePrice": 0.5,
+        "volume24hr": 1000
+    }
+
+
+def _trades(key: str, limit: int, offset: int = 0) -> list:
+    now = int(time.time())
+    return [
+        {
+            "id": f"{key}-{offset + i}",
+            "price": 0.5,
+            "size": 10 + (offset + i) * 150,
+            "side": "BUY" if i % 2 == 0 else "SELL",
+            "proxyWallet": f"0xstub{(offset + i) % 17:02d}",
+            "timestamp": now - (offset + i)
+        }
+        for i in range(limit)
+    ]
+
+
+def make_handler(latency_seconds: float, trades_per_page: int, etag: bool = True):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        requests_seen = []
+
+        def do_GET(self):
+            if latency_seconds:
+                time.sleep(latency_seconds)
+            parsed = urlparse(self.path)
+            self.requests_seen.append((parsed.path, dict(self.headers)))
+            query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+            limit = int(query.get("limit") or 50)
+            offset = int(query.get("offset") or 0)
+            if parsed.path.endswith("/markets"):
+                closed = query.get("closed") == "true"
+                payload = [_market(i, closed) for i in range(limit)]
+            elif parsed.path.endswith("/trades"):
+                key = query.get("market") or query.get("asset") or "unknown"
+                by_market_without_trades = "market" in query and key.rsplit("-", 1)[-1].isdigit() \
+                    and int(key.rsplit("-", 1)[-1]) % 2 == 1
+                count = 0 if by_market_without_trades else min(limit, trades_per_page)
+                payload = _trades(key, count, offset)
+            else:
+                self.send_error(404)
+                return
+            body = json.dumps(payload).encode()
+            tag = f'"{hashlib.sha256(body).hexdigest()[:16]}"' if etag and parsed.path.endswith("/markets") else None
+            if tag and self.headers.get("If-None-Match") == tag:
+                self.send_response(304)
+                self.send_header("ETag", tag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if tag:
+                self.send_header("ETag", tag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            return None
+
+    return StubHandler
+
+
+def start_stub_server(port: int = 0, latency_ms: float = 0, trades_per_page: int = 200, etag: bool = True):
+    """Start the stub on a daemon thread; returns (server, base_url)."""
+    handler = make_handler(latency_ms / 1000.0, trades_per_page, etag)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.handler = handler
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--trades-per-page", type=int, default=200)
+    parser.add_argument("--no-etag", action="store_true")
+    args = parser.parse_args()
+    server, base_url = start_stub_server(args.port, args.latency_ms, args.trades_per_page, etag=not args.no_etag)
+    print(f"Polymarket stub listening on {base_url}")
+    print(f"  POLYMARKET_GAMMA_API={base_url} POLYMARKET_TRADES_API={base_url}/trades")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
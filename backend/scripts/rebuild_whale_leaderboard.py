@@ -0,0 +1,20 @@
+"""
+Rebuild ``whale_leaderboard`` from ``whale_trades``.
+
+Inserts and deletes keep the table current through triggers; run this after
+backfills that bypass them (bulk loads, restores) or to clear float drift.
+
+Usage (from backend/):
+    python -m scripts.rebuild_whale_leaderboard
+"""
+from app.database import init_db, rebuild_whale_leaderboard
+
+
+def main():
+    init_db()
+    makers = rebuild_whale_leaderboard()
+    print(f"whale_leaderboard rebuilt: {makers} makers")
+
+
+if __name__ == "__main__":
+    main()
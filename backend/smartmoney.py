@@ -1,56 +1,214 @@
-from collections import defaultdict
-from typing import Dict, List
-from sqlalchemy import func
+"""
+Smart-wallet scoring from incrementally maintained per-address counters.
+
+``wallet_stats`` keeps each address's lifetime trade count and value, bumped
+by ``add_wallet_trades`` with only the trades a refresh cycle newly inserted,
+plus a snapshot of the latest cycle's winning trades.  ``update_smart_wallets``
+then rewrites ``smart_wallets`` for just the addresses whose counters changed,
+instead of grouping the whole ``trades`` table every minute.
+``reconcile_wallet_stats`` periodically recomputes the counters from
+``trades`` and repairs any drift.
+"""
+import math
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+from sqlalchemy import func, update
 from sqlalchemy.dialects.sqlite import insert
-from models import Trade, SmartWallet
+from models import Trade, SmartWallet, WalletStats
+from trade_batch import TradeBatch
 
+# Rows per multi-row upsert / addresses per ``IN (...)`` lookup.
+_CHUNK_SIZE = 500
 
-def update_smart_wallets(session, winning_trades: List[Dict]):
-    totals = session.query(
-        Trade.address,
-        func.count(Trade.id).label("total_trades"),
-        func.coalesce(func.sum(Trade.value), 0).label("total_value")
-    ).group_by(Trade.address).all()
 
-    total_map = {row.address: row for row in totals}
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
-    win_count = defaultdict(int)
-    win_value = defaultdict(float)
-    for trade in winning_trades:
-        address = trade.get("address") or ""
-        if not address:
-            continue
-        value = float(trade.get("value") or 0)
-        win_count[address] += 1
-        win_value[address] += value
 
-    rows = []
-    for address, row in total_map.items():
-        total_trades = int(row.total_trades or 0)
-        wins = int(win_count.get(address, 0))
-        profit = float(win_value.get(address, 0))
-        win_rate = (wins / total_trades) if total_trades else 0
-        total_value = float(row.total_value or 0)
-        roi = (profit / total_value) if total_value else 0
-        rows.append({
+def _chunks(items: List, size: int = _CHUNK_SIZE):
+    for offset in range(0, len(items), size):
+        yield items[offset:offset + size]
+
+
+def _address_totals(trades: TradeBatch, skip_blank: bool) -> Tuple[Dict[str, int], Dict[str, float]]:
+    addresses = trades.tables["address"]
+    codes = trades.codes["address"]
+    counts = np.bincount(codes, minlength=len(addresses))
+    values = np.bincount(codes, weights=trades.value, minlength=len(addresses))
+    count_map = {}
+    value_map = {}
+    for address, count, value in zip(addresses, counts.tolist(), values.tolist()):
+        if count and (address or not skip_blank):
+            count_map[address] = count
+            value_map[address] = value
+    return count_map, value_map
+
+
+def _win_totals(winning_trades: TradeBatch) -> Tuple[Dict[str, int], Dict[str, float]]:
+    """Winning trade count and value per address, skipping blank addresses."""
+    return _address_totals(winning_trades, skip_blank=True)
+
+
+def add_wallet_trades(session, trades: TradeBatch) -> Set[str]:
+    """Add newly inserted ``trades`` to ``wallet_stats``; returns the addresses touched.
+
+    Only pass trades that weren't stored before (see ``trade_batch.new_trades``),
+    otherwise they are counted twice until the next reconciliation.
+    """
+    counts, values = _address_totals(trades, skip_blank=False)
+    if not counts:
+        return set()
+    now = _utcnow()
+    rows = [
+        {
             "address": address,
-            "profit": profit,
-            "roi": roi,
-            "win_rate": win_rate,
-            "total_trades": total_trades
-        })
-
-    if not rows:
-        return
-
-    stmt = insert(SmartWallet).values(rows)
-    stmt = stmt.on_conflict_do_update(
-        index_elements=[SmartWallet.address],
-        set_={
-            "profit": stmt.excluded.profit,
-            "roi": stmt.excluded.roi,
-            "win_rate": stmt.excluded.win_rate,
-            "total_trades": stmt.excluded.total_trades
+            "total_trades": count,
+            "total_value": values[address],
+            "win_trades": 0,
+            "win_value": 0.0,
+            "updated_at": now
         }
+        for address, count in counts.items()
+    ]
+    for chunk in _chunks(rows):
+        stmt = insert(WalletStats).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[WalletStats.address],
+            set_={
+                "total_trades": WalletStats.total_trades + stmt.excluded.total_trades,
+                "total_value": WalletStats.total_value + stmt.excluded.total_value,
+                "updated_at": stmt.excluded.updated_at
+            }
+        )
+        session.execute(stmt)
+    return set(counts)
+
+
+def _refresh_smart_wallets(session, addresses: Iterable[str]) -> int:
+    """Upsert ``smart_wallets`` from ``wallet_stats`` for ``addresses``."""
+    rows = []
+    for chunk in _chunks(sorted(addresses)):
+        stats = session.query(WalletStats).filter(WalletStats.address.in_(chunk)).all()
+        for row in stats:
+            total_trades = int(row.total_trades or 0)
+            total_value = float(row.total_value or 0)
+            profit = float(row.win_value or 0)
+            rows.append({
+                "address": row.address,
+                "profit": profit,
+                "roi": (profit / total_value) if total_value else 0,
+                "win_rate": (int(row.win_trades or 0) / total_trades) if total_trades else 0,
+                "total_trades": total_trades
+            })
+
+    for chunk in _chunks(rows):
+        stmt = insert(SmartWallet).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SmartWallet.address],
+            set_={
+                "profit": stmt.excluded.profit,
+                "roi": stmt.excluded.roi,
+                "win_rate": stmt.excluded.win_rate,
+                "total_trades": stmt.excluded.total_trades
+            }
+        )
+        session.execute(stmt)
+    return len(rows)
+
+
+def update_smart_wallets(session, winning_trades: TradeBatch, changed: Iterable[str] = ()) -> int:
+    """Record this cycle's winners and rescore the wallets that changed.
+
+    ``changed`` are the addresses ``add_wallet_trades`` touched this cycle;
+    addresses whose winning snapshot moved are added to it.  Returns the
+    number of ``smart_wallets`` rows written.
+    """
+    win_count, win_value = _win_totals(winning_trades)
+    previous = {
+        row.address: (row.win_trades, row.win_value)
+        for row in session.query(WalletStats.address, WalletStats.win_trades, WalletStats.win_value)
+        .filter(WalletStats.win_trades != 0)
+    }
+
+    snapshot = [
+        {"address": address, "win_trades": 0, "win_value": 0.0}
+        for address in previous
+        if address not in win_count
+    ]
+    snapshot.extend(
+        {"address": address, "win_trades": count, "win_value": win_value[address]}
+        for address, count in win_count.items()
+        if previous.get(address) != (count, win_value[address])
     )
-    session.execute(stmt)
+
+    # Winners without any stored trade have no wallet_stats row and stay
+    # unscored, as with the full recompute; only existing rows are updated.
+    stored = set()
+    for chunk in _chunks([row["address"] for row in snapshot]):
+        stored.update(
+            address for (address,) in session.query(WalletStats.address).filter(WalletStats.address.in_(chunk))
+        )
+    snapshot = [row for row in snapshot if row["address"] in stored]
+    if snapshot:
+        session.execute(update(WalletStats), snapshot)
+
+    return _refresh_smart_wallets(session, set(changed) | stored)
+
+
+def reconcile_wallet_stats(session) -> int:
+    """Recompute trade totals from ``trades`` and repair drifted rows.
+
+    Returns the number of addresses whose counters were corrected.
+    """
+    totals = {
+        row.address: (int(row.total_trades or 0), float(row.total_value or 0))
+        for row in session.query(
+            Trade.address,
+            func.count(Trade.id).label("total_trades"),
+            func.coalesce(func.sum(Trade.value), 0).label("total_value")
+        ).group_by(Trade.address)
+    }
+    stats = {
+        row.address: (row.total_trades, row.total_value)
+        for row in session.query(WalletStats.address, WalletStats.total_trades, WalletStats.total_value)
+    }
+
+    now = _utcnow()
+    fixes = []
+    for address, (total_trades, total_value) in totals.items():
+        current = stats.get(address)
+        if current is None:
+            continue
+        if current[0] != total_trades or not math.isclose(current[1], total_value, rel_tol=1e-9, abs_tol=1e-6):
+            fixes.append({
+                "address": address,
+                "total_trades": total_trades,
+                "total_value": total_value,
+                "updated_at": now
+            })
+    missing = [
+        {
+            "address": address,
+            "total_trades": total_trades,
+            "total_value": total_value,
+            "win_trades": 0,
+            "win_value": 0.0,
+            "updated_at": now
+        }
+        for address, (total_trades, total_value) in totals.items()
+        if address not in stats
+    ]
+    extra = [address for address in stats if address not in totals]
+
+    if fixes:
+        session.execute(update(WalletStats), fixes)
+    for chunk in _chunks(missing):
+        session.execute(insert(WalletStats).values(chunk).on_conflict_do_nothing(index_elements=[WalletStats.address]))
+    for chunk in _chunks(extra):
+        session.query(WalletStats).filter(WalletStats.address.in_(chunk)).delete(synchronize_session=False)
+
+    repaired = {row["address"] for row in fixes} | {row["address"] for row in missing}
+    _refresh_smart_wallets(session, repaired)
+    return len(repaired) + len(extra)
@@ -2,12 +2,14 @@ import os
 import tempfile
 from fastapi.testclient import TestClient
 import app.database as app_db
+from app import engine as db_engine
+from app.migrations import MIGRATIONS
 from main import app
 
 os.environ["DISABLE_SCHEDULER"] = "1"
 os.environ["ADMIN_API_KEY"] = "unit-admin-key"
 _temp_db = tempfile.NamedTemporaryFile(delete=False)
-app_db.DB_PATH = _temp_db.name
+db_engine.configure(f"sqlite:///{_temp_db.name}")
 app_db.init_db()
 
 client = TestClient(app)
@@ -20,3 +22,24 @@ def test_admin_auto_signal_requires_key():
     assert r.status_code == 403
     r = client.post("/admin/auto-signal/trigger", headers={"X-Admin-Key": "unit-admin-key"})
     assert r.status_code == 200
+
+
+def test_admin_db_indexes_reports_migrations_and_plans():
+    assert client.get("/admin/db/indexes").status_code == 403
+    r = client.get("/admin/db/indexes", headers={"X-Admin-Key": "unit-admin-key"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["migrations"] == [migration.version for migration in MIGRATIONS]
+    assert {row["name"] for row in body["queries"]} >= {"whales_latest", "fcm_tokens_for_user"}
+
+
+def test_debug_queries_reports_profiled_fingerprints():
+    assert client.get("/debug/queries").status_code == 403
+    app_db.get_signals(limit=3)
+    app_db.get_signals(limit=7)
+    r = client.get("/debug/queries", headers={"X-Admin-Key": "unit-admin-key"})
+    assert r.status_code == 200
+    queries = {row["fingerprint"]: row for row in r.json()["queries"]}
+    signals = [row for key, row in queries.items() if key.startswith("select id, title, content") and "offset" in key]
+    assert len(signals) == 1
+    assert signals[0]["calls"] >= 2
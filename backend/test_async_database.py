@@ -0,0 +1,66 @@
+import asyncio
+import threading
+
+import pytest
+import app.async_database as async_db
+import app.database as app_db
+from app import engine as db_engine
+
+
+@pytest.fixture
+def signals_db(tmp_path):
+    previous = db_engine.database_url()
+    db_engine.configure(f"sqlite:///{tmp_path / 'signals.db'}")
+    app_db.init_db()
+    for idx in range(5):
+        app_db.create_signal(f"Signal {idx}", "body", "pro" if idx % 2 else "free")
+    yield
+    db_engine.configure(previous)
+
+
+@pytest.mark.unit
+def test_numbered_placeholders():
+    assert async_db._numbered("SELECT * FROM t WHERE a = ? AND (b, c) < (?, ?) LIMIT ?") == (
+        "SELECT * FROM t WHERE a = $1 AND (b, c) < ($2, $3) LIMIT $4"
+    )
+    assert async_db._numbered("SELECT 1") == "SELECT 1"
+
+
+@pytest.mark.unit
+def test_run_sync_uses_database_executor():
+    name = asyncio.run(async_db.run_sync(lambda: threading.current_thread().name))
+    assert name.startswith("db")
+
+
+@pytest.mark.unit
+def test_sqlite_reads_match_sync_layer(signals_db):
+    async def read():
+        return await asyncio.gather(
+            async_db.get_signals(limit=3),
+            async_db.get_signals(limit=3, offset=3),
+            async_db.get_signal_by_id(2),
+            async_db.get_signal_by_id(999),
+            async_db.get_daily_pulse(),
+            async_db.get_user_by_email("nobody@example.com"),
+        )
+
+    first, second, by_id, missing, pulse, user = asyncio.run(read())
+    assert first == app_db.get_signals(limit=3)
+    assert second == app_db.get_signals(limit=3, offset=3)
+    assert by_id == app_db.get_signal_by_id(2)
+    assert missing is None
+    assert pulse == app_db.get_daily_pulse()
+    assert user is None
+
+    last = first[-1]
+    after = asyncio.run(async_db.get_signals(limit=3, before=(last["created_at"], last["id"])))
+    assert after == second
+
+
+@pytest.mark.unit
+def test_close_resets_executor():
+    asyncio.run(async_db.run_sync(int))
+    assert async_db._executor is not None
+    asyncio.run(async_db.close())
+    assert async_db._executor is None
+    assert asyncio.run(async_db.run_sync(int, "7")) == 7
@@ -2,12 +2,13 @@ import os
 import tempfile
 from fastapi.testclient import TestClient
 import app.database as app_db
+from app import engine as db_engine
 import main as main_module
 
 os.environ["DISABLE_SCHEDULER"] = "1"
 os.environ["ADMIN_API_KEY"] = "unit-admin-key"
 _temp_db = tempfile.NamedTemporaryFile(delete=False)
-app_db.DB_PATH = _temp_db.name
+db_engine.configure(f"sqlite:///{_temp_db.name}")
 app_db.init_db()
 
 from main import app
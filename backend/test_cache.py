@@ -0,0 +1,145 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from app.cache import CODECS, COMPRESSORS, LocalCache, RedisCache, Serializer, TieredCache, key_prefix, needs_refresh
+
+
+class _OfflineRedis(RedisCache):
+    def __init__(self):
+        self.redis_client = None
+        self.serializer = Serializer()
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+def _evictions(prefix: str, reason: str) -> float:
+    return REGISTRY.get_sample_value("cache_evictions_total", {"prefix": prefix, "reason": reason}) or 0.0
+
+
+def _hits(prefix: str, tier: str) -> float:
+    return REGISTRY.get_sample_value("cache_hits_total", {"prefix": prefix, "tier": tier}) or 0.0
+
+
+@pytest.mark.unit
+def test_key_prefix():
+    assert key_prefix("api_cache:signals:free:50:0:") == "api_cache:signals"
+    assert key_prefix("monitor:alerts") == "monitor:alerts"
+    assert key_prefix("plain") == "plain"
+
+
+@pytest.mark.unit
+def test_local_cache_bounds_entries_and_bytes():
+    local = LocalCache(max_entries=3, max_bytes=100)
+    before = _evictions("lru:test", "size")
+    for idx in range(3):
+        assert local.set(f"lru:test:{idx}", idx, 60, 10)
+    local.get("lru:test:0")
+    local.set("lru:test:3", 3, 60, 10)
+    # 1 was least recently used.
+    assert local.get("lru:test:1") is None
+    assert [local.get(f"lru:test:{idx}") for idx in (0, 2, 3)] == [0, 2, 3]
+
+    local.set("lru:test:big", "x", 60, 85)
+    assert local.bytes <= 100
+    assert local.get("lru:test:big") == "x"
+    assert not local.set("lru:test:huge", "x", 60, 101)
+    assert _evictions("lru:test", "size") - before == 3
+
+
+@pytest.mark.unit
+def test_local_cache_expires_entries(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: clock[0])
+    local = LocalCache()
+    local.set("ttl:test:a", {"a": 1}, 5, 8)
+    clock[0] += 4.9
+    assert local.get("ttl:test:a") == {"a": 1}
+    clock[0] += 0.2
+    assert local.get("ttl:test:a") is None
+    assert local.bytes == 0
+
+
+@pytest.mark.unit
+def test_tiered_cache_serves_api_keys_locally_without_redis():
+    remote = _OfflineRedis()
+    tiered = TieredCache(remote, LocalCache(), local_prefixes=("api_cache:",), channel="invalidate")
+    key = "api_cache:signals:free:50:0:"
+    hits = _hits("api_cache:signals", "local")
+
+    assert tiered.get(key) is None
+    tiered.set(key, [{"id": 1}], ttl_seconds=30)
+    assert tiered.get(key) == [{"id": 1}]
+    assert tiered.get_local(key) == [{"id": 1}]
+    assert _hits("api_cache:signals", "local") - hits == 2
+
+    # Counters and alert lists stay on Redis only.
+    tiered.set("monitor:alerts", ["a"], ttl_seconds=30)
+    assert tiered.get("monitor:alerts") is None
+
+
+@pytest.mark.unit
+def test_invalidation_is_published_and_applied():
+    remote = _OfflineRedis()
+    tiered = TieredCache(remote, LocalCache(), local_prefixes=("api_cache:",), channel="invalidate")
+    tiered.set("api_cache:signals:free:50:0:", [1], ttl_seconds=30)
+    tiered.set("api_cache:signals:pro:50:0:", [2], ttl_seconds=30)
+    tiered.set("api_cache:whales:50:0:", [3], ttl_seconds=30)
+
+    tiered.clear_pattern("api_cache:signals:*")
+    assert remote.published == [("invalidate", "api_cache:signals:*")]
+    assert tiered.get_local("api_cache:signals:free:50:0:") is None
+    assert tiered.get_local("api_cache:whales:50:0:") == [3]
+
+    # A message from another worker.
+    tiered.handle_invalidation("api_cache:whales:50:0:")
+    assert tiered.get_local("api_cache:whales:50:0:") is None
+
+
+@pytest.mark.unit
+def test_needs_refresh_with_early_expiration(monkeypatch):
+    entry = {"value": 1, "fresh_until": 100.0, "build_seconds": 2.0}
+    assert not needs_refresh(entry, now=99.0, beta=0)
+    assert needs_refresh(entry, now=100.0, beta=0)
+    # -ln(0.5) * 2s = 1.39s early at most for this draw.
+    monkeypatch.setattr("app.cache.random.random", lambda: 0.5)
+    assert needs_refresh(entry, now=98.7, beta=1.0)
+    assert not needs_refresh(entry, now=98.5, beta=1.0)
+
+
+_PAYLOAD = {"value": {"body": '[{"id":1,"label":"é"}]', "etag": '"abc"', "headers": {}},
+            "fresh_until": 1700000000.5, "build_seconds": 0.02, "rows": [[1, 2.5, None, True]] * 50}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("codec", sorted(CODECS))
+def test_serializer_round_trips_every_codec(codec):
+    serializer = Serializer(codec, "none")
+    raw = serializer.dumps(_PAYLOAD)
+    assert raw[0] >= 0x80
+    assert serializer.loads(raw) == _PAYLOAD
+    # Any worker reads entries written with another codec.
+    assert Serializer("json", "none").loads(raw) == _PAYLOAD
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("compression", sorted(set(COMPRESSORS) - {"none"}))
+def test_serializer_compresses_large_payloads(compression):
+    serializer = Serializer("json", compression, compress_min_bytes=512)
+    small, large = {"a": 1}, {"rows": ["whale"] * 500}
+    assert serializer.loads(serializer.dumps(small)) == small
+    assert serializer.dumps(small)[0] == Serializer("json", "none").dumps(small)[0]
+    raw = serializer.dumps(large)
+    assert len(raw) < len(Serializer("json", "none").dumps(large))
+    assert Serializer("json", "none").loads(raw) == large
+
+
+@pytest.mark.unit
+def test_serializer_reads_legacy_json_and_rejects_unknown_formats():
+    serializer = Serializer()
+    assert serializer.loads(b'{"value": [1, 2]}') == {"value": [1, 2]}
+    with pytest.raises(ValueError):
+        serializer.loads(b"\xff" + b"payload")
+    # Unavailable choices fall back instead of failing at import.
+    assert Serializer("nope", "nope").codec == CODECS["json"]
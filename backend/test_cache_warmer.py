@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.cache_warmer as cache_warmer
+import app.database as app_db
+import main
+from app import engine as db_engine
+from app.cache import LocalCache, RedisCache, Serializer, TieredCache
+from database import init_db as init_orm_db
+
+
+class _OfflineRedis(RedisCache):
+    def __init__(self):
+        self.redis_client = None
+        self.serializer = Serializer()
+
+    def publish(self, channel, message):
+        pass
+
+
+@pytest.fixture
+def whale_db(tmp_path):
+    previous = db_engine.database_url()
+    db_engine.configure(f"sqlite:///{tmp_path / 'warm.db'}")
+    app_db.init_db()
+    init_orm_db()
+    yield
+    # Pages built from this store must not outlive it.
+    main.cache.clear_pattern("api_cache:*")
+    db_engine.configure(previous)
+
+
+def _whale(idx: int) -> dict:
+    return {
+        "timestamp": 1700000000 + idx, "maker_address": f"0x{idx}", "market_question": "Q?", "outcome": "Yes",
+        "side": "BUY", "size": 10000, "price": 0.5, "value_usd": 5000.0, "market_slug": "q"
+    }
+
+
+@pytest.mark.unit
+def test_data_versions_without_redis():
+    tiered = TieredCache(_OfflineRedis(), LocalCache())
+    assert tiered.data_version("ds") == 0
+    assert tiered.reserve_data_version("ds") == 1
+    assert tiered.reserve_data_version("ds") == 2
+    assert tiered.publish_data_version("ds", 2) == 2
+    # A slower warmer finishing later doesn't roll the version back.
+    assert tiered.publish_data_version("ds", 1) == 2
+    assert tiered.reserve_data_version("ds") == 3
+    tiered.handle_version("ds:7")
+    assert tiered.data_version("ds") == 7
+
+
+@pytest.mark.unit
+def test_data_changed_builds_pages_under_the_next_version(monkeypatch):
+    tiered = TieredCache(_OfflineRedis(), LocalCache(), local_prefixes=("api_cache:",))
+    monkeypatch.setattr(cache_warmer, "cache", tiered)
+    monkeypatch.setattr("app.response_cache.cache", tiered)
+    monkeypatch.setattr(cache_warmer, "_warmers", {})
+    seen = []
+
+    async def warm():
+        version = cache_warmer.data_version("ds")
+        seen.append((version, tiered.data_version("ds")))
+        tiered.set_entry(f"api_cache:ds:v{version}:page", "built", 60)
+
+    cache_warmer.register("ds", warm)
+    assert cache_warmer.data_changed("ds") == {"ds": 1}
+    # Built under 1 while requests still used 0.
+    assert seen == [(1, 0)]
+    assert cache_warmer.data_version("ds") == 1
+    assert tiered.get_entry("api_cache:ds:v1:page")["value"] == "built"
+
+
+@pytest.mark.unit
+def test_whale_ingestion_prewarms_list_pages(whale_db, monkeypatch):
+    client = TestClient(main.app)
+    assert client.get("/api/whales").json() == []
+
+    monkeypatch.setattr(main.whale_service, "fetch_whale_activity", lambda: [_whale(1), _whale(2)])
+    before = cache_warmer.data_version("whales")
+    main.update_whale_data()
+    assert cache_warmer.data_version("whales") == before + 1
+
+    key = main._versioned_cache_key("whales", ["50", "0", "latest", ""])
+    entry = main.cache.get_entry(key + ":body")
+    assert entry is not None
+    assert [item["maker_address"] for item in json.loads(entry["value"]["body"])] == ["0x2", "0x1"]
+    assert [item["maker_address"] for item in client.get("/api/whales").json()] == ["0x2", "0x1"]
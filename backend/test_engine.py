@@ -0,0 +1,255 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+import app.database as app_db
+from app import engine as db_engine
+from database import get_session, init_db as init_orm_db
+from models import Trade
+
+
+@pytest.fixture
+def shared_db(tmp_path):
+    previous = db_engine.database_url()
+    db_engine.configure(f"sqlite:///{tmp_path / 'shared.db'}")
+    app_db.init_db()
+    init_orm_db()
+    yield db_engine.get_engine()
+    db_engine.configure(previous)
+
+
+@pytest.mark.unit
+def test_orm_and_raw_connections_share_one_store(shared_db):
+    session = get_session()
+    try:
+        session.add(Trade(
+            id="t1", market="m", question="Q?", address="0xabc", side="BUY",
+            price=0.5, size=10, value=5.0, timestamp=datetime(2025, 1, 1)
+        ))
+        session.commit()
+    finally:
+        session.close()
+    app_db.save_whale_trades([{
+        "timestamp": 1700000000, "maker_address": "0xabc", "market_question": "Q?", "outcome": "Yes",
+        "side": "BUY", "size": 10, "price": 0.5, "value_usd": 5.0, "market_slug": "m"
+    }])
+
+    conn = app_db.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT address FROM trades")
+        assert [row["address"] for row in cursor.fetchall()] == ["0xabc"]
+    finally:
+        conn.close()
+
+    session = get_session()
+    try:
+        joined = session.execute(text(
+            "SELECT t.id, w.value_usd FROM trades t JOIN whale_trades w ON w.maker_address = t.address"
+        )).all()
+        assert [tuple(row) for row in joined] == [("t1", 5.0)]
+    finally:
+        session.close()
+
+
+@pytest.mark.unit
+def test_connections_return_to_the_pool(shared_db):
+    pool = shared_db.pool
+    conn = app_db.get_db_connection()
+    session = get_session()
+    session.execute(text("SELECT 1"))
+    assert pool.checkedout() == 2
+    conn.close()
+    session.close()
+    assert pool.checkedout() == 0
+
+
+@pytest.mark.unit
+def test_configure_switches_store(tmp_path):
+    previous = db_engine.database_url()
+    try:
+        db_engine.configure("sqlite://")
+        assert db_engine.database_url() == "sqlite://"
+        conn = app_db.get_db_connection()
+        try:
+            conn.cursor().execute("CREATE TABLE probe (id INTEGER)")
+        finally:
+            conn.close()
+        # In-memory stores keep one connection, so the table is still there.
+        session = get_session()
+        try:
+            assert session.execute(text("SELECT COUNT(*) FROM probe")).scalar() == 0
+        finally:
+            session.close()
+    finally:
+        db_engine.configure(previous)
+    assert db_engine.database_url() == previous
+
+
+@pytest.mark.unit
+def test_sqlite_connections_get_pragma_profile(shared_db):
+    conn = app_db.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        settings = {}
+        for pragma in ("journal_mode", "synchronous", "busy_timeout", "temp_store", "cache_size"):
+            cursor.execute(f"PRAGMA {pragma}")
+            settings[pragma] = cursor.fetchone()[0]
+    finally:
+        conn.close()
+    assert settings == {
+        "journal_mode": "wal",
+        "synchronous": 1,  # NORMAL
+        "busy_timeout": int(db_engine.SQLITE_PRAGMAS["busy_timeout"]),
+        "temp_store": 2,  # MEMORY
+        "cache_size": int(db_engine.SQLITE_PRAGMAS["cache_size"]),
+    }
+
+
+@pytest.fixture
+def replica_db(tmp_path):
+    previous = db_engine.database_url()
+    primary = tmp_path / "primary.db"
+    replica = tmp_path / "replica.db"
+    db_engine.configure(f"sqlite:///{primary}")
+    app_db.init_db()
+    # Snapshot the primary as the replica, then let them drift apart.
+    source = sqlite3.connect(str(primary))
+    target = sqlite3.connect(str(replica))
+    source.backup(target)
+    source.close()
+    target.close()
+    db_engine.configure(f"sqlite:///{primary}", replica=f"sqlite:///{replica}")
+    yield
+    db_engine.configure(previous)
+
+
+def _alert(message: str) -> dict:
+    return {
+        "timestamp": "2025-01-01T00:00:00", "market_question": "Q?", "outcome": "Yes",
+        "old_price": 0.4, "new_price": 0.6, "change": 0.2, "message": message
+    }
+
+
+@pytest.mark.unit
+def test_read_only_connections_use_the_replica(replica_db):
+    app_db.save_alert(_alert("primary only"))
+    assert app_db.get_recent_alerts() == []
+
+    conn = app_db.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT message FROM alerts")
+        assert [row["message"] for row in cursor.fetchall()] == ["primary only"]
+        assert not db_engine.is_replica_connection(cursor.connection)
+    finally:
+        conn.close()
+
+    conn = app_db.get_db_connection(read_only=True)
+    try:
+        assert db_engine.is_replica_connection(conn.cursor().connection)
+    finally:
+        conn.close()
+
+
+@pytest.mark.unit
+def test_unreachable_replica_falls_back_to_primary(tmp_path):
+    previous = db_engine.database_url()
+    try:
+        db_engine.configure(
+            f"sqlite:///{tmp_path / 'primary.db'}",
+            replica=f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"
+        )
+        app_db.init_db()
+        app_db.save_alert(_alert("from primary"))
+        assert [row["message"] for row in app_db.get_recent_alerts()] == ["from primary"]
+        assert not db_engine.replica_available()
+        assert db_engine.get_replica_engine() is None
+    finally:
+        db_engine.configure(previous)
+
+
+def _sample(name: str, pool: str = "primary") -> float:
+    return REGISTRY.get_sample_value(name, {"pool": pool}) or 0.0
+
+
+@pytest.mark.unit
+def test_exhausted_pool_waits_then_times_out(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_engine, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(db_engine, "DB_POOL_OVERFLOW", 0)
+    monkeypatch.setattr(db_engine, "DB_POOL_TIMEOUT", 0.05)
+    previous = db_engine.database_url()
+    db_engine.configure(f"sqlite:///{tmp_path / 'small.db'}")
+    try:
+        created = _sample("db_pool_connections_created_total")
+        timeouts = _sample("db_pool_checkout_timeouts_total")
+        waits = _sample("db_pool_checkout_wait_seconds_count")
+
+        held = app_db.get_db_connection()
+        assert db_engine.pool_status()["primary"] == {"in_use": 1, "open": 1}
+        with pytest.raises(PoolTimeoutError):
+            app_db.get_db_connection()
+        held.close()
+        again = app_db.get_db_connection()
+        again.close()
+
+        assert _sample("db_pool_connections_created_total") - created == 1
+        assert _sample("db_pool_checkout_timeouts_total") - timeouts == 1
+        assert _sample("db_pool_checkout_wait_seconds_count") - waits == 3
+        assert _sample("db_pool_connections_in_use") == 0
+        assert _sample("db_pool_connections_open") == 1
+    finally:
+        db_engine.configure(previous)
+
+
+@pytest.mark.unit
+def test_legacy_sqlite_tables_are_migrated_once(tmp_path, monkeypatch, caplog):
+    import database
+    from sqlalchemy import create_engine
+    from models import Market
+
+    legacy_path = tmp_path / "polymarket.db"
+    legacy = create_engine(f"sqlite:///{legacy_path}")
+    database.Base.metadata.create_all(bind=legacy)
+    with legacy.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO markets (id, question, volume) VALUES ('m1', 'Q?', 10.0)")
+        conn.exec_driver_sql(
+            "INSERT INTO trades (id, market, question, address, side, price, size, value, timestamp) "
+            "VALUES ('t1', 'm1', 'Q?', '0xabc', 'BUY', 0.5, 10, 5.0, '2025-01-01 00:00:00.000000')"
+        )
+    legacy.dispose()
+    monkeypatch.setattr(database, "LEGACY_SQLITE_PATH", str(legacy_path))
+
+    previous = db_engine.database_url()
+    db_engine.configure(f"sqlite:///{tmp_path / 'shared.db'}")
+    try:
+        init_orm_db()
+        session = get_session()
+        try:
+            assert [m.id for m in session.query(Market).all()] == ["m1"]
+            assert session.query(Trade).one().timestamp == datetime(2025, 1, 1)
+        finally:
+            session.close()
+        # A second start finds data and only warns.
+        caplog.clear()
+        assert database.migrate_legacy_sqlite() == 0
+        assert "was not migrated" in caplog.text
+    finally:
+        db_engine.configure(previous)
+
+
+@pytest.mark.unit
+def test_primary_pool_does_not_ping_on_checkout():
+    pytest.importorskip("psycopg2")
+    engine = db_engine._create_engine("postgresql://user@localhost/polypulse")
+    replica = db_engine._create_engine("postgresql://user@localhost/polypulse", name="replica", pre_ping=True)
+    try:
+        assert engine.pool._pre_ping is False
+        assert replica.pool._pre_ping is True
+    finally:
+        engine.dispose()
+        replica.dispose()
@@ -0,0 +1,76 @@
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+import app.http_client as http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status = 500 if self.path.startswith("/error") else 200
+        body = json.dumps([{"path": self.path}]).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        return None
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    http_client.reset_http_client()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    http_client.reset_http_client()
+
+
+def _closed_port() -> int:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@pytest.mark.unit
+def test_connections_are_reused(stub_server, monkeypatch):
+    monkeypatch.setenv("POLYMARKET_PROXY_MODE", "direct")
+    for _ in range(5):
+        response = http_client.http_get(f"{stub_server}/trades", params={"limit": 1})
+        assert response.json()[0]["path"].startswith("/trades")
+    stats = http_client.get_pool_stats()["127.0.0.1"]
+    assert stats["handshakes"] == 1
+    assert stats["misses"] == 1
+    assert stats["hits"] == 4
+
+
+@pytest.mark.unit
+def test_failed_proxy_route_is_remembered(stub_server, monkeypatch):
+    monkeypatch.setenv("POLYMARKET_PROXY_MODE", "auto")
+    monkeypatch.setenv("HTTP_PROXY", f"http://127.0.0.1:{_closed_port()}")
+    monkeypatch.delenv("NO_PROXY", raising=False)
+    monkeypatch.delenv("no_proxy", raising=False)
+    http_client.http_get(f"{stub_server}/markets")
+    host = stub_server.split("//", 1)[1]
+    assert http_client._route_order(host) == [False]
+    handshakes = http_client.get_pool_stats()["127.0.0.1"]["handshakes"]
+    http_client.http_get(f"{stub_server}/markets")
+    assert http_client.get_pool_stats()["127.0.0.1"]["handshakes"] == handshakes
+
+
+@pytest.mark.unit
+def test_http_errors_do_not_switch_route(stub_server, monkeypatch):
+    monkeypatch.setenv("POLYMARKET_PROXY_MODE", "direct")
+    with pytest.raises(requests.HTTPError):
+        http_client.http_get(f"{stub_server}/error")
@@ -0,0 +1,178 @@
+import time
+import pytest
+import polymarket
+from ingestion import IngestionEngine, run_ingestion
+
+
+def _market(idx: int, winner: bool = False) -> dict:
+    return {
+        "id": f"m{idx}",
+        "question": f"Q{idx}",
+        "tokens": [
+            {"token_id": f"m{idx}-yes", "outcome": "Yes", "winner": winner},
+            {"token_id": f"m{idx}-no", "outcome": "No", "winner": False}
+        ]
+    }
+
+
+def _trade(key: str) -> dict:
+    return {"id": f"{key}-t", "price": 0.5, "size": 10, "maker_address": "0xabc", "timestamp": 1700000000}
+
+
+@pytest.fixture
+def slow_upstream(monkeypatch):
+    delay = 0.2
+
+    def fetch_markets(limit=50):
+        time.sleep(delay)
+        return [_market(i) for i in range(limit)]
+
+    def fetch_closed_markets(limit=20):
+        time.sleep(delay)
+        return [_market(100 + i, winner=True) for i in range(limit)]
+
+    def fetch_trades_for_market(market_id, limit=200):
+        time.sleep(delay)
+        # Odd markets have no trades by id and must fall back to tokens.
+        return [] if int(market_id[1:]) % 2 else [_trade(market_id)]
+
+    def fetch_trades_for_token(token_id, limit=200):
+        time.sleep(delay)
+        return [_trade(token_id)]
+
+    monkeypatch.setattr(polymarket, "fetch_markets_conditional", lambda limit=50: (fetch_markets(limit), True))
+    monkeypatch.setattr(polymarket, "fetch_closed_markets", fetch_closed_markets)
+    monkeypatch.setattr(polymarket, "iter_trades_for_market", fetch_trades_for_market)
+    monkeypatch.setattr(polymarket, "iter_trades_for_token", fetch_trades_for_token)
+    return delay
+
+
+@pytest.mark.unit
+def test_cycle_takes_critical_path_not_sum(slow_upstream):
+    engine = IngestionEngine(concurrency=64, host_concurrency=64, deadline_seconds=5)
+    start = time.perf_counter()
+    result = run_ingestion(market_limit=6, trades_per_market=10, winning_market_limit=4, engine=engine)
+    elapsed = time.perf_counter() - start
+    # markets -> trades-by-market -> token fallback is three requests deep.
+    assert elapsed < slow_upstream * 3 + 0.4
+    assert len(result.markets) == 6
+    # 3 even markets with one trade, 3 odd markets with one trade per token.
+    assert len(result.trades) == 3 + 3 * 2
+    assert set(result.trades.strings("market")) == {f"m{i}" for i in range(6)}
+    assert len(result.winning_trades) == 4
+
+
+@pytest.mark.unit
+def test_request_deadline_drops_slow_calls(monkeypatch):
+    monkeypatch.setattr(polymarket, "fetch_markets_conditional", lambda limit=50: ([_market(0)], True))
+    monkeypatch.setattr(polymarket, "fetch_closed_markets", lambda limit=20: [])
+    monkeypatch.setattr(polymarket, "iter_trades_for_market", lambda market_id, limit=200: time.sleep(1) or [])
+    monkeypatch.setattr(polymarket, "iter_trades_for_token", lambda token_id, limit=200: [_trade(token_id)])
+    engine = IngestionEngine(deadline_seconds=0.1)
+    start = time.perf_counter()
+    result = run_ingestion(market_limit=1, engine=engine)
+    assert time.perf_counter() - start < 0.9
+    assert len(result.trades) == 2
+
+
+@pytest.mark.unit
+def test_host_concurrency_is_bounded(monkeypatch):
+    import threading
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def fetch_trades_for_market(market_id, limit=200):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+        return [_trade(market_id)]
+
+    monkeypatch.setattr(polymarket, "fetch_markets_conditional", lambda limit=50: ([_market(i) for i in range(limit)], True))
+    monkeypatch.setattr(polymarket, "fetch_closed_markets", lambda limit=20: [])
+    monkeypatch.setattr(polymarket, "iter_trades_for_market", fetch_trades_for_market)
+    run_ingestion(market_limit=12, engine=IngestionEngine(concurrency=32, host_concurrency=3))
+    assert active["peak"] == 3
+
+
+@pytest.mark.unit
+def test_cursor_stops_paging_at_seen_trade(monkeypatch):
+    from whale import normalize_trade
+    # 120 trades newest first, one second apart.
+    history = [
+        {"id": f"t{i}", "price": 0.5, "size": 10, "maker_address": "0xabc", "timestamp": 1700000000 - i}
+        for i in range(120)
+    ]
+    calls = []
+
+    def fetch_trades_for_market(market_id, limit=200, offset=0):
+        calls.append((limit, offset))
+        return history[offset:offset + limit]
+
+    def fetch_trades_for_token(token_id, limit=200, offset=0):
+        raise AssertionError("token fallback must not run when the market has trades")
+
+    monkeypatch.setattr(polymarket, "fetch_markets_conditional", lambda limit=50: ([_market(0)], True))
+    monkeypatch.setattr(polymarket, "fetch_closed_markets", lambda limit=20: [])
+    monkeypatch.setattr(polymarket, "iter_trades_for_market", fetch_trades_for_market)
+    monkeypatch.setattr(polymarket, "iter_trades_for_token", fetch_trades_for_token)
+
+    seen = normalize_trade(_market(0), history[70])
+    cursors = {"market:m0": (seen["timestamp"], seen["id"])}
+    result = run_ingestion(market_limit=1, cursors=cursors, engine=IngestionEngine(page_size=50))
+    assert result.trades.ids == [f"t{i}" for i in range(70)]
+    assert calls == [(50, 0), (50, 50)]
+    assert result.cursors["market:m0"][1] == "t0"
+
+    calls.clear()
+    result = run_ingestion(market_limit=1, cursors=result.cursors, engine=IngestionEngine(page_size=50))
+    assert len(result.trades) == 0
+    assert result.cursors == {}
+    assert calls == [(50, 0)]
+
+
+@pytest.mark.unit
+def test_failed_page_keeps_cursor(monkeypatch):
+    from whale import normalize_trade
+    history = [
+        {"id": f"t{i}", "price": 0.5, "size": 10, "maker_address": "0xabc", "timestamp": 1700000000 - i}
+        for i in range(121)
+    ]
+
+    def fetch_trades_for_market(market_id, limit=200, offset=0):
+        if offset == 50:
+            raise ConnectionError("reset by peer")
+        return history[offset:offset + limit]
+
+    monkeypatch.setattr(polymarket, "fetch_markets_conditional", lambda limit=50: ([_market(0)], True))
+    monkeypatch.setattr(polymarket, "fetch_closed_markets", lambda limit=20: [])
+    monkeypatch.setattr(polymarket, "iter_trades_for_market", fetch_trades_for_market)
+
+    seen = normalize_trade(_market(0), history[120])
+    cursors = {"market:m0": (seen["timestamp"], seen["id"])}
+    result = run_ingestion(market_limit=1, cursors=cursors, engine=IngestionEngine(page_size=50))
+    # The first page still lands; t50..t119 were never read, so the cursor
+    # must not move past them.
+    assert result.trades.ids == [f"t{i}" for i in range(50)]
+    assert "market:m0" not in result.cursors
+
+
+@pytest.mark.unit
+def test_sink_receives_bounded_batches(monkeypatch):
+    monkeypatch.setattr(polymarket, "fetch_markets_conditional", lambda limit=50: ([_market(i) for i in range(limit)], True))
+    monkeypatch.setattr(polymarket, "fetch_closed_markets", lambda limit=20: [])
+    monkeypatch.setattr(
+        polymarket, "iter_trades_for_market",
+        lambda market_id, limit=200: iter([dict(_trade(market_id), id=f"{market_id}-{i}") for i in range(limit)])
+    )
+    batches = []
+    engine = IngestionEngine(batch_size=25)
+    result = run_ingestion(market_limit=8, trades_per_market=10, engine=engine, sink=batches.append)
+    assert len(result.trades) == 0
+    assert sum(len(batch) for batch in batches) == 80
+    # A batch flushes once it reaches the threshold, so it never holds more
+    # than one market's page beyond it.
+    assert all(len(batch) < 25 + 10 for batch in batches)
+    assert len({trade_id for batch in batches for trade_id in batch.ids}) == 80
@@ -0,0 +1,77 @@
+import sqlite3
+
+import pytest
+
+import app.database as app_db
+from app import engine as db_engine
+from app.migrations import MIGRATIONS, Migration, applied_versions, explain_hot_queries, run_migrations
+
+
+@pytest.fixture
+def conn(tmp_path):
+    previous = db_engine.database_url()
+    db_engine.configure(f"sqlite:///{tmp_path / 'migrations.db'}")
+    connection = app_db.get_db_connection()
+    yield connection
+    connection.close()
+    db_engine.configure(previous)
+
+
+def _indexes(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")
+    return {row["name"] for row in cursor.fetchall()}
+
+
+@pytest.mark.unit
+def test_migrations_apply_once(conn):
+    versions = [migration.version for migration in MIGRATIONS]
+    assert run_migrations(conn) == versions
+    assert run_migrations(conn) == []
+    assert applied_versions(conn.cursor()) == set(versions)
+    assert {"idx_whale_trades_timestamp_id", "idx_whale_trades_value_id"} <= _indexes(conn)
+    assert "idx_whale_trades_timestamp" not in _indexes(conn)
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) AS count FROM entitlements")
+    assert cursor.fetchone()["count"] == 8
+
+
+@pytest.mark.unit
+def test_existing_database_is_adopted(conn):
+    # A database created before schema_migrations existed.
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE signals (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, "
+                   "content TEXT NOT NULL, tier_required TEXT NOT NULL DEFAULT 'free', evidence_json TEXT, "
+                   "created_at TEXT DEFAULT CURRENT_TIMESTAMP)")
+    cursor.execute("INSERT INTO signals (title, content) VALUES ('kept', 'row')")
+    conn.commit()
+    run_migrations(conn)
+    cursor.execute("SELECT title FROM signals")
+    assert [row["title"] for row in cursor.fetchall()] == ["kept"]
+    assert "idx_signals_created" in _indexes(conn)
+
+
+@pytest.mark.unit
+def test_failed_migration_rolls_back(conn):
+    run_migrations(conn)
+
+    def broken(cursor):
+        cursor.execute("CREATE INDEX idx_half_done ON signals (title)")
+        cursor.execute("SELECT * FROM missing_table")
+
+    with pytest.raises(sqlite3.OperationalError):
+        run_migrations(conn, MIGRATIONS + [Migration(99, "broken", broken)])
+    assert 99 not in applied_versions(conn.cursor())
+    assert "idx_half_done" not in _indexes(conn)
+
+
+@pytest.mark.unit
+def test_hot_queries_use_indexes(conn):
+    run_migrations(conn)
+    report = {row["name"]: row for row in explain_hot_queries(conn)}
+    assert report["whales_latest"]["indexes"] == ["idx_whale_trades_timestamp_id"]
+    assert report["whales_by_value"]["indexes"] == ["idx_whale_trades_value_id"]
+    assert report["recent_analytics_event"]["indexes"] == ["idx_analytics_events_user_event"]
+    assert report["fcm_tokens_for_user"]["indexes"] == ["idx_fcm_tokens_user"]
+    assert not report["whale_leaderboard"]["full_scan"]
+    assert not any(row["full_scan"] for row in report.values()), report
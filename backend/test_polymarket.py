@@ -0,0 +1,139 @@
+import pytest
+import polymarket
+from scripts.polymarket_stub import start_stub_server
+
+
+@pytest.fixture
+def listing_api(monkeypatch):
+    servers = []
+
+    def start(etag: bool = True):
+        server, base_url = start_stub_server(etag=etag)
+        servers.append(server)
+        monkeypatch.setattr(polymarket, "GAMMA_API", base_url)
+        return server.handler.requests_seen
+
+    monkeypatch.setenv("POLYMARKET_DATA_MODE", "live")
+    monkeypatch.setenv("POLYMARKET_PROXY_MODE", "direct")
+    monkeypatch.setenv("POLYMARKET_CACHE_FALLBACK", "0")
+    polymarket.reset_listing_cache()
+    yield start
+    polymarket.reset_listing_cache()
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.unit
+def test_unchanged_listing_revalidates_with_etag(listing_api):
+    seen = listing_api(etag=True)
+    first, first_changed = polymarket.fetch_markets_conditional(limit=3)
+    second, second_changed = polymarket.fetch_markets_conditional(limit=3)
+    assert first_changed is True
+    assert second_changed is False
+    assert second == first and len(first) == 3
+    assert "If-None-Match" not in seen[0][1]
+    assert seen[1][1]["If-None-Match"]
+
+
+@pytest.mark.unit
+def test_unchanged_listing_detected_by_content_hash(listing_api):
+    seen = listing_api(etag=False)
+    _, first_changed = polymarket.fetch_markets_conditional(limit=3)
+    data, second_changed = polymarket.fetch_markets_conditional(limit=3)
+    _, other_changed = polymarket.fetch_markets_conditional(limit=4)
+    assert first_changed is True
+    assert second_changed is False and len(data) == 3
+    assert other_changed is True
+    assert all("If-None-Match" not in headers for _, headers in seen)
+
+
+@pytest.mark.unit
+def test_stream_decoder_handles_chunk_boundaries():
+    import json
+    records = [{"id": f"t{i}", "note": "é" * (i % 4)} for i in range(40)]
+    for body in (json.dumps(records).encode(), json.dumps({"data": records}).encode()):
+        for size in (1, 7, 4096):
+            chunks = [body[i:i + size] for i in range(0, len(body), size)]
+            assert list(polymarket._iter_json_array(chunks)) == records
+    with pytest.raises(ValueError):
+        list(polymarket._iter_json_array([b'[{"id": 1}, {"id"']))
+
+
+@pytest.mark.unit
+def test_trades_stream_from_upstream(listing_api, monkeypatch):
+    listing_api()
+    monkeypatch.setattr(polymarket, "TRADES_API", f"{polymarket.GAMMA_API}/trades")
+    monkeypatch.setattr(polymarket, "STREAM_CHUNK_SIZE", 256)
+    stream = polymarket.iter_trades_for_market("stub-market-0", limit=30)
+    first = next(stream)
+    stream.close()
+    assert first["id"] == "stub-market-0-0"
+    assert len(polymarket.fetch_trades_for_market("stub-market-0", limit=30, offset=10)) == 30
+
+
+@pytest.mark.unit
+def test_stream_cut_off_midway_raises(monkeypatch):
+    import requests
+
+    class _Response:
+        def __init__(self, chunks):
+            self.chunks = chunks
+
+        def iter_content(self, size):
+            for chunk in self.chunks:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+
+        def close(self):
+            pass
+
+    reset = requests.exceptions.ChunkedEncodingError("connection reset")
+    monkeypatch.setenv("POLYMARKET_DATA_MODE", "live")
+    monkeypatch.setattr(polymarket, "_request_get", lambda *a, **kw: _Response([b'[{"id": "t0"}, {"id": "t1"}, ', reset]))
+    stream = polymarket.iter_trades_for_token("tok", limit=50)
+    assert [next(stream)["id"], next(stream)["id"]] == ["t0", "t1"]
+    # Not a complete two-record page.
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        next(stream)
+
+    # Failing before the first record still falls back.
+    monkeypatch.setattr(polymarket, "_request_get", lambda *a, **kw: _Response([reset]))
+    assert polymarket.fetch_trades_for_token("tok", limit=50) == []
+
+
+@pytest.mark.unit
+def test_stream_decoder_waits_for_delimiter_after_scalars():
+    # "12" would decode on its own; it's the start of 125.
+    assert list(polymarket._iter_json_array([b"[1, 12", b"5, 7]"])) == [1, 125, 7]
+    assert list(polymarket._iter_json_array([b'[{"a": 1}', b"]"])) == [{"a": 1}]
+    with pytest.raises(ValueError):
+        list(polymarket._iter_json_array([b"[1, 12"]))
+
+
+@pytest.mark.unit
+def test_stopping_a_stream_early_keeps_the_connection_for_short_bodies(listing_api, monkeypatch):
+    import app.http_client as http_client
+
+    listing_api()
+    monkeypatch.setattr(polymarket, "TRADES_API", f"{polymarket.GAMMA_API}/trades")
+    monkeypatch.setattr(polymarket, "STREAM_CHUNK_SIZE", 256)
+    http_client.reset_http_client()
+
+    def read_first(limit):
+        stream = polymarket.iter_trades_for_market("stub-market-0", limit=limit)
+        next(stream)
+        stream.close()
+
+    try:
+        read_first(20)
+        read_first(20)
+        assert http_client.get_pool_stats()["127.0.0.1"]["handshakes"] == 1
+        # Too much left to drain: the connection is dropped instead.
+        monkeypatch.setattr(polymarket, "STREAM_DRAIN_MAX_BYTES", 512)
+        read_first(200)
+        read_first(20)
+        assert http_client.get_pool_stats()["127.0.0.1"]["handshakes"] == 2
+    finally:
+        http_client.reset_http_client()
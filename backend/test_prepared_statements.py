@@ -0,0 +1,95 @@
+import psycopg2.errors
+import pytest
+
+import app.database as app_db
+from app import engine as db_engine
+
+
+@pytest.fixture
+def users_db(tmp_path):
+    previous = db_engine.database_url()
+    db_engine.configure(f"sqlite:///{tmp_path / 'users.db'}")
+    app_db.init_db()
+    yield
+    db_engine.configure(previous)
+
+
+class _FakeCursor:
+    def __init__(self, failures=()):
+        self.executed = []
+        self.failures = list(failures)
+
+    def execute(self, query, params=()):
+        self.executed.append(query)
+        if self.failures and query.startswith("EXECUTE"):
+            raise self.failures.pop(0)
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.info = {}
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.mark.unit
+def test_statement_forms():
+    stmt = app_db.statement("probe", """
+        SELECT * FROM t
+        WHERE a = ? AND b < ?
+    """)
+    assert stmt.sqlite == "SELECT * FROM t WHERE a = ? AND b < ?"
+    assert stmt.postgres == "SELECT * FROM t WHERE a = %s AND b < %s"
+    assert stmt.prepare == "PREPARE probe AS SELECT * FROM t WHERE a = $1 AND b < $2"
+    assert stmt.execute == "EXECUTE probe (%s, %s)"
+    assert app_db.STATEMENTS["probe"] is stmt
+    assert app_db.statement("noargs", "SELECT 1").execute == "EXECUTE noargs"
+
+
+@pytest.mark.unit
+def test_postgres_prepares_once_per_connection(monkeypatch):
+    monkeypatch.setattr(app_db, "IS_POSTGRES", True)
+    stmt = app_db.statement("probe_once", "SELECT * FROM t WHERE a = ?")
+    conn, cursor = _FakeConnection(), _FakeCursor()
+    app_db.execute_prepared(conn, cursor, stmt, (1,))
+    app_db.execute_prepared(conn, cursor, stmt, (2,))
+    assert cursor.executed == [stmt.prepare, stmt.execute, stmt.execute]
+
+    other = _FakeCursor()
+    app_db.execute_prepared(_FakeConnection(), other, stmt, (3,))
+    assert other.executed == [stmt.prepare, stmt.execute]
+
+
+@pytest.mark.unit
+def test_postgres_reprepares_lost_statements(monkeypatch):
+    monkeypatch.setattr(app_db, "IS_POSTGRES", True)
+    stmt = app_db.statement("probe_lost", "SELECT * FROM t WHERE a = ?")
+    conn = _FakeConnection()
+    app_db.execute_prepared(conn, _FakeCursor(), stmt, (1,))
+    cursor = _FakeCursor([psycopg2.errors.InvalidSqlStatementName()])
+    app_db.execute_prepared(conn, cursor, stmt, (2,))
+    assert cursor.executed == [stmt.execute, "DEALLOCATE ALL", stmt.prepare, stmt.execute]
+    assert conn.rollbacks == 1
+    assert conn.info["prepared_statements"] == {"probe_lost"}
+
+
+@pytest.mark.unit
+def test_prepared_lookups_on_sqlite(users_db):
+    user_id = app_db.create_user("prepared@example.com", "hash")
+    assert app_db.get_user_by_email("prepared@example.com")["id"] == user_id
+    assert app_db.get_user_by_email("missing@example.com") is None
+
+    app_db.set_user_entitlements(user_id, "pro", "2025-01-01", "2026-01-01")
+    assert app_db.get_latest_user_entitlement(user_id)["tier"] == "pro"
+
+    assert app_db.get_notification_settings(user_id) == {"push_enabled": True}
+    app_db.set_notification_settings(user_id, False)
+    assert app_db.get_notification_settings(user_id) == {"push_enabled": False}
+
+    app_db.upsert_fcm_token(user_id, "token-1")
+    assert app_db.get_fcm_tokens_for_user(user_id) == ["token-1"]
+
+    signal_id = app_db.create_signal("Title", "body", "free")
+    assert app_db.get_signal_by_id(signal_id)["title"] == "Title"
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+import app.database as app_db
+from app import engine as db_engine
+from app.query_profiler import QueryProfiler, fingerprint, recent_query_stats
+
+
+@pytest.fixture
+def conn(tmp_path):
+    previous = db_engine.database_url()
+    db_engine.configure(f"sqlite:///{tmp_path / 'profile.db'}")
+    app_db.init_db()
+    connection = app_db.get_db_connection()
+    yield connection
+    connection.close()
+    db_engine.configure(previous)
+
+
+@pytest.mark.unit
+def test_fingerprint_normalises_literals_and_placeholders():
+    assert fingerprint("SELECT * FROM users WHERE email = 'a@b.c' AND id = 42") == (
+        "select * from users where email = ? and id = ?"
+    )
+    assert fingerprint("SELECT *\n  FROM users WHERE id = %s") == fingerprint("select * from users where id = ?")
+    assert fingerprint("SELECT * FROM t WHERE id IN (?, ?, ?)") == fingerprint("SELECT * FROM t WHERE id IN ($1, $2)")
+    assert fingerprint("SELECT col1 FROM t2") == "select col1 from t2"
+
+
+@pytest.mark.unit
+def test_record_aggregates_by_fingerprint():
+    profiler = QueryProfiler(enabled=True)
+    for duration in (0.0005, 0.003, 0.003, 0.2):
+        profiler.record("SELECT * FROM signals WHERE id = ?", duration)
+    profiler.record("SELECT * FROM signals WHERE id = %s", 0.001)
+    profiler.record("CREATE INDEX x ON t (a)", 1.0)
+    profiler.record("INSERT INTO query_stats VALUES (?)", 1.0)
+
+    [row] = profiler.snapshot()
+    assert row["calls"] == 5
+    assert row["total_ms"] == pytest.approx(207.5)
+    assert row["max_ms"] == pytest.approx(200.0)
+    assert row["p50_ms"] == 5
+    assert row["p95_ms"] == pytest.approx(200.0)
+    assert row["slow_calls"] == 1
+    assert sum(row["histogram"].values()) == 5
+    assert profiler.snapshot(min_avg_ms=100) == []
+
+
+@pytest.mark.unit
+def test_disabled_profiler_records_nothing():
+    profiler = QueryProfiler(enabled=False)
+    profiler.record("SELECT 1", 0.5)
+    assert profiler.snapshot() == []
+
+
+@pytest.mark.unit
+def test_flush_writes_one_row_per_fingerprint(conn):
+    profiler = QueryProfiler(enabled=True)
+    for _ in range(3):
+        profiler.record("SELECT * FROM signals WHERE id = ?", 0.002)
+    profiler.record("SELECT * FROM alerts", 0.03)
+
+    assert profiler.flush(conn) == 2
+    assert profiler.flush(conn) == 0
+    cursor = conn.cursor()
+    cursor.execute("SELECT fingerprint, calls, histogram FROM query_stats ORDER BY calls DESC")
+    rows = cursor.fetchall()
+    assert [(row["fingerprint"], row["calls"]) for row in rows] == [
+        ("select * from signals where id = ?", 3),
+        ("select * from alerts", 1),
+    ]
+    assert sum(json.loads(rows[0]["histogram"])) == 3
+
+    profiler.record("SELECT * FROM alerts", 0.01)
+    profiler.flush(conn)
+    stats = recent_query_stats(conn)
+    assert [(row["fingerprint"], row["calls"]) for row in stats] == [
+        ("select * from alerts", 2),
+        ("select * from signals where id = ?", 3),
+    ]
+    # Totals since start survive flushing.
+    assert {row["calls"] for row in profiler.snapshot()} == {3, 2}
+
+
+@pytest.mark.unit
+def test_failed_flush_keeps_pending_stats(conn):
+    profiler = QueryProfiler(enabled=True)
+    profiler.record("SELECT * FROM alerts", 0.01)
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE query_stats")
+    conn.commit()
+    assert profiler.flush(conn) == 0
+    cursor.execute("CREATE TABLE query_stats (fingerprint TEXT, sample_query TEXT, calls INTEGER, total_ms REAL, "
+                   "max_ms REAL, histogram TEXT, flushed_at TEXT)")
+    conn.commit()
+    profiler.record("SELECT * FROM alerts", 0.01)
+    assert profiler.flush(conn) == 1
+    cursor.execute("SELECT calls FROM query_stats")
+    assert cursor.fetchone()["calls"] == 2
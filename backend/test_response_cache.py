@@ -0,0 +1,184 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+import app.response_cache as response_cache
+from app.cache import LocalCache, RedisCache, Serializer, TieredCache
+
+
+class _OfflineRedis(RedisCache):
+    def __init__(self):
+        self.redis_client = None
+        self.serializer = Serializer()
+
+
+class _BusyRedis(_OfflineRedis):
+    """Another worker holds every lock."""
+
+    def acquire_lock(self, name, ttl_seconds=30):
+        return None
+
+
+@pytest.fixture
+def tiered(monkeypatch):
+    cache = TieredCache(_OfflineRedis(), LocalCache(), local_prefixes=("api_cache:",), channel="invalidate")
+    monkeypatch.setattr(response_cache, "cache", cache)
+    return cache
+
+
+def _slow_builder(calls, value, delay=0.2):
+    def build():
+        calls.append(threading.current_thread().name)
+        time.sleep(delay)
+        return value
+    return build
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.mark.unit
+def test_concurrent_misses_build_once(tiered):
+    calls = []
+    builder = _slow_builder(calls, {"n": 1})
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(response_cache.cached_call("api_cache:x:1", 30, builder)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [{"n": 1}] * 8
+
+
+@pytest.mark.unit
+def test_stale_entry_is_served_while_one_refresh_runs(tiered):
+    key = "api_cache:x:stale"
+    tiered.set_entry(key, "old", ttl_seconds=0)
+    calls = []
+    builder = _slow_builder(calls, "new")
+
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        assert response_cache.cached_call(key, 30, builder) == "old"
+        timings.append(time.perf_counter() - start)
+    assert max(timings) < 0.1
+
+    assert _wait_for(lambda: response_cache.cached_call(key, 30, builder) == "new")
+    assert len(calls) == 1
+    assert calls[0].startswith("cache-refresh")
+
+
+@pytest.mark.unit
+def test_failed_refresh_keeps_serving_stale(tiered):
+    key = "api_cache:x:broken"
+    tiered.set_entry(key, "old", ttl_seconds=0)
+
+    def broken():
+        raise RuntimeError("db down")
+
+    assert response_cache.cached_call(key, 30, broken) == "old"
+    assert _wait_for(lambda: key not in response_cache._refreshing)
+    assert response_cache.cached_call(key, 30, broken) == "old"
+
+
+@pytest.mark.unit
+def test_locked_key_waits_for_other_worker(monkeypatch):
+    cache = TieredCache(_BusyRedis(), LocalCache(), local_prefixes=("api_cache:",), channel="invalidate")
+    monkeypatch.setattr(response_cache, "cache", cache)
+    monkeypatch.setattr(response_cache, "CACHE_LOCK_WAIT_SECONDS", 1.0)
+    key = "api_cache:x:remote"
+    threading.Timer(0.1, lambda: cache.set_entry(key, "theirs", 30)).start()
+    assert response_cache.cached_call(key, 30, lambda: "ours") == "theirs"
+
+    monkeypatch.setattr(response_cache, "CACHE_LOCK_WAIT_SECONDS", 0.1)
+    assert response_cache.cached_call("api_cache:x:gone", 30, lambda: "ours") == "ours"
+
+
+@pytest.mark.unit
+def test_async_misses_build_once_and_refresh_in_background(tiered):
+    calls = []
+
+    async def build():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return len(calls)
+
+    async def scenario():
+        first = await asyncio.gather(*(response_cache.cached_call_async("api_cache:y:1", 30, build) for _ in range(6)))
+        tiered.set_entry("api_cache:y:1", "old", ttl_seconds=0)
+        stale = await asyncio.gather(*(response_cache.cached_call_async("api_cache:y:1", 30, build) for _ in range(6)))
+        await asyncio.gather(*response_cache._refresh_tasks)
+        fresh = await response_cache.cached_call_async("api_cache:y:1", 30, build)
+        return first, stale, fresh
+
+    first, stale, fresh = asyncio.run(scenario())
+    assert first == [1] * 6
+    assert stale == ["old"] * 6
+    assert fresh == 2
+    assert len(calls) == 2
+
+
+@pytest.mark.unit
+def test_async_flights_are_per_event_loop(tiered):
+    started = threading.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(0.3)
+        return "slow loop"
+
+    async def fast():
+        return "other loop"
+
+    other = threading.Thread(target=lambda: asyncio.run(response_cache.cached_call_async("api_cache:z:1", 30, slow)))
+    other.start()
+    assert started.wait(1)
+    # The other loop's in-flight future can't be awaited here.
+    assert asyncio.run(response_cache.cached_call_async("api_cache:z:1", 30, fast)) == "other loop"
+    other.join()
+
+
+@pytest.mark.unit
+def test_render_body_matches_fastapi_json():
+    from typing import List, Optional
+
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import BaseModel, Field
+
+    class Item(BaseModel):
+        id: int
+        label: Optional[str] = None
+        created: str = Field(alias="createdAt")
+
+    value = [{"id": 1, "createdAt": "2025-01-01", "extra": "dropped"}, {"id": 2, "label": "é", "createdAt": "x"}]
+    rendered = response_cache.render_body(value, List[Item], {"X-Next-Cursor": "abc"})
+    expected = jsonable_encoder([Item.model_validate(row) for row in value], by_alias=True)
+    assert json.loads(rendered["body"]) == expected
+    assert rendered["headers"] == {"X-Next-Cursor": "abc"}
+    assert rendered["etag"] == response_cache.render_body(value, List[Item])["etag"]
+
+    plain = response_cache.render_body({"a": [1, 2.5, None], "b": "é"})
+    assert plain["body"] == '{"a":[1,2.5,null],"b":"é"}'
+
+
+@pytest.mark.unit
+def test_etag_matching():
+    etag = '"abc"'
+    assert response_cache._etag_matches('"abc"', etag)
+    assert response_cache._etag_matches('W/"abc"', etag)
+    assert response_cache._etag_matches('"zzz", "abc-gzip"', etag)
+    assert response_cache._etag_matches("*", etag)
+    assert not response_cache._etag_matches('"abcd"', etag)
+    assert not response_cache._etag_matches(None, etag)
@@ -0,0 +1,144 @@
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.smart_money_enhanced import TREND_PERIODS, EnhancedSmartMoneyAnalyzer, trade_columns, window_totals
+from app.timestamps import TimestampParser
+
+
+def _reference_metrics(analyzer, trades):
+    # The per-trade implementation the vectorised engine replaced.
+    data = defaultdict(lambda: {'times': [], 'total_volume': 0.0, 'recent_volume': 0.0,
+                                'win_count': 0, 'recent_win_count': 0})
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    cutoff = now - timedelta(hours=24)
+    timestamps = TimestampParser()
+    for trade in trades:
+        address = trade.get('address', '')
+        if not address:
+            continue
+        trade_time = timestamps.parse(trade.get('timestamp'), now)
+        value = float(trade.get('value', 0))
+        is_win = trade.get('is_winning', False)
+        row = data[address]
+        row['times'].append(trade_time)
+        row['total_volume'] += value
+        if trade_time >= cutoff:
+            row['recent_volume'] += value
+            if is_win:
+                row['recent_win_count'] += 1
+        if is_win:
+            row['win_count'] += 1
+    results = []
+    for address, row in data.items():
+        total_trades = len(row['times'])
+        if total_trades < analyzer.min_trades_threshold or row['total_volume'] < analyzer.min_volume_threshold:
+            continue
+        win_rate = row['win_count'] / total_trades
+        recent_count = sum(1 for ts in row['times'] if ts >= cutoff)
+        recent_win_rate = row['recent_win_count'] / recent_count if recent_count else win_rate
+        combined = analyzer.recency_weight * recent_win_rate + (1 - analyzer.recency_weight) * win_rate
+        if row['recent_volume'] > 0 and row['total_volume'] > 0:
+            consistency = min(row['recent_volume'] / row['total_volume'] * 5, 1.0)
+        else:
+            consistency = 0.5
+        results.append({
+            'address': address,
+            'total_trades': total_trades,
+            'total_volume': row['total_volume'],
+            'recent_volume': row['recent_volume'],
+            'win_rate': win_rate,
+            'recent_win_rate': recent_win_rate,
+            'combined_win_rate': combined,
+            'confidence_score': combined * consistency,
+            'win_count': row['win_count'],
+            'recent_win_count': row['recent_win_count']
+        })
+    results.sort(key=lambda x: x['confidence_score'], reverse=True)
+    return results
+
+
+def _reference_trend(address, trades):
+    owned = [t for t in trades if t.get('address') == address]
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    timestamps = TimestampParser()
+    times = [timestamps.parse(t.get('timestamp'), now) for t in owned]
+    trend = {}
+    for period, delta in (('24h', timedelta(hours=24)), ('7d', timedelta(days=7)), ('30d', timedelta(days=30))):
+        window = [t for t, ts in zip(owned, times) if ts >= now - delta]
+        if window:
+            wins = sum(1 for t in window if t.get('is_winning', False))
+            trend[period] = {
+                'trades': len(window),
+                'win_rate': wins / len(window),
+                'total_volume': sum(float(t.get('value', 0)) for t in window),
+                'win_count': wins
+            }
+    return trend
+
+
+def _trades(count, seed=3):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    layouts = [
+        lambda dt: dt.isoformat() + "Z",
+        lambda dt: dt.replace(tzinfo=timezone.utc).isoformat(),
+        lambda dt: int((dt - datetime(1970, 1, 1)).total_seconds()),
+        lambda dt: dt,
+    ]
+    trades = []
+    for i in range(count):
+        # Half-hour offsets keep every trade clear of the window cutoffs.
+        when = (now - timedelta(hours=rng.randrange(24 * 40), minutes=30)).replace(microsecond=0)
+        trades.append({
+            # 0xrare stays under the trade-count threshold.
+            'address': "0xrare" if i % 150 == 0 else rng.choice(["", "0xa", "0xb", "0xc", "0xd", "0xe", "0xf"]),
+            'value': rng.choice([50.0, 800.0, 2500.0, "1200.5"]),
+            'is_winning': rng.random() < 0.4,
+            'timestamp': layouts[i % len(layouts)](when) if i % 97 else "not a time"
+        })
+    return trades
+
+
+@pytest.mark.unit
+def test_metrics_match_reference():
+    analyzer = EnhancedSmartMoneyAnalyzer()
+    analyzer.min_volume_threshold = 20000.0
+    trades = _trades(600)
+    expected = _reference_metrics(analyzer, trades)
+    assert 0 < len(expected) < 7
+    assert analyzer.calculate_enhanced_metrics(trades) == expected
+
+
+@pytest.mark.unit
+def test_trend_matches_reference():
+    analyzer = EnhancedSmartMoneyAnalyzer()
+    trades = _trades(600)
+    for address in ["0xa", "0xd", "0xmissing"]:
+        trend = analyzer.get_performance_trend(address, trades)
+        expected = _reference_trend(address, trades)
+        assert trend.keys() == expected.keys()
+        for period, row in expected.items():
+            assert trend[period] == pytest.approx(row)
+
+
+@pytest.mark.unit
+def test_empty_inputs():
+    analyzer = EnhancedSmartMoneyAnalyzer()
+    assert analyzer.calculate_enhanced_metrics([]) == []
+    assert analyzer.calculate_enhanced_metrics([{'address': '', 'value': 1}]) == []
+    assert analyzer.get_performance_trend("0xa", []) == {}
+
+
+@pytest.mark.unit
+def test_epoch_fast_path_matches_parser():
+    now = datetime(2026, 1, 10, 12, 0, 0)
+    times = [now - timedelta(hours=h, seconds=7) for h in (1, 30, 200, 900)]
+    epochs = [int((t - datetime(1970, 1, 1)).total_seconds()) for t in times]
+    as_ints = trade_columns([{'address': '0xa', 'timestamp': e} for e in epochs], now)
+    as_text = trade_columns([{'address': '0xa', 'timestamp': t.isoformat() + "Z"} for t in times], now)
+    assert as_ints.timestamp.tolist() == as_text.timestamp.tolist()
+    counts, _, _ = window_totals(as_ints, [now - period for _, period in TREND_PERIODS])
+    assert counts.tolist() == [[1, 2, 3]]
@@ -0,0 +1,116 @@
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import SmartWallet, Trade, WalletStats
+from smartmoney import add_wallet_trades, reconcile_wallet_stats, update_smart_wallets
+from trade_batch import TradeBatch, TradeBatchBuilder, insert_trades, new_trades
+
+MARKET = {"id": "m1", "question": "Q1?"}
+
+
+def _batch(start: int, count: int, wallets: int = 5) -> TradeBatch:
+    builder = TradeBatchBuilder()
+    for i in range(start, start + count):
+        builder.append(MARKET, {
+            "id": f"t{i}",
+            "price": 0.1 + (i % 9) * 0.1,
+            "size": 10 * (i % 13 + 1),
+            "side": "BUY",
+            "proxyWallet": f"0x{i % wallets}",
+            "timestamp": 1700000000 + i
+        })
+    return builder.build()
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def _ingest(session, batch: TradeBatch, winners: TradeBatch):
+    fresh = new_trades(session, batch)
+    insert_trades(session, fresh)
+    changed = add_wallet_trades(session, fresh)
+    update_smart_wallets(session, winners, changed=changed)
+    session.commit()
+    return changed
+
+
+def _full_recompute(session, winners: TradeBatch):
+    wins = {}
+    for trade in winners.to_dicts():
+        count, value = wins.get(trade["address"], (0, 0.0))
+        wins[trade["address"]] = (count + 1, value + trade["value"])
+    expected = {}
+    rows = session.query(Trade.address, func.count(Trade.id), func.sum(Trade.value)).group_by(Trade.address)
+    for address, total_trades, total_value in rows:
+        wins_count, profit = wins.get(address, (0, 0.0))
+        expected[address] = (profit, profit / total_value, wins_count / total_trades, total_trades)
+    return expected
+
+
+def _wallets(session):
+    return {
+        row.address: (row.profit, row.roi, row.win_rate, row.total_trades)
+        for row in session.query(SmartWallet)
+    }
+
+
+@pytest.mark.unit
+def test_incremental_matches_full_recompute(session):
+    winners = _batch(1000, 12, wallets=3)
+    _ingest(session, _batch(0, 40), winners)
+    # Overlapping page: half the trades are already stored.
+    _ingest(session, _batch(20, 40), winners)
+    later_winners = _batch(2000, 6, wallets=2)
+    _ingest(session, _batch(60, 10), later_winners)
+
+    expected = _full_recompute(session, later_winners)
+    wallets = _wallets(session)
+    assert set(wallets) == set(expected)
+    for address, row in expected.items():
+        assert wallets[address] == pytest.approx(row)
+
+
+@pytest.mark.unit
+def test_only_changed_addresses_are_rescored(session):
+    winners = _batch(1000, 4, wallets=2)
+    _ingest(session, _batch(0, 20), winners)
+    session.query(SmartWallet).update({"profit": -1.0})
+    session.commit()
+
+    changed = _ingest(session, _batch(20, 1), winners)
+    assert changed == {"0x0"}
+    profits = {row.address: row.profit for row in session.query(SmartWallet)}
+    assert profits["0x0"] >= 0
+    assert all(profits[address] == -1.0 for address in profits if address != "0x0")
+
+
+@pytest.mark.unit
+def test_reconcile_repairs_drift(session):
+    winners = _batch(1000, 4, wallets=2)
+    _ingest(session, _batch(0, 20), winners)
+    # Double-counted trades, a lost row and a stale row.
+    add_wallet_trades(session, _batch(0, 5))
+    session.query(WalletStats).filter(WalletStats.address == "0x4").delete()
+    session.add(WalletStats(address="0xgone", total_trades=3, total_value=9.0))
+    session.commit()
+
+    assert reconcile_wallet_stats(session) == 6
+    session.commit()
+    assert reconcile_wallet_stats(session) == 0
+
+    expected = _full_recompute(session, TradeBatch.empty())
+    stats = {row.address: (row.total_trades, row.total_value) for row in session.query(WalletStats)}
+    assert set(stats) == set(expected)
+    for address, (_, _, _, total_trades) in expected.items():
+        assert stats[address][0] == total_trades
+    wallets = _wallets(session)
+    assert wallets["0x1"][3] == expected["0x1"][3]
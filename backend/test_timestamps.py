@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+import pytest
+from app.timestamps import TimestampParser, parse_timestamp, sniff_layout
+
+EXPECTED = datetime(2024, 3, 1, 12, 30, 15)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("value", [
+    1709296215,
+    1709296215.0,
+    "1709296215",
+    "2024-03-01T12:30:15Z",
+    "2024-03-01T12:30:15.000Z",
+    "2024-03-01T12:30:15+00:00",
+    "2024-03-01T14:30:15+02:00",
+    "2024-03-01 12:30:15",
+    datetime(2024, 3, 1, 12, 30, 15, tzinfo=timezone.utc),
+])
+def test_layouts_normalise_to_naive_utc(value):
+    assert TimestampParser().parse(value) == EXPECTED
+
+
+@pytest.mark.unit
+def test_parser_resniffs_when_layout_changes():
+    parser = TimestampParser()
+    values = ["2024-03-01T12:30:15Z", 1709296215, "2024-03-01T12:30:15+00:00", "1709296215", "2024-03-01T12:30:15"]
+    assert [parser.parse(v) for v in values] == [EXPECTED] * len(values)
+    # A naive ISO string must never be taken for the Z layout with its last digit cut off.
+    parser = TimestampParser()
+    parser.parse("2024-03-01T12:30:15Z")
+    assert parser.parse("2024-03-01T12:30:10") == datetime(2024, 3, 1, 12, 30, 10)
+
+
+@pytest.mark.unit
+def test_unparseable_values_return_default():
+    fallback = datetime(2000, 1, 1)
+    parser = TimestampParser()
+    assert parser.parse(None) is None
+    assert parser.parse("", fallback) == fallback
+    assert parser.parse("not a date", fallback) == fallback
+    assert parser.parse(True, fallback) == fallback
+    assert sniff_layout(object()) is None
+    assert parse_timestamp("2024-03-01T12:30:15Z") == EXPECTED
+
+
+@pytest.mark.unit
+def test_memo_is_bounded():
+    parser = TimestampParser(memo_size=4)
+    for offset in range(10):
+        assert parser.parse(1709296215 + offset) is not None
+    assert len(parser._memo) <= 4
+
+
+@pytest.mark.unit
+def test_generic_iso_layout_does_not_swallow_other_layouts():
+    parser = TimestampParser()
+    assert parser.parse("2024-03-01 12:30:15") == EXPECTED
+    assert parser.parse("1709296215") == EXPECTED
+    assert parser.parse("2024-03-01T12:30:15Z") == EXPECTED
@@ -0,0 +1,144 @@
+from datetime import datetime
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import Trade, Whale, SmartWallet
+from smartmoney import add_wallet_trades, update_smart_wallets
+from trade_batch import TradeBatch, TradeBatchBuilder, insert_trades, insert_whales, new_trades, whale_mask
+from whale import detect_whales, normalize_trade
+
+
+def _raw_trades(count: int):
+    return [
+        {
+            "id": f"t{i}",
+            "price": 0.25 + (i % 3) * 0.25,
+            "size": 500 * (i % 7),
+            "side": "BUY" if i % 2 else "SELL",
+            "proxyWallet": f"0x{i % 4}",
+            "timestamp": 1700000000 + i * 61
+        }
+        for i in range(count)
+    ]
+
+
+def _markets():
+    return [{"id": "m1", "question": "Q1?"}, {"id": "m2", "question": "Q2?"}]
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def _batches():
+    raw = _raw_trades(40)
+    markets = _markets()
+    dicts = [normalize_trade(markets[i % 2], trade) for i, trade in enumerate(raw)]
+    builders = [TradeBatchBuilder(), TradeBatchBuilder()]
+    for i, trade in enumerate(raw):
+        builders[i % 2].append(markets[i % 2], trade)
+    return dicts, TradeBatch.concat([builder.build() for builder in builders])
+
+
+@pytest.mark.unit
+def test_batch_matches_normalized_dicts():
+    dicts, batch = _batches()
+    by_id = {trade["id"]: trade for trade in dicts}
+    assert len(batch) == len(dicts)
+    assert all(by_id[trade["id"]] == trade for trade in batch.to_dicts())
+    assert batch.latest() == (datetime.utcfromtimestamp(1700000000 + 39 * 61), "t39")
+
+
+@pytest.mark.unit
+def test_whale_mask_matches_detect_whales():
+    dicts, batch = _batches()
+    expected = {whale["trade_id"] for whale in detect_whales(dicts, min_value=1000)}
+    assert set(batch.take(whale_mask(batch, 1000)).ids) == expected
+    assert whale_mask(batch, 1000).dtype == np.bool_
+
+
+@pytest.mark.unit
+def test_bulk_insert_round_trips_through_orm(session):
+    dicts, batch = _batches()
+    assert insert_trades(session, batch) == len(batch)
+    assert insert_trades(session, batch) == 0
+    whales = insert_whales(session, batch, min_value=1000)
+    session.commit()
+
+    rows = {row.id: row for row in session.query(Trade).all()}
+    for trade in dicts:
+        row = rows[trade["id"]]
+        assert (row.market, row.question, row.address, row.side) == (
+            trade["market"], trade["question"], trade["address"], trade["side"]
+        )
+        assert (row.price, row.size, row.value, row.timestamp) == (
+            trade["price"], trade["size"], trade["value"], trade["timestamp"]
+        )
+        assert row.created_at is not None
+    assert whales == session.query(Whale).count() == len(detect_whales(dicts, min_value=1000))
+
+
+@pytest.mark.unit
+def test_smart_wallets_aggregate_from_batch(session):
+    dicts, batch = _batches()
+    insert_trades(session, batch)
+    changed = add_wallet_trades(session, batch)
+    update_smart_wallets(session, batch, changed=changed)
+    session.commit()
+    wallets = {row.address: row for row in session.query(SmartWallet).all()}
+    for address in {trade["address"] for trade in dicts}:
+        owned = [trade for trade in dicts if trade["address"] == address]
+        profit = sum(trade["value"] for trade in owned)
+        assert wallets[address].profit == pytest.approx(profit)
+        assert wallets[address].total_trades == len(owned)
+        assert wallets[address].win_rate == pytest.approx(1.0)
+
+
+@pytest.mark.unit
+def test_new_trades_drops_stored_and_repeated_ids(session):
+    _, batch = _batches()
+    insert_trades(session, batch.take(np.arange(10)))
+    doubled = TradeBatch.concat([batch, batch.take(np.arange(30, 40))])
+    fresh = new_trades(session, doubled)
+    assert fresh.ids == batch.ids[10:]
+    assert insert_trades(session, fresh) == len(fresh)
+
+
+@pytest.mark.unit
+def test_bulk_insert_binds_named_parameters_on_postgres():
+    from sqlalchemy.dialects import postgresql
+    from trade_batch import _compiled, _execute_columns
+
+    dialect = postgresql.psycopg2.dialect()
+    sql, names, positional = _compiled(Whale.__table__, "trade_id", dialect)
+    assert not positional
+    assert names == ("trade_id", "address", "value", "timestamp", "created_at")
+    assert "%(trade_id)s" in sql and "ON CONFLICT (trade_id) DO NOTHING" in sql
+    assert "RETURNING" not in sql
+
+    sent = []
+
+    class _Connection:
+        def __init__(self):
+            self.dialect = dialect
+
+        def exec_driver_sql(self, statement, rows):
+            sent.append((statement, rows))
+            return type("Result", (), {"rowcount": len(rows)})()
+
+    class _Session:
+        def connection(self):
+            return _Connection()
+
+    columns = {name: [f"{name}-1", f"{name}-2"] for name in names}
+    assert _execute_columns(_Session(), Whale.__table__, "trade_id", columns) == 2
+    assert sent[0][1][0] == {name: f"{name}-1" for name in names}
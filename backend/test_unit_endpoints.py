@@ -5,11 +5,12 @@ from datetime import datetime, timedelta, timezone
 import pytest
 from fastapi.testclient import TestClient
 import app.database as app_db
+from app import engine as db_engine
 
 os.environ["DISABLE_SCHEDULER"] = "1"
 os.environ["SEED_DEMO_DATA"] = "1"
 _temp_db = tempfile.NamedTemporaryFile(delete=False)
-app_db.DB_PATH = _temp_db.name
+db_engine.configure(f"sqlite:///{_temp_db.name}")
 app_db.init_db()
 
 import main as main_module
@@ -292,9 +293,18 @@ def test_api_whales_uses_session_rows():
             self.size = 100
             self.market = "market-1"
 
+    class _EmptyResult:
+        def mappings(self):
+            return self
+        def all(self):
+            return []
+
     class _FakeSession:
         def __init__(self, rows):
             self._rows = rows
+        def execute(self, *args, **kwargs):
+            # No whale_trades rows, so the endpoint falls back to the ORM whales.
+            return _EmptyResult()
         def query(self, *args, **kwargs):
             return self
         def join(self, *args, **kwargs):
@@ -487,3 +497,137 @@ def test_analytics_event():
     r = client.post("/analytics/event", json=payload)
     assert r.status_code == 200
     assert r.json().get("status") == "ok"
+
+
+def _walk(path, params, limit):
+    pages = []
+    cursor = None
+    while True:
+        query = dict(params, limit=limit)
+        if cursor:
+            query["cursor"] = cursor
+        r = client.get(path, params=query)
+        assert r.status_code == 200
+        pages.append(r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+
+@pytest.mark.unit
+def test_api_whales_cursor_pages_match_offset_order():
+    conn = app_db.get_db_connection()
+    cursor = conn.cursor()
+    # Shared timestamps and values exercise the id tiebreak.
+    cursor.executemany(
+        '''
+        INSERT INTO whale_trades (timestamp, maker_address, market_question, outcome, side, size, price, value_usd, market_slug)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''',
+        [(1700000000 + i // 3, f"0x{i}", "Q", "YES", "BUY", 10, 0.5, 1000.0 + i % 4, f"m{i}") for i in range(11)]
+    )
+    conn.commit()
+    conn.close()
+    try:
+        for sort in ("latest", "value"):
+            offset_rows = client.get("/api/whales", params={"limit": 50, "sort": sort}).json()
+            pages = _walk("/api/whales", {"sort": sort}, 4)
+            assert [len(page) for page in pages] == [4, 4, 3]
+            assert [row["trade_id"] for page in pages for row in page] == [row["trade_id"] for row in offset_rows]
+        r = client.get("/api/whales", params={"limit": 4, "cursor": "not-a-cursor"})
+        assert r.status_code == 400
+    finally:
+        conn = app_db.get_db_connection()
+        conn.cursor().execute("DELETE FROM whale_trades")
+        conn.commit()
+        conn.close()
+
+
+@pytest.mark.unit
+def test_signals_cursor_pages_cover_every_signal():
+    all_ids = [row["id"] for row in client.get("/signals", params={"limit": 200}).json()]
+    pages = _walk("/signals", {}, 2)
+    assert [row["id"] for page in pages for row in page] == all_ids
+
+
+@pytest.mark.unit
+def test_api_trades_and_smart_cursor_pages(monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from database import Base
+    from models import SmartWallet, Trade
+
+    # One shared in-memory database for the request threads.
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    base = datetime(2025, 1, 1)
+    db.add_all(
+        Trade(id=f"t{i:02d}", market="m", question="Q", address=f"0x{i}", side="BUY", price=0.5, size=1,
+              value=1.0, timestamp=base + timedelta(minutes=i // 2))
+        for i in range(9)
+    )
+    db.add_all(
+        SmartWallet(address=f"0x{i}", profit=float(i % 3), roi=0.1, win_rate=0.5, total_trades=1)
+        for i in range(7)
+    )
+    db.commit()
+    db.close()
+    monkeypatch.setattr(main_module, "get_session", session_factory)
+
+    pages = _walk("/api/trades", {}, 4)
+    assert [row["id"] for page in pages for row in page] == [f"t{i:02d}" for i in range(8, -1, -1)]
+    pages = _walk("/api/smart", {}, 3)
+    addresses = [row["address"] for page in pages for row in page]
+    assert sorted(addresses) == [f"0x{i}" for i in range(7)]
+    assert addresses == [row["address"] for row in client.get("/api/smart", params={"limit": 50}).json()]
+    engine.dispose()
+
+
+@pytest.mark.unit
+def test_cached_bodies_carry_etags_and_gzip_variants():
+    main_module.cache.clear_pattern("api_cache:signals:*")
+    for idx in range(30):
+        app_db.create_signal(f"Etag signal {idx}", "body " * 20, "free")
+    first = client.get("/signals", params={"limit": 30}, headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert "content-encoding" not in first.headers
+
+    again = client.get("/signals", params={"limit": 30}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    zipped = client.get("/signals", params={"limit": 30}, headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.headers["etag"] == etag[:-1] + '-gzip"'
+    assert zipped.json() == first.json()
+    revalidated = client.get("/signals", params={"limit": 30}, headers={"If-None-Match": zipped.headers["etag"]})
+    assert revalidated.status_code == 304
+
+@pytest.mark.unit
+def test_failed_refresh_forgets_listing_validators(monkeypatch):
+    import polymarket
+    from ingestion import IngestionResult
+    from trade_batch import TradeBatch
+
+    def ingest(**kwargs):
+        # What fetch_markets_conditional leaves behind for a changed listing.
+        polymarket._listing_cache[("listing", ())] = {"etag": '"v1"', "digest": "d", "data": []}
+        return IngestionResult([{"id": "m1"}], TradeBatch.empty(), TradeBatch.empty(), markets_changed=True)
+
+    def broken_upsert(market):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(main_module, "_load_trade_cursors", lambda session: {})
+    monkeypatch.setattr(main_module, "run_ingestion", ingest)
+    monkeypatch.setattr(main_module, "_normalize_market", broken_upsert)
+    try:
+        main_module.refresh_polymarket_data()
+        # A 304 next cycle would otherwise skip the upsert that rolled back.
+        assert polymarket._listing_cache == {}
+    finally:
+        polymarket.reset_listing_cache()
@@ -0,0 +1,112 @@
+import pytest
+import app.database as app_db
+from app import engine as db_engine
+
+
+@pytest.fixture
+def whale_db(tmp_path):
+    previous = db_engine.database_url()
+    db_engine.configure(f"sqlite:///{tmp_path / 'whales.db'}")
+    app_db.init_db()
+    yield
+    db_engine.configure(previous)
+
+
+def _whale(idx: int, value: float = 5000.0) -> dict:
+    return {
+        "timestamp": 1700000000 + idx,
+        "maker_address": f"0x{idx % 3}",
+        "market_question": "Q?",
+        "outcome": "Yes",
+        "side": "BUY",
+        "size": value / 0.5,
+        "price": 0.5,
+        "value_usd": value,
+        "market_slug": "q"
+    }
+
+
+def _count() -> int:
+    conn = app_db.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) AS n FROM whale_trades")
+        return cursor.fetchone()["n"]
+    finally:
+        conn.close()
+
+
+@pytest.mark.unit
+def test_save_whale_trades_inserts_in_chunks_and_skips_duplicates(whale_db):
+    trades = [_whale(i) for i in range(25)]
+    assert app_db.save_whale_trades(trades, chunk_size=10) == 25
+    assert app_db.save_whale_trades(trades + [_whale(25)], chunk_size=10) == 1
+    assert _count() == 26
+
+
+@pytest.mark.unit
+def test_save_whale_trades_skips_incomplete_rows(whale_db):
+    broken = _whale(1)
+    del broken["market_slug"]
+    assert app_db.save_whale_trades([broken, _whale(2)]) == 1
+    app_db.save_whale_trade(_whale(3))
+    assert _count() == 2
+
+
+@pytest.mark.unit
+def test_save_whale_trades_is_one_transaction(whale_db):
+    trades = [_whale(i) for i in range(5)] + [dict(_whale(5), size=object())]
+    assert app_db.save_whale_trades(trades, chunk_size=2) == 0
+    assert _count() == 0
+
+
+def _aggregate() -> dict:
+    conn = app_db.get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT maker_address, SUM(value_usd) AS total_volume, COUNT(*) AS trade_count,
+                   MAX(value_usd) AS max_trade_value,
+                   SUM(CASE WHEN side = 'BUY' THEN value_usd ELSE 0 END) AS buy_volume,
+                   SUM(CASE WHEN side = 'SELL' THEN value_usd ELSE 0 END) AS sell_volume
+            FROM whale_trades GROUP BY maker_address
+        ''')
+        return {row["maker_address"]: dict(row) for row in cursor.fetchall()}
+    finally:
+        conn.close()
+
+
+def _leaderboard() -> dict:
+    return {row["maker_address"]: row for row in app_db.get_leaderboard_stats(limit=100)}
+
+
+@pytest.mark.unit
+def test_leaderboard_tracks_inserts_and_deletes(whale_db):
+    trades = [dict(_whale(i, 1000.0 + i * 250), side="SELL" if i % 2 else "BUY") for i in range(12)]
+    app_db.save_whale_trades(trades)
+    app_db.save_whale_trades(trades[:4])
+    assert _leaderboard() == _aggregate()
+    volumes = [row["total_volume"] for row in app_db.get_leaderboard_stats(limit=3)]
+    assert volumes == sorted(volumes, reverse=True)
+
+    conn = app_db.get_db_connection()
+    cursor = conn.cursor()
+    # Drops 0x2's largest trade and all of 0x1.
+    cursor.execute("DELETE FROM whale_trades WHERE maker_address = '0x1' OR value_usd = ?", (1000.0 + 11 * 250,))
+    conn.commit()
+    conn.close()
+    assert "0x1" not in _leaderboard()
+    assert _leaderboard() == _aggregate()
+
+
+@pytest.mark.unit
+def test_rebuild_whale_leaderboard_repairs_drift(whale_db):
+    app_db.save_whale_trades([_whale(i) for i in range(9)])
+    conn = app_db.get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE whale_leaderboard SET total_volume = 0, trade_count = 99")
+    cursor.execute("INSERT INTO whale_leaderboard VALUES ('0xghost', 1, 1, 1, 1, 0)")
+    conn.commit()
+    conn.close()
+    assert app_db.rebuild_whale_leaderboard() == 3
+    assert _leaderboard() == _aggregate()
@@ -0,0 +1,329 @@
+"""
+Columnar trade batches for the ingestion hot path.
+
+A ``TradeBatch`` holds one column per ``Trade`` field: prices, sizes, values
+and timestamps as numpy arrays, and market / question / address / side as
+int32 codes into per-batch string tables.  Whale detection, the smart-wallet
+aggregation and the bulk inserts all read these columns directly instead of
+walking one dict per trade.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import Trade, Whale
+from whale import market_identity, trade_fields
+
+_STRING_COLUMNS = ("market", "question", "address", "side")
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+# Ids per ``IN (...)`` lookup, well under SQLite's bound-parameter limit.
+_ID_CHUNK_SIZE = 500
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _datetime64(values: Sequence[datetime]) -> np.ndarray:
+    # numpy's own datetime -> datetime64 conversion goes through a slow
+    # per-object path; integer microseconds since the epoch are ~6x faster.
+    micros = np.fromiter(((value - _EPOCH) // _MICROSECOND for value in values), dtype=np.int64, count=len(values))
+    return micros.view("datetime64[us]")
+
+
+class _Interner:
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class TradeBatch:
+    __slots__ = ("ids", "codes", "tables", "price", "size", "value", "timestamp")
+
+    def __init__(
+        self,
+        ids: List[str],
+        codes: Dict[str, np.ndarray],
+        tables: Dict[str, List[str]],
+        price: np.ndarray,
+        size: np.ndarray,
+        value: np.ndarray,
+        timestamp: np.ndarray
+    ):
+        self.ids = ids
+        self.codes = codes
+        self.tables = tables
+        self.price = price
+        self.size = size
+        self.value = value
+        self.timestamp = timestamp
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def empty(cls) -> "TradeBatch":
+        return TradeBatchBuilder().build()
+
+    @classmethod
+    def from_trades(cls, trades: Iterable[Dict]) -> "TradeBatch":
+        """Build from already-normalized trade dicts (``whale.normalize_trade``)."""
+        builder = TradeBatchBuilder()
+        for trade in trades:
+            builder.append_fields(
+                trade["id"], trade["market"], trade["question"], trade["address"], trade["side"],
+                trade["price"], trade["size"], trade["value"], trade["timestamp"]
+            )
+        return builder.build()
+
+    @classmethod
+    def concat(cls, batches: Sequence["TradeBatch"]) -> "TradeBatch":
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        codes: Dict[str, np.ndarray] = {}
+        tables: Dict[str, List[str]] = {}
+        for name in _STRING_COLUMNS:
+            interner = _Interner()
+            parts = []
+            for batch in batches:
+                remap = np.fromiter(
+                    (interner.code(v) for v in batch.tables[name]),
+                    dtype=np.int32,
+                    count=len(batch.tables[name])
+                )
+                parts.append(remap[batch.codes[name]])
+            codes[name] = np.concatenate(parts)
+            tables[name] = interner.values
+        return cls(
+            ids=[trade_id for batch in batches for trade_id in batch.ids],
+            codes=codes,
+            tables=tables,
+            price=np.concatenate([batch.price for batch in batches]),
+            size=np.concatenate([batch.size for batch in batches]),
+            value=np.concatenate([batch.value for batch in batches]),
+            timestamp=np.concatenate([batch.timestamp for batch in batches])
+        )
+
+    def take(self, index: np.ndarray) -> "TradeBatch":
+        """Rows selected by an integer index or boolean mask; tables are shared."""
+        positions = np.flatnonzero(index) if index.dtype == bool else index
+        return TradeBatch(
+            ids=[self.ids[i] for i in positions.tolist()],
+            codes={name: codes[positions] for name, codes in self.codes.items()},
+            tables=self.tables,
+            price=self.price[positions],
+            size=self.size[positions],
+            value=self.value[positions],
+            timestamp=self.timestamp[positions]
+        )
+
+    def strings(self, name: str) -> List[str]:
+        return np.asarray(self.tables[name], dtype=object)[self.codes[name]].tolist()
+
+    def timestamps(self) -> List[datetime]:
+        return self.timestamp.tolist()
+
+    def latest(self) -> Optional[Tuple[datetime, str]]:
+        """(timestamp, id) of the newest trade; the first one wins ties."""
+        if not len(self):
+            return None
+        idx = int(np.argmax(self.timestamp))
+        return self.timestamp[idx].item(), self.ids[idx]
+
+    def to_dicts(self) -> List[Dict]:
+        columns = {name: self.strings(name) for name in _STRING_COLUMNS}
+        return [
+            {
+                "id": trade_id,
+                "market": market,
+                "question": question,
+                "address": address,
+                "side": side,
+                "price": price,
+                "size": size,
+                "value": value,
+                "timestamp": timestamp
+            }
+            for trade_id, market, question, address, side, price, size, value, timestamp in zip(
+                self.ids, columns["market"], columns["question"], columns["address"], columns["side"],
+                self.price.tolist(), self.size.tolist(), self.value.tolist(), self.timestamps()
+            )
+        ]
+
+
+class TradeBatchBuilder:
+    """Row-at-a-time accumulator; ``build`` transposes into columns once."""
+
+    def __init__(self):
+        self._rows: List[Tuple] = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def append_fields(
+        self,
+        trade_id: str,
+        market: str,
+        question: str,
+        address: str,
+        side: str,
+        price: float,
+        size: float,
+        value: float,
+        timestamp: datetime
+    ) -> None:
+        self._rows.append((trade_id, market, question, address, side, price, size, value, timestamp))
+
+    def append(self, market: Dict, trade: Dict) -> Tuple[str, datetime]:
+        """Normalize a raw record into the batch; returns its (id, timestamp)."""
+        market_id, question = market_identity(market)
+        trade_id, address, side, price, size, value, timestamp = trade_fields(market_id, trade)
+        self._rows.append((trade_id, market_id, question, address, side, price, size, value, timestamp))
+        return trade_id, timestamp
+
+    def pop(self) -> None:
+        """Drop the last appended row."""
+        self._rows.pop()
+
+    def build(self) -> TradeBatch:
+        if not self._rows:
+            columns = [()] * 9
+        else:
+            columns = list(zip(*self._rows))
+        codes: Dict[str, np.ndarray] = {}
+        tables: Dict[str, List[str]] = {}
+        for name, column in zip(_STRING_COLUMNS, columns[1:5]):
+            table: Dict[str, int] = {}
+            codes[name] = np.fromiter(
+                (table.setdefault(text, len(table)) for text in column),
+                dtype=np.int32,
+                count=len(column)
+            )
+            tables[name] = list(table)
+        return TradeBatch(
+            ids=list(columns[0]),
+            codes=codes,
+            tables=tables,
+            price=np.asarray(columns[5], dtype=np.float64),
+            size=np.asarray(columns[6], dtype=np.float64),
+            value=np.asarray(columns[7], dtype=np.float64),
+            timestamp=_datetime64(columns[8])
+        )
+
+
+def whale_mask(batch: TradeBatch, min_value: float = 1000) -> np.ndarray:
+    return batch.value >= min_value
+
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+_statements: Dict[Tuple[str, str], Tuple[str, Tuple[str, ...], bool]] = {}
+
+
+def _compiled(table, conflict_column: str, dialect) -> Tuple[str, Tuple[str, ...], bool]:
+    """``(sql, bind names, positional)`` for an executemany of ``table`` rows.
+
+    Positional paramstyles (SQLite's ``?``) take tuples in bind order, named
+    ones (psycopg2's ``%(name)s``) dicts keyed by bind name.
+    """
+    key = (table.name, dialect.name)
+    compiled = _statements.get(key)
+    if compiled is None:
+        columns = [c.key for c in table.columns if not (c.primary_key and c.autoincrement is True)]
+        stmt = _INSERTS[dialect.name](table).on_conflict_do_nothing(index_elements=[conflict_column])
+        # for_executemany: no implicit RETURNING of the primary key.
+        result = stmt.compile(dialect=dialect, column_keys=columns, for_executemany=True)
+        positional = result.positiontup is not None
+        names = tuple(result.positiontup) if positional else tuple(result.params)
+        compiled = (str(result), names, positional)
+        _statements[key] = compiled
+    return compiled
+
+
+def _bind_timestamps(column, values: np.ndarray, dialect) -> List:
+    if dialect.name == "sqlite":
+        # Same text SQLAlchemy's SQLite DATETIME stores, formatted in one pass.
+        return np.char.replace(np.datetime_as_string(values, unit="us"), "T", " ").tolist()
+    processor = column.type.bind_processor(dialect)
+    datetimes = values.tolist()
+    return [processor(v) for v in datetimes] if processor else datetimes
+
+
+def _execute_columns(session, table, conflict_column: str, columns: Dict[str, List]) -> int:
+    connection = session.connection()
+    sql, names, positional = _compiled(table, conflict_column, connection.dialect)
+    rows = list(zip(*(columns[name] for name in names)))
+    if not rows:
+        return 0
+    if not positional:
+        rows = [dict(zip(names, row)) for row in rows]
+    result = connection.exec_driver_sql(sql, rows)
+    return max(result.rowcount or 0, 0)
+
+
+def new_trades(session, batch: TradeBatch) -> TradeBatch:
+    """Rows of ``batch`` whose ids aren't stored yet, first occurrence only."""
+    if not len(batch):
+        return batch
+    ids = list(dict.fromkeys(batch.ids))
+    seen = set()
+    for offset in range(0, len(ids), _ID_CHUNK_SIZE):
+        chunk = ids[offset:offset + _ID_CHUNK_SIZE]
+        seen.update(row[0] for row in session.query(Trade.id).filter(Trade.id.in_(chunk)))
+    keep = []
+    for i, trade_id in enumerate(batch.ids):
+        if trade_id not in seen:
+            seen.add(trade_id)
+            keep.append(i)
+    if len(keep) == len(batch):
+        return batch
+    return batch.take(np.asarray(keep, dtype=np.intp))
+
+
+def insert_trades(session, batch: TradeBatch) -> int:
+    """INSERT .. ON CONFLICT DO NOTHING every row; returns rows inserted."""
+    if not len(batch):
+        return 0
+    dialect = session.connection().dialect
+    table = Trade.__table__
+    created_at = _bind_timestamps(table.c.created_at, _datetime64([_utcnow()]), dialect)
+    columns = {name: batch.strings(name) for name in _STRING_COLUMNS}
+    columns.update(
+        id=batch.ids,
+        price=batch.price.tolist(),
+        size=batch.size.tolist(),
+        value=batch.value.tolist(),
+        timestamp=_bind_timestamps(table.c.timestamp, batch.timestamp, dialect),
+        created_at=created_at * len(batch)
+    )
+    return _execute_columns(session, table, "id", columns)
+
+
+def insert_whales(session, batch: TradeBatch, min_value: float = 1000) -> int:
+    whales = batch.take(whale_mask(batch, min_value))
+    if not len(whales):
+        return 0
+    dialect = session.connection().dialect
+    table = Whale.__table__
+    created_at = _bind_timestamps(table.c.created_at, _datetime64([_utcnow()]), dialect)
+    columns = {
+        "trade_id": whales.ids,
+        "address": whales.strings("address"),
+        "value": whales.value.tolist(),
+        "timestamp": _bind_timestamps(table.c.timestamp, whales.timestamp, dialect),
+        "created_at": created_at * len(whales)
+    }
+    return _execute_columns(session, table, "trade_id", columns)
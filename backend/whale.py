@@ -1,17 +1,12 @@
 from datetime import datetime, timezone
-from typing import Dict, List
+from typing import Dict, List, Tuple
+from app.timestamps import TimestampParser
 
+# Trade records from the Data API share one layout; sniff it once.
+_trade_timestamps = TimestampParser()
 
-def normalize_trade(market: Dict, trade: Dict) -> Dict:
-    price = float(trade.get("price", 0) or 0)
-    size = float(trade.get("size", 0) or 0)
-    value = price * size
-    address = trade.get("maker_address") or trade.get("makerAddress") or trade.get("proxyWallet") or ""
-    side = trade.get("side") or "BUY"
-    trade_id = str(trade.get("id") or trade.get("trade_id") or trade.get("tx_hash") or "")
-    timestamp_raw = trade.get("timestamp") or trade.get("time") or trade.get("createdAt")
-    timestamp = _parse_timestamp(timestamp_raw)
 
+def market_identity(market: Dict) -> Tuple[str, str]:
     market_id = (
         market.get("id")
         or market.get("conditionId")
@@ -20,10 +15,28 @@ def normalize_trade(market: Dict, trade: Dict) -> Dict:
         or ""
     )
     question = market.get("question") or market.get("title") or ""
+    return market_id, question
+
+
+def trade_fields(market_id: str, trade: Dict) -> Tuple[str, str, str, float, float, float, datetime]:
+    """(id, address, side, price, size, value, timestamp) of a raw trade record."""
+    price = float(trade.get("price", 0) or 0)
+    size = float(trade.get("size", 0) or 0)
+    value = price * size
+    address = trade.get("maker_address") or trade.get("makerAddress") or trade.get("proxyWallet") or ""
+    side = trade.get("side") or "BUY"
+    trade_id = str(trade.get("id") or trade.get("trade_id") or trade.get("tx_hash") or "")
+    timestamp_raw = trade.get("timestamp") or trade.get("time") or trade.get("createdAt")
+    timestamp = _parse_timestamp(timestamp_raw)
 
     if not trade_id:
         trade_id = f"{market_id}-{address}-{timestamp.timestamp() if timestamp else 0}-{value}"
+    return trade_id, address, side, price, size, value, timestamp
 
+
+def normalize_trade(market: Dict, trade: Dict) -> Dict:
+    market_id, question = market_identity(market)
+    trade_id, address, side, price, size, value, timestamp = trade_fields(market_id, trade)
     return {
         "id": trade_id,
         "market": market_id,
@@ -51,14 +64,7 @@ def detect_whales(trades: List[Dict], min_value: float = 1000) -> List[Dict]:
 
 
 def _parse_timestamp(value) -> datetime:
-    if isinstance(value, (int, float)):
-        return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
-    if isinstance(value, str):
-        try:
-            if value.isdigit():
-                return datetime.fromtimestamp(int(value), timezone.utc).replace(tzinfo=None)
-            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
-            return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
-        except Exception:
-            pass
-    return datetime.now(timezone.utc).replace(tzinfo=None)
+    parsed = _trade_timestamps.parse(value)
+    if parsed is None:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    return parsed